@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import unittest
+from textwrap import dedent
+
+from pysmell import tags
+from pysmell.codefinder import processFile
+from pysmell.parsers import PARSERS, getParser
+
+QUIRKS = dedent("""\
+    # -*- coding: utf-8 -*-
+    "module docstring"
+    import os.path as osp, sys
+    from os import path, sep as separator
+    from . import relative
+
+    CONSTANT = -1
+    a, (b, c) = 1, (2, 3)
+    total = 0
+    total += 1
+    del b
+    squares = [x * x for x in range(10)]
+    table = {'key': [k for k in 'ab'], 'other': dict((v, v) for v in 'cd')}
+    print >> sys.stderr, [p for p in 'ef']
+    try:
+        pass
+    except ValueError, error:
+        pass
+    with open(__file__) as handle:
+        pass
+    for index in range(3):
+        pass
+
+    def function(first, (second, third), fourth=-2, fifth=1L, sixth=u'six', *args, **kwargs):
+        "function docstring"
+        local = 1
+
+    def defaults(a=None, b=(1,), c=[1, 2], d={1: 'one'}, e=os.sep, f=len('x'), g=a if b else c,
+                 h=a[0], i=a[1:2], j=a // 2, k=1 << 2, l=a | b | c, m=a & b, n=~a, o=-a, p=not a,
+                 q=a or b, r=a and b, s=a < 2, t=lambda x, *y: x, u=`a`, v=f(a, b=1, *c, **d),
+                 w=2 ** 3 % 4 - 5 * 6 / 7 + 8, x='%s' % a, y=1.5, z=1j):
+        pass
+
+    class Base(object):
+        "class docstring"
+        attribute = 1
+        other, pair = 1, 2
+
+        def __init__(self, value=None):
+            self.value = value
+            self.total += 1
+            self.seen, self.more = 1, 2
+
+        def method(self, (a, b)=(1, 2), c=osp.join('a', 'b')):
+            "method docstring"
+            self.fromMethod = [i for i in a]
+            del self.gone
+
+        @property
+        def computed(self):
+            return 1
+
+        @staticmethod
+        def static(a):
+            pass
+
+        class Nested:
+            nested = 1
+            def nestedMethod(self):
+                self.hidden = 1
+
+    class Child(Base, path.Thing, osp.Other):
+        def method(self):
+            def inner(self):
+                self.innerProperty = 1
+            self.property = lambda: [z for z in 'gh']
+    """)
+
+UNICODE_LITERALS = dedent("""\
+    from __future__ import unicode_literals
+
+    def function(mode='r'):
+        "docstring"
+
+    class Klass(object):
+        "class docstring"
+    """)
+
+
+class AstFinderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, 'package'))
+        open(os.path.join(self.directory, 'package', '__init__.py'), 'w').close()
+        open(os.path.join(self.directory, 'package', 'relative.py'), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def analyse(self, source):
+        path = os.path.join(self.directory, 'package')
+        f = open(os.path.join(path, 'module.py'), 'w')
+        try:
+            f.write(source)
+        finally:
+            f.close()
+        return [processFile('module.py', path, parser=getParser(name)) for name in ['compiler', 'ast']]
+
+    def assertSameTags(self, source):
+        compilerTags, astTags = self.analyse(source)
+        self.assertNotEquals(compilerTags, None)
+        for key in ['CONSTANTS', 'FUNCTIONS', 'HIERARCHY', 'POINTERS']:
+            self.assertEquals(astTags[key], compilerTags[key])
+        self.assertEquals(sorted(astTags['CLASSES']), sorted(compilerTags['CLASSES']))
+        for name, klass in compilerTags['CLASSES'].items():
+            self.assertEquals(astTags['CLASSES'][name], klass)
+        return astTags
+
+    def testQuirks(self):
+        astTags = self.assertSameTags(QUIRKS)
+        self.assertTrue('package.module.squares' in astTags['CONSTANTS'])
+        self.assertTrue('package.module.x' in astTags['CONSTANTS'])
+        self.assertEquals(astTags['POINTERS']['package.module.separator'], 'os.sep')
+
+    def testUnicodeLiterals(self):
+        astTags = self.assertSameTags(UNICODE_LITERALS)
+        self.assertEquals(astTags['FUNCTIONS'], [('package.module.function', ["mode='r'"], 'docstring')])
+
+    def testSyntaxError(self):
+        self.assertEquals(self.analyse('def broken(:\n'), [None, None])
+
+    def testTestData(self):
+        for name in PARSERS:
+            self.assertEquals(tags.process(['TestData'], [], parser=name), tags.process(['TestData'], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
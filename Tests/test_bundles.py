@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pysmell import tags
+from pysmell.bundles import (Distribution, siteDistributions, stdlibDistribution, bundleDirectory,
+                             bundleFilename, pkg_resources)
+from pysmell.shards import shardDirectory
+from pysmell.tagsformat import openTags, readTags
+from pysmell.idehelper import findCompletions, findPYSMELLDICT, CompletionOptions, Types
+
+
+def write(path, contents=''):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    f = open(path, 'w')
+    try:
+        f.write(contents)
+    finally:
+        f.close()
+
+
+class BundlesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.site = os.path.join(self.directory, 'site-packages')
+        write(os.path.join(self.site, 'alpha', '__init__.py'), 'class Alpha(object):\n    pass\n')
+        write(os.path.join(self.site, 'alpha-1.0.egg-info', 'top_level.txt'), 'alpha\n')
+        write(os.path.join(self.site, 'beta.py'), 'def beta(a, b):\n    pass\n')
+        self.bundles = os.path.join(self.directory, 'bundles')
+        self.project = os.path.join(self.directory, 'project')
+        write(os.path.join(self.project, 'module.py'), 'import alpha\n')
+        tags.generateClassTag(tags.process([self.project], []), os.path.join(self.project, 'PYSMELLTAGS'))
+        self.link = os.path.join(self.project, 'PYSMELLTAGS.libs')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def generate(self):
+        tags.generateBundles(self.bundles, self.link, siteDistributions([self.site]))
+
+    def bundleFiles(self):
+        shards = shardDirectory(os.path.join(bundleDirectory(self.bundles), 'PYSMELLTAGS'))
+        return sorted(name for name in os.listdir(shards) if not name.startswith('.'))
+
+    def testSiteDistributions(self):
+        found = dict((d.name, d) for d in siteDistributions([self.site]))
+        self.assertEquals(found['beta'].names(), ['beta'])
+        self.assertEquals(found['beta'].version, str(int(os.path.getmtime(os.path.join(self.site, 'beta.py')))))
+        self.assertEquals(found['alpha'].names(), ['alpha'])
+        if pkg_resources is not None:
+            self.assertEquals(found['alpha'].version, '1.0')
+
+    def testSharedPackage(self):
+        if pkg_resources is None:
+            return
+        write(os.path.join(self.site, 'gamma', '__init__.py'))
+        write(os.path.join(self.site, 'one-1.0.egg-info', 'top_level.txt'), 'gamma\n')
+        write(os.path.join(self.site, 'two-2.0.egg-info', 'top_level.txt'), 'gamma\n')
+        found = [d for d in siteDistributions([self.site]) if 'gamma' in d.names()]
+        self.assertEquals([(d.name, d.version) for d in found], [('one+two', '1.0+2.0')])
+
+    def testStdlib(self):
+        names = stdlibDistribution().names()
+        self.assertTrue('os' in names)
+        self.assertTrue('email' in names)
+        self.assertFalse('site-packages' in names)
+
+    def testLinked(self):
+        self.generate()
+        self.assertEquals(openTags(self.link), openTags(os.path.join(bundleDirectory(self.bundles), 'PYSMELLTAGS')))
+        modules = readTags(self.link)
+        self.assertTrue('alpha.Alpha' in modules['CLASSES'])
+        self.assertEquals([list(f) for f in modules['FUNCTIONS']], [['beta.beta', ['a', 'b'], '']])
+
+        store = findPYSMELLDICT(os.path.join(self.project, 'module.py'))
+        options = CompletionOptions(Types.MODULE, module='alpha', showMembers=True)
+        self.assertEquals([c['word'] for c in findCompletions('', store, options)], ['Alpha'])
+        options = CompletionOptions(Types.TOPLEVEL)
+        self.assertEquals([c['word'] for c in findCompletions('bet', store, options)], ['beta'])
+
+    def testOnlyChangedRebuilt(self):
+        self.generate()
+        self.assertEquals(len(self.bundleFiles()), 2)
+        analysed = []
+        process = tags.process
+        def recordingProcess(paths, *args, **kwargs):
+            analysed.extend(paths)
+            return process(paths, *args, **kwargs)
+        tags.process = recordingProcess
+        try:
+            self.generate()
+            self.assertEquals(analysed, [])
+            write(os.path.join(self.site, 'alpha', '__init__.py'), 'class Renamed(object):\n    pass\n')
+            old = bundleFilename(Distribution('alpha', '1.0', []), 'compiler')
+            os.rename(os.path.join(self.site, 'alpha-1.0.egg-info'), os.path.join(self.site, 'alpha-1.1.egg-info'))
+            self.generate()
+        finally:
+            tags.process = process
+        if pkg_resources is None:
+            return
+        self.assertEquals(analysed, [os.path.join(self.site, 'alpha')])
+        self.assertFalse(old in self.bundleFiles())
+        self.assertTrue('alpha.Renamed' in readTags(self.link)['CLASSES'])
+
+    def testParsersKeptApart(self):
+        self.generate()
+        complete = self.bundleFiles()
+        tags.generateBundles(self.bundles, self.link, siteDistributions([self.site]), parser='outline')
+        self.assertEquals(self.bundleFiles(), complete)
+        fast = shardDirectory(os.path.join(bundleDirectory(self.bundles, 'outline'), 'PYSMELLTAGS'))
+        self.assertEquals(sorted(name for name in os.listdir(fast) if not name.startswith('.')),
+                          [name.replace('.compiler.', '.outline.') for name in complete])
+        self.assertEquals(openTags(self.link), openTags(os.path.join(bundleDirectory(self.bundles, 'outline'),
+                                                                     'PYSMELLTAGS')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pysmell import tags
+from pysmell.cache import AnalysisCache
+
+
+class AnalysisCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = AnalysisCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testHitsMatchAnalysis(self):
+        stats = {}
+        expected = tags.process(['TestData'], [], cache=self.cache, stats=stats)
+        self.assertEquals((stats['cacheHits'], stats['cacheMisses']), (0, 7))
+        cached = tags.process(['TestData'], [], cache=self.cache, stats=stats)
+        self.assertEquals((stats['cacheHits'], stats['cacheMisses']), (7, 0))
+        self.assertEquals(cached, expected)
+        self.assertEquals(cached['HIERARCHY'], expected['HIERARCHY'])
+        saved = self.cache.readStats()
+        self.assertEquals((saved['hits'], saved['misses']), (7, 7))
+
+    def testKeyDependsOnPackage(self):
+        path = os.path.abspath(os.path.join('TestData', 'PackageA'))
+        copy = os.path.join(self.directory, 'Copy')
+        os.mkdir(copy)
+        shutil.copy(os.path.join(path, 'ModuleA.py'), copy)
+        self.assertNotEquals(self.cache.keyFor('ModuleA.py', path),
+                             self.cache.keyFor('ModuleA.py', copy))
+
+    def testEvictsLeastRecentlyUsed(self):
+        tags.process(['TestData'], [], cache=self.cache)
+        entries = self.cache.entries()
+        self.assertEquals(len(entries), 7)
+        entries.sort()
+        newest = entries[-1][2]
+        self.cache.maxSize = entries[-1][1]
+        self.assertEquals(self.cache.evict(), 6)
+        self.assertEquals([path for _, _, path in self.cache.entries()], [newest])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@ import compiler
 from pprint import pformat
 
 from pysmell.codefinder import CodeFinder, getClassAndParents, getNames, ModuleDict, findPackage, analyzeFile, getSafeTree
-from pysmell.codefinder import argToStr
+from pysmell.codefinder import argToStr, analyzeBuffer, getImports
 
 class ModuleDictTest(unittest.TestCase):
     def testUpdate(self):
@@ -38,6 +38,41 @@ class ModuleDictTest(unittest.TestCase):
         md.addPointer('something', 'other')
         self.assertEquals(md['POINTERS'], {'something': 'other'})
 
+    def testDropModules(self):
+        md = ModuleDict()
+        md.enterModule('pkg')
+        md.addFunction('func', [], '')
+        md.addPointer('pkg.mod', 'pkg.mod')
+        md.enterModule('pkg.mod')
+        md.enterClass('cls', [], '')
+        md.addProperty(None, 'CONST')
+        md.addPointer('pkg.mod.os.path', 'os.path')
+        md.dropModules(['pkg.mod'])
+        self.assertEquals(md['HIERARCHY'], ['pkg'])
+        self.assertEquals(md['CLASSES'], {})
+        self.assertEquals(md['CONSTANTS'], [])
+        self.assertEquals(md['FUNCTIONS'], [('pkg.func', [], '')])
+        self.assertEquals(md['POINTERS'], {'pkg.mod': 'pkg.mod'})
+
+    def testDuplicateMembers(self):
+        md = ModuleDict()
+        md.enterModule('mod')
+        md.enterClass('cls', [], '')
+        md.addMethod('cls', 'meth', ['a'], '')
+        md.addMethod('cls', 'meth', ['a'], '')
+        md.addMethod('cls', 'meth', ['b'], '')
+        md.addProperty('cls', 'prop')
+        md.enterClass('other', [], '')
+        md.addProperty('other', 'prop')
+        md.addProperty('cls', 'prop')
+        self.assertEquals(md['CLASSES']['mod.cls']['methods'], [('meth', ['a'], ''), ('meth', ['b'], '')])
+        self.assertEquals(md['CLASSES']['mod.cls']['properties'], ['prop'])
+        self.assertEquals(md['CLASSES']['mod.other']['properties'], ['prop'])
+        # a class defined again starts from scratch
+        md.enterClass('cls', [], '')
+        md.addProperty('cls', 'prop')
+        self.assertEquals(md['CLASSES']['mod.cls']['properties'], ['prop'])
+
 
 class CodeFinderTest(unittest.TestCase):
 
@@ -296,14 +331,14 @@ class CodeFinderTest(unittest.TestCase):
     
     def testRelativeImports(self):
         import pysmell.codefinder
-        oldExists = pysmell.codefinder.os.path.exists
+        oldExists = pysmell.codefinder.fscache.exists
         # monkeypatch relative.py into the path somewhere
         paths = []
         def mockExists(path):
             paths.append(path)
             return True
 
-        pysmell.codefinder.os.path.exists = mockExists
+        pysmell.codefinder.fscache.exists = mockExists
 
         try:
             out = self.getModule("""
@@ -322,7 +357,7 @@ class CodeFinderTest(unittest.TestCase):
             ]
             self.assertEquals(paths, expectedPaths)
         finally:
-            pysmell.codefinder.os.path.exists = oldExists
+            pysmell.codefinder.fscache.exists = oldExists
 
 
     def testHierarchy(self):
@@ -487,6 +522,38 @@ class InferencingTest(unittest.TestCase):
         outDict = analyzeFile(path, getSafeTree(source, 1))
         self.assertEquals(outDict, expectedDict, '%r != %r' % (outDict._modules, expectedDict._modules))
 
+
+    def testAnalyzeBuffer(self):
+        path = os.path.abspath('File.py')
+        source = dedent("""\
+            import os
+            from something import Class as Other
+            CONSTANT = [x for x in os.listdir('.')]
+
+            a = Other()
+
+            class AClass(Other):
+                def method(self, arg, default=[y for y in 'ab'], *args):
+                    self.prop = arg
+                    class Nested(object):
+                        b = a
+                        from other import thing
+                    pass
+
+            @decorator
+            def function(arg=lambda: 1):
+                import sys
+                c = sys.path
+        """)
+        tree = getSafeTree(source, 1)
+        analysis = analyzeBuffer(path, tree)
+        self.assertEquals(analysis.modules, analyzeFile(path, tree))
+        self.assertEquals(analysis.imports, getImports(tree))
+        self.assertEquals((analysis.names, analysis.klasses), getNames(tree))
+        for line in range(1, 20):
+            self.assertEquals(analysis.classAndParents(line), getClassAndParents(tree, line))
+        self.assertEquals(analyzeBuffer(path, None), None)
+
     
 
 if __name__ == '__main__':
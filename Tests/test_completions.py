@@ -2,7 +2,8 @@ import unittest
 from textwrap import dedent
 import os
 
-from pysmell.idehelper import findCompletions, CompletionOptions, Types
+from pysmell.idehelper import (findCompletions, CompletionOptions, Types, CompletionIndex,
+    IndexedTags, completionIndex, updatePySmellDict)
 
 
 def compMeth(name, klass):
@@ -194,6 +195,49 @@ class CompletionTest(unittest.TestCase):
 
 
 
+def indexed(*parts):
+    "a PYSMELLDICT like findPYSMELLDICT makes of tags files"
+    tags = IndexedTags()
+    for part in parts:
+        updatePySmellDict(tags, part)
+    tags.seal()
+    return tags
+
+
+class IndexedCompletionTest(CompletionTest):
+    "the same, with a CompletionIndex"
+    def setUp(self):
+        CompletionTest.setUp(self)
+        self.plain = self.pysmelldict
+        self.pysmelldict = indexed(self.pysmelldict)
+        self.nestedDict = indexed(self.nestedDict)
+        self.complicatedDict = indexed(self.complicatedDict)
+
+    def testIndexedWithPrefix(self):
+        index = CompletionIndex(self.plain)
+        self.assertEquals([candidate[0] for candidate in index.topLevel('A')],
+                          ['a', 'aClass', 'aconstant', 'arg'])
+        self.assertEquals([candidate[0] for candidate in index.topLevel('aC', True)], ['aClass'])
+        self.assertEquals(index.topLevel('z'), [])
+        self.assertEquals(len(index.topLevel()), 7)
+        self.assertEquals(sorted(candidate[0] for candidate in index.moduleMembers('Module')),
+                          ['a', 'aClass', 'aconstant', 'arg', 'b', 'bClass', 'bconst'])
+
+    def testIndexReused(self):
+        self.assertTrue(completionIndex(indexed(self.plain)) is completionIndex(indexed(self.plain)))
+        self.assertFalse(completionIndex(indexed(self.plain)) is completionIndex(indexed(dict(self.plain))))
+
+    def testMergedLater(self):
+        buffer = {'CONSTANTS': ['Module.cconst'], 'FUNCTIONS': [], 'HIERARCHY': ['Module'], 'POINTERS': {},
+                  'CLASSES': {'Module.bClass': {'constructor': ['x'], 'bases': [], 'properties': ['eprop'],
+                                                'methods': []}}}
+        updatePySmellDict(self.pysmelldict, buffer)
+        compls = findCompletions('', self.pysmelldict, CompletionOptions(Types.TOPLEVEL), 'case-sensitive')
+        self.assertEquals([c['word'] for c in compls], ['a', 'aClass', 'aconstant', 'arg', 'b', 'bClass', 'bconst', 'cconst'])
+        self.assertEquals(compls[5]['abbr'], 'bClass(x)')
+        options = CompletionOptions(Types.INSTANCE, klass='Module.bClass', parents=[])
+        self.assertEquals(findCompletions('', self.pysmelldict, options), [compProp('eprop', 'bClass')])
+
 
 if __name__ == '__main__':
     unittest.main()
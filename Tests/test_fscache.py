@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pysmell.fscache import FSCache
+
+
+class FSCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, 'pkg'))
+        open(os.path.join(self.directory, 'pkg', '__init__.py'), 'w').close()
+        open(os.path.join(self.directory, 'module.py'), 'w').close()
+        self.fs = FSCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testProbes(self):
+        fs = self.fs
+        self.assertTrue(fs.exists(os.path.join(self.directory, 'module.py')))
+        self.assertTrue(fs.exists(os.path.join(self.directory, 'pkg')))
+        self.assertTrue(fs.exists(os.path.join(self.directory, 'pkg') + os.sep))
+        self.assertFalse(fs.exists(os.path.join(self.directory, 'missing.py')))
+        self.assertFalse(fs.exists(os.path.join(self.directory, 'missing', 'module.py')))
+        self.assertTrue(fs.isPackage(os.path.join(self.directory, 'pkg')))
+        self.assertFalse(fs.isPackage(self.directory))
+        self.assertEquals(fs.listdir(self.directory), ['module.py', 'pkg'])
+        self.assertEquals(fs.counts(), (8, 3))
+
+    def testInvalidate(self):
+        fs = self.fs
+        path = os.path.join(self.directory, 'new.py')
+        self.assertFalse(fs.exists(path))
+        open(path, 'w').close()
+        self.assertFalse(fs.exists(path))
+        fs.invalidate(self.directory)
+        self.assertTrue(fs.exists(path))
+        os.remove(path)
+        fs.expire(60)
+        self.assertTrue(fs.exists(path))
+        fs.expire(0)
+        self.assertFalse(fs.exists(path))
+        os.mkdir(path)
+        fs.invalidate()
+        self.assertTrue(fs.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
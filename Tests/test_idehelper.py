@@ -1,10 +1,15 @@
 import copy
 import os
+import shutil
+import tempfile
 import unittest
 from textwrap import dedent
 
 from pysmell.idehelper import (inferClass, detectCompletionType,
-    CompletionOptions, findPYSMELLDICT, Types, findBase, getSafeTree)
+    CompletionOptions, findPYSMELLDICT, Types, findBase, getSafeTree, findCompletions,
+    completionIndex, CompletionIndex)
+from pysmell.tagsformat import dumpText, tagsCache
+from pysmell.tags import generateClassTag, process
 
 NESTEDDICT = {
         'CONSTANTS' : [],
@@ -75,6 +80,72 @@ class IDEHelperTest(unittest.TestCase):
             pysmell.idehelper.listdir = oldListDir
 
 
+    def testFoundTagsCached(self):
+        directory = tempfile.mkdtemp()
+        try:
+            f = open(os.path.join(directory, 'PYSMELLTAGS'), 'w')
+            try:
+                dumpText(NESTEDDICT, f)
+            finally:
+                f.close()
+            hits, misses = tagsCache.counts()
+            tags = findPYSMELLDICT(os.path.join(directory, 'module.py'))
+            self.assertEquals(tags, NESTEDDICT)
+            # completions merge the edited buffer into what they found
+            detectCompletionType(os.path.join(directory, 'module.py'), 'CONSTANT = 1\n', 1, 0, '', tags)
+            self.assertTrue('module.CONSTANT' in tags['CONSTANTS'])
+            self.assertEquals(findPYSMELLDICT(os.path.join(directory, 'module.py')), NESTEDDICT)
+            self.assertEquals(tagsCache.counts(), (hits + 1, misses + 1))
+        finally:
+            shutil.rmtree(directory)
+
+    def testIndexedWithSymbolTable(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'module.py')
+            generateClassTag(process(['TestData'], []), os.path.join(directory, 'PYSMELLTAGS'))
+            store = findPYSMELLDICT(path)
+            index = completionIndex(store)
+            self.assertTrue(isinstance(index, CompletionIndex))
+            self.assertTrue(completionIndex(findPYSMELLDICT(path)) is index)
+            plain = store.toDict()
+            for base, options in [('Cl', CompletionOptions(Types.TOPLEVEL)),
+                                  ('', CompletionOptions(Types.MODULE, module='PackageA.ModuleA', showMembers=True)),
+                                  ('', CompletionOptions(Types.INSTANCE, klass='PackageA.ModuleA.ClassA', parents=[]))]:
+                self.assertEquals(findCompletions(base, store, options), findCompletions(base, plain, options))
+
+            # the edited buffer is indexed on its own
+            source = 'class ClassA(object):\n    def changed(self):\n        pass\nClassA().'
+            options = detectCompletionType(path, source, 4, 9, '', store)
+            self.assertEquals(completionIndex(store).indexes[0], index)
+            self.assertTrue('changed' in [c['word'] for c in findCompletions('', store, options)])
+        finally:
+            shutil.rmtree(directory)
+
+    def testQueriedSymbolsKept(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'module.py')
+            generateClassTag(process(['TestData'], []), os.path.join(directory, 'PYSMELLTAGS'), shards=True)
+            options = CompletionOptions(Types.MODULE, module='PackageA.ModuleA', showMembers=True)
+            findCompletions('Cl', findPYSMELLDICT(path), options, 'camel-case')
+            index = completionIndex(findPYSMELLDICT(path))
+            self.assertFalse(isinstance(index, CompletionIndex))
+            symbol = index.knownSymbol('ClassA')
+            self.assertNotEquals(symbol, None)
+            findCompletions('Cl', findPYSMELLDICT(path), options, 'camel-case')
+            self.assertTrue(completionIndex(findPYSMELLDICT(path)).symbol('ClassA') is symbol)
+
+            options = CompletionOptions(Types.TOPLEVEL)
+            words = [c['word'] for c in findCompletions('CA', findPYSMELLDICT(path), options, 'fuzzy-ci')]
+            self.assertTrue('ClassA' in words)
+            names = index.listing[1]
+            self.assertEquals([c['word'] for c in findCompletions('CA', findPYSMELLDICT(path), options, 'fuzzy-ci')],
+                              words)
+            self.assertTrue(index.listing[1] is names)
+        finally:
+            shutil.rmtree(directory)
+
     def testInferClassAbsolute(self):
         source = dedent("""\
             class Class(object):
@@ -1,6 +1,8 @@
 import unittest
 from pysmell.matchers import (matchCaseSensitively, matchCaseInsensitively,
-        matchCamelCased, matchSmartass, matchFuzzyCS, matchFuzzyCI, camelGroups)
+        matchCamelCased, matchSmartass, matchFuzzyCS, matchFuzzyCI, camelGroups,
+        letterMask, Symbol, MatchDict, MATCHERS, matchSymbolsCaseInsensitively, Names,
+        batchCaseInsensitively)
 
 class MatcherTest(unittest.TestCase):
     def testCamelGroups(self):
@@ -83,6 +85,45 @@ class MatcherTest(unittest.TestCase):
         assertMatches('amk', 'alaMaKota')
         assertDoesntMatch('alkoma', 'alaMaKota')
 
+    def testSymbol(self):
+        symbol = Symbol('isHTML_2')
+        self.assertEquals(symbol.lowered, 'ishtml_2')
+        self.assertEquals(symbol.mask, letterMask('HTMLIS2_'))
+        self.assertNotEquals(symbol.mask & letterMask('s'), 0)
+        self.assertEquals(symbol.mask & letterMask('x'), 0)
+        self.assertEquals(symbol.groups(), ['is', 'H', 'T', 'M', 'L', '_', '2'])
+        self.assertEquals(symbol.loweredGroups(), ['is', 'h', 't', 'm', 'l', '_', '2'])
+        self.assertTrue(symbol.groups() is symbol.groups())
+
+    def testSymbolMatchers(self):
+        words = ['alaMaKota', 'AlaMaKota', 'ala_ma_kota', 'Alamakota', 'isHTML', 'wiatrak', '_private']
+        symbols = [Symbol(word) for word in words]
+        for name in MatchDict._MATCHERS:
+            for base in ['', 'a', 'Ala', 'aMK', 'almako', 'amk', 'aaMKa', 'iH', 'ihtml', 'xyz', '_p']:
+                expected = [word for word in words if MATCHERS[name](base)(word)]
+                matches = MATCHERS.forSymbols(name)(base)
+                self.assertEquals([symbol.word for symbol in symbols if matches(symbol)], expected,
+                                  "%s should complete %r with %r" % (name, base, expected))
+        self.assertTrue(MATCHERS.forSymbols('unknown') is matchSymbolsCaseInsensitively)
+
+    def testBatchMatchers(self):
+        words = ['alaMaKota', 'AlaMaKota', 'ala_ma_kota', 'Alamakota', 'isHTML', 'wiatrak', '_private', 'a']
+        names = Names([Symbol(word) for word in words])
+        self.assertEquals(len(names), 8)
+        for name in MatchDict._MATCHERS:
+            for base in ['', 'a', 'Ala', 'aMK', 'almako', 'amk', 'aaMKa', 'iH', 'ihtml', 'xyz', '_p']:
+                matches = MATCHERS[name](base)
+                matching = MATCHERS.batch(name)(base)
+                self.assertEquals([words[i] for i in matching(names)],
+                                  [word for word in words if matches(word)],
+                                  "%s should complete %r" % (name, base))
+                self.assertEquals([words[i] for i in matching(names, 2, 5)],
+                                  [word for word in words[2:5] if matches(word)],
+                                  "%s should complete %r from 2 to 5" % (name, base))
+                self.assertEquals(matching(names, 3, 3), [])
+        self.assertEquals(MATCHERS.batch('case-sensitive')('a')(Names([])), [])
+        self.assertTrue(MATCHERS.batch('unknown') is batchCaseInsensitively)
+
 
 if __name__ == '__main__':
     unittest.main()
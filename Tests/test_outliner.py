@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+import unittest
+from textwrap import dedent
+
+from pysmell.codefinder import processFile
+from pysmell.parsers import getParser
+from pysmell.outliner import logicalLines, tokens, spell
+
+OUTLINE = dedent('''\
+    """module docstring"""
+    import os.path as osp, sys
+    from os import (path,
+                    sep as separator)
+    from . import relative
+    from .relative import *
+
+    CONSTANT = -1 # a comment with 'quotes
+    a, (b, c) = d = 1, (2, 3)
+    total = 0
+    total += 1
+    del b
+    squares = [x * x for x in range(10)]
+    callback = lambda first, second=1: first
+    try: import json
+    except ImportError, error: json = None
+    if a: inline = 1; other = 2
+    with open(__file__) as handle:
+        pass
+    for index in range(3):
+        pass
+
+    def function(first, (second, third), fourth=-2, fifth=1L, sixth=u'six',
+                 seventh='se' "ven", eighth=lambda x, y=1: x, *args, **kwargs):
+        """function docstring
+        on two lines"""
+        local = 1
+        import local.module
+
+    def oneLiner(a=None, b=os.sep, c=[1, 2], d={1: 'one'}, e=len('x'), f=1.5): "docstring"
+
+    class Base(object):
+        "class docstring"
+        attribute = \\
+            1
+        other, pair = 1, 2
+
+        def __init__(self, value=None):
+            self.value = value
+            self.total += 1
+            self.seen, self.more = 1, 2
+            self.items[0] = 1
+            self.value == 1
+
+        def method(self, (a, b)=(1, 2), c=osp.join('a', 'b')):
+            """method docstring"""
+            self.fromMethod = [i for i in a]
+            del self.gone
+
+        @property
+        def computed(self):
+            return 1
+
+        @staticmethod
+        def static(a):
+            pass
+
+        class Nested:
+            nested = 1
+            def nestedMethod(self):
+                self.hidden = 1
+
+    class Child(Base, path.Thing, osp.Other):
+        def method(self): return self
+        def other(self):
+            def inner(self):
+                self.innerProperty = 1
+            self.property = lambda: [z for z in 'gh']
+    ''')
+
+
+class OutlineTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.directory, 'package'))
+        open(os.path.join(self.directory, 'package', '__init__.py'), 'w').close()
+        open(os.path.join(self.directory, 'package', 'relative.py'), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def analyse(self, source):
+        path = os.path.join(self.directory, 'package')
+        f = open(os.path.join(path, 'module.py'), 'w')
+        try:
+            f.write(source)
+        finally:
+            f.close()
+        return [processFile('module.py', path, parser=getParser(name)) for name in ['compiler', 'outline']]
+
+    def testSameTags(self):
+        compilerTags, outlineTags = self.analyse(OUTLINE)
+        self.assertNotEquals(compilerTags, None)
+        for key in ['CONSTANTS', 'FUNCTIONS', 'HIERARCHY', 'POINTERS']:
+            self.assertEquals(outlineTags[key], compilerTags[key])
+        self.assertEquals(sorted(outlineTags['CLASSES']), sorted(compilerTags['CLASSES']))
+        for name, klass in compilerTags['CLASSES'].items():
+            self.assertEquals(outlineTags['CLASSES'][name], klass)
+        self.assertTrue('package.module.x' in outlineTags['CONSTANTS'])
+        self.assertEquals(outlineTags['POINTERS']['package.module.separator'], 'os.sep')
+        self.assertEquals(outlineTags['POINTERS']['package.module.*'], 'package.relative.*')
+
+    def testApproximateSpelling(self):
+        compilerTags, outlineTags = self.analyse('def function(a=b if c else d, e=f[0]): pass\n')
+        self.assertEquals(compilerTags['FUNCTIONS'][0][1],
+            ["a=IfExp(Name('c'), Name('b'), Name('d'))", "e=Subscript(Name('f'), 'OP_APPLY', [Const(0)])"])
+        self.assertEquals(outlineTags['FUNCTIONS'][0][1], ['a=b if c else d', 'e=f[0]'])
+
+    def testSyntaxError(self):
+        self.assertEquals(self.analyse("def broken(a='):\n    pass\n")[1], None)
+
+    def testLogicalLines(self):
+        source = dedent('''\
+            # a comment
+            first = (1,
+                2) # (
+            \tsecond = """
+            ( ' """ + \\
+              'third'
+
+            class A: pass
+            ''')
+        self.assertEquals(logicalLines(source),
+            [(0, 'first = (1,\n    2) # ('), (8, 'second = """\n( \' """ + \\\n  \'third\''),
+             (0, 'class A: pass')])
+        self.assertEquals(tokens(logicalLines(source)[1][1]),
+            [(1, 'second'), (51, '='), (3, '"""\n( \' """'), (51, '+'), (3, "'third'")])
+
+    def testSpell(self):
+        for expression in ['a.b(c, d=1)', "{'a': [1, 2]}", 'x[1:2]', 'not a or b', 'a == 1',
+                           'lambda x, y: x', '-1', 'a+b*2']:
+            self.assertEquals(spell(tokens(expression)), expression)
+        self.assertEquals(spell(tokens('(1,)')), '(1)')
+        self.assertEquals(spell(tokens('"a" \'b\'')), "'ab'")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import unittest
+
+from pysmell import tags
+from pysmell.report import timingReport, formatText, formatJSON, json
+
+
+class ReportTest(unittest.TestCase):
+    def setUp(self):
+        self.stats = {}
+        tags.process(['TestData'], [], stats=self.stats)
+
+    def testPerFile(self):
+        perFile = self.stats['perFile']
+        self.assertEquals(len(perFile), self.stats['files'])
+        for entry in perFile:
+            self.assertTrue(os.path.isabs(entry['path']))
+            self.assertFalse(entry['cached'])
+            self.assertAlmostEquals(entry['total'], entry['parse'] + entry['visit'] + entry['merge'])
+        moduleA = [entry for entry in perFile if entry['path'].endswith(os.path.join('PackageA', 'ModuleA.py'))]
+        f = open(moduleA[0]['path'])
+        try:
+            self.assertEquals(moduleA[0]['lines'], len(f.readlines()))
+        finally:
+            f.close()
+
+    def testReport(self):
+        report = timingReport(self.stats, 3)
+        self.assertEquals(report['files'], 7)
+        self.assertEquals(report['lines'], sum(entry['lines'] for entry in self.stats['perFile']))
+        self.assertEquals(len(report['slowest']), 3)
+        totals = [entry['total'] for entry in report['slowest']]
+        self.assertEquals(totals, sorted(totals, reverse=True))
+        self.assertEquals(totals[0], max(entry['total'] for entry in self.stats['perFile']))
+        text = formatText(report)
+        self.assertTrue('files/s' in text)
+        self.assertTrue(report['slowest'][0]['path'] in text)
+
+    def testJSON(self):
+        if json is None:
+            return
+        report = timingReport(self.stats)
+        self.assertEquals(json.loads(formatJSON(report))['files'], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
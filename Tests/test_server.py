@@ -0,0 +1,146 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from pysmell import tags, client
+from pysmell.idehelper import findCompletions, findPYSMELLDICT, detectCompletionType, Types
+from pysmell.server import Server, Session, answer, supported, json
+from pysmell.tagsformat import tagsCache
+
+SOURCE = 'from PackageA.ModuleA import ClassA\nClassA().'
+
+
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        tags.generateClassTag(tags.process(['TestData'], []), os.path.join(self.directory, 'PYSMELLTAGS'))
+        self.fullPath = os.path.join(self.directory, 'module.py')
+        self.socket = os.path.join(self.directory, 'server.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def expected(self, source, lineNo, col, base):
+        PYSMELLDICT = findPYSMELLDICT(self.fullPath)
+        options = detectCompletionType(self.fullPath, source, lineNo, col, base, PYSMELLDICT)
+        return options, findCompletions(base, PYSMELLDICT, options, 'case-insensitive')
+
+    def testAnswer(self):
+        if not supported():
+            return
+        session = Session()
+        request = {'id': 7, 'method': 'complete', 'params': {'fullPath': self.fullPath,
+                   'source': SOURCE, 'lineNo': 2, 'col': 9, 'base': '', 'matcher': 'case-insensitive'}}
+        response = json.loads(answer(session, json.dumps(request)))
+        self.assertEquals(response['id'], 7)
+        self.assertEquals(response['result']['options']['compType'], Types.INSTANCE)
+        words = [c['word'] for c in self.expected(SOURCE, 2, 9, '')[1]]
+        self.assertEquals([c['word'] for c in response['result']['completions']], words)
+
+        response = json.loads(answer(session, json.dumps({'id': 8, 'method': 'remove'})))
+        self.assertEquals(response, {'id': 8, 'error': "ValueError: unknown method 'remove'"})
+        response = json.loads(answer(session, '{"id": 9, "method": "complete", "params": {}}'))
+        self.assertTrue(response['error'].startswith('TypeError'))
+        response = json.loads(answer(session, 'nonsense'))
+        self.assertEquals(response['id'], None)
+
+    def testBufferKeptForFindCompletions(self):
+        session = Session()
+        source = 'def localFunction(a):\n    pass\nlocalF'
+        options = session.detectCompletionType(self.fullPath, source, 3, 6, 'localF')
+        completions = session.findCompletions(self.fullPath, 'localF', options)
+        self.assertEquals([c['word'] for c in completions], ['localFunction'])
+
+    def testNoTags(self):
+        session = Session()
+        path = os.path.join(tempfile.gettempdir(), 'nowhere', 'module.py')
+        self.assertEquals(session.complete(path, 'a', 1, 1, 'a'), None)
+
+    def testClient(self):
+        if not supported():
+            return
+        server = Server(self.socket)
+        thread = threading.Thread(target=server.serve, args=(0.05,))
+        thread.start()
+        try:
+            for lineNo, col, base in [(2, 9, ''), (1, 33, 'Cl')]:
+                options, completions = client.complete(self.fullPath, SOURCE, lineNo, col, base,
+                                                       'case-insensitive', self.socket)
+                self.assertEquals((options, completions), self.expected(SOURCE, lineNo, col, base))
+                self.assertTrue(options.compType is self.expected(SOURCE, lineNo, col, base)[0].compType)
+            self.assertRaises(client.ServerError, client.request, 'complete', {}, self.socket)
+            self.assertRaises(socket.error, Server, self.socket)
+        finally:
+            server.stop()
+            thread.join()
+        self.assertFalse(os.path.exists(self.socket))
+
+    def testNotUTF8(self):
+        if not supported():
+            return
+        source = '# -*- coding: latin-1 -*-\n# caf\xe9\nfrom PackageA.ModuleA import ClassA\nClassA().'
+        server = Server(self.socket)
+        thread = threading.Thread(target=server.serve, args=(0.05,))
+        thread.start()
+        try:
+            self.assertEquals(client.complete(self.fullPath, source, 4, 9, '', 'case-insensitive', self.socket),
+                              self.expected(source, 4, 9, ''))
+            params = {'fullPath': self.fullPath, 'source': source, 'lineNo': 4, 'col': 9, 'base': ''}
+            self.assertEquals(client.request('complete', params, self.socket)['completions'],
+                              self.expected(source, 4, 9, '')[1])
+        finally:
+            server.stop()
+            thread.join()
+
+    def testInProcessWhenServerFails(self):
+        if not supported():
+            return
+        server = Server(self.socket)
+        thread = threading.Thread(target=server.serve, args=(0.05,))
+        thread.start()
+        complete = Session.complete
+        def failing(self, *args, **kwargs):
+            raise ValueError('failed')
+        Session.complete = failing
+        try:
+            result = client.complete(self.fullPath, SOURCE, 2, 9, '', 'case-insensitive', self.socket)
+            self.assertEquals(result, self.expected(SOURCE, 2, 9, ''))
+        finally:
+            Session.complete = complete
+            server.stop()
+            thread.join()
+
+    def testTagsCacheCounts(self):
+        if not supported():
+            return
+        server = Server(self.socket)
+        thread = threading.Thread(target=server.serve, args=(0.05,))
+        thread.start()
+        stats = Session.stats
+        Session.stats = lambda self: {'tagsHits': 7, 'tagsMisses': 3, 'fsProbes': 0, 'fsListings': 0}
+        try:
+            client.complete(self.fullPath, SOURCE, 2, 9, '', 'case-insensitive', self.socket)
+            self.assertEquals(client.answeredBy, self.socket)
+            self.assertEquals(client.tagsCacheCounts(), (7, 3))
+        finally:
+            Session.stats = stats
+            server.stop()
+            thread.join()
+        self.assertEquals(client.tagsCacheCounts(), None)
+
+        client.complete(self.fullPath, SOURCE, 2, 9, '', 'case-insensitive', self.socket)
+        self.assertEquals(client.answeredBy, None)
+        self.assertEquals(client.tagsCacheCounts(), tagsCache.counts())
+
+    def testInProcessWithoutServer(self):
+        result = client.complete(self.fullPath, SOURCE, 2, 9, '', 'case-insensitive', self.socket)
+        self.assertEquals(result, self.expected(SOURCE, 2, 9, ''))
+        self.assertEquals(client.complete(os.path.join(tempfile.gettempdir(), 'nowhere', 'module.py'),
+                                          'a', 1, 1, 'a', None, self.socket), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
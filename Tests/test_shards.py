@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pysmell import tags
+from pysmell.shards import shardDirectory, shardFilename, splitShards, ShardedSource, openShards
+from pysmell.symboltable import indexPath
+from pysmell.tagsformat import openTags, readTags
+from pysmell.idehelper import findCompletions, findPYSMELLDICT, CompletionOptions, Types
+
+
+def normalized(PYSMELLDICT):
+    "shards list their entries package by package"
+    return dict((key, isinstance(value, list) and sorted(value) or dict(value))
+                for key, value in PYSMELLDICT.items())
+
+
+class ShardsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.modules = tags.process(['TestData'], [])
+        self.path = os.path.join(self.directory, 'PYSMELLTAGS')
+        tags.generateClassTag(self.modules, self.path, shards=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testSplit(self):
+        shards = splitShards(self.modules)
+        self.assertEquals(sorted(shards), ['PackageA', 'PackageB', 'standalone'])
+        self.assertEquals(shards['PackageB']['HIERARCHY'], ['PackageB'])
+        self.assertEquals(sum(len(shard['CLASSES']) for shard in shards.values()),
+                          len(self.modules['CLASSES']))
+
+    def testWritten(self):
+        files = os.listdir(shardDirectory(self.path))
+        for shard in ['PackageA', 'PackageB', 'standalone']:
+            self.assertTrue(shardFilename(shard) in files)
+            self.assertTrue(os.path.basename(indexPath(shardFilename(shard))) in files)
+        self.assertEquals(normalized(readTags(self.path)), normalized(self.modules))
+
+    def testStaleShardsRemoved(self):
+        modules = tags.process(['TestData/PackageA'], [])
+        tags.generateClassTag(modules, self.path, 'binary', shards=True)
+        files = os.listdir(shardDirectory(self.path))
+        self.assertEquals(sorted(files), ['.PackageA.tags.index', 'PackageA.tags'])
+        self.assertEquals(normalized(readTags(self.path)), normalized(modules))
+
+    def testOnlyNeededShardsOpened(self):
+        source = openTags(self.path)
+        self.assertTrue(isinstance(source, ShardedSource))
+        self.assertTrue(openTags(self.path) is source)
+        klass = source.lookup('CLASSES', 'PackageA.ModuleA.ClassA')
+        self.assertEquals(klass['bases'], self.modules['CLASSES']['PackageA.ModuleA.ClassA']['bases'])
+        self.assertEquals(source.inModule('FUNCTIONS', 'PackageA.ModuleA'),
+                          [f for f in self.modules['FUNCTIONS'] if f[0].startswith('PackageA.ModuleA.')])
+        self.assertEquals(source.lookup('CLASSES', 'Missing.Class'), None)
+        self.assertEquals(sorted(source.opened), [shardFilename('PackageA')])
+
+    def testCompletions(self):
+        store = findPYSMELLDICT(os.path.join(self.directory, 'PackageA', 'ModuleA.py'))
+        for base, options in [('Cla', CompletionOptions(Types.TOPLEVEL)),
+                              ('', CompletionOptions(Types.MODULE, module='PackageA.ModuleA', showMembers=True)),
+                              ('', CompletionOptions(Types.INSTANCE, klass='PackageA.ModuleA.ClassA', parents=[]))]:
+            self.assertEquals(findCompletions(base, store, options, 'case-insensitive'),
+                              findCompletions(base, self.modules, options, 'case-insensitive'))
+
+    def testReplacedManifestReopened(self):
+        source = openShards(self.path, openTags)
+        tags.generateClassTag(self.modules, self.path, shards=True)
+        self.assertFalse(openShards(self.path, openTags) is source)
+
+
+if __name__ == '__main__':
+    unittest.main()
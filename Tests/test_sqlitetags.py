@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pysmell import tags
+from pysmell.sqlitetags import sqlite3, writeSQLite, SQLiteSource, _upperBound
+from pysmell.tagstore import TagStore, DictSource, query
+from pysmell.idehelper import findCompletions, CompletionOptions, Types
+
+
+class SQLiteTagsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.modules = tags.process(['TestData'], [])
+        self.path = os.path.join(self.directory, 'PYSMELLTAGS')
+        writeSQLite(self.modules, self.path)
+        self.source = SQLiteSource(self.path)
+
+    def tearDown(self):
+        self.source.close()
+        shutil.rmtree(self.directory)
+
+    def testRoundTrip(self):
+        self.assertEquals(self.source.toDict(), self.modules)
+
+    def testUpperBound(self):
+        self.assertEquals(_upperBound('ab'), 'ac')
+        self.assertEquals(_upperBound('a\xff'), 'b')
+        self.assertEquals(_upperBound('\xff'), None)
+
+    def assertSameAnswers(self, method, *args):
+        expected = getattr(DictSource(self.modules), method)(*args)
+        actual = getattr(self.source, method)(*args)
+        if args[:1] == ('CLASSES',):
+            # classes are only compared fully once their members are loaded
+            actual = [(name, dict(klass, methods=klass['methods'], properties=klass['properties']))
+                        for name, klass in actual]
+        self.assertEquals(sorted(actual), sorted(expected))
+
+    def testQueries(self):
+        for key in ['CONSTANTS', 'FUNCTIONS', 'CLASSES']:
+            self.assertSameAnswers('named', key, 'Class', True)
+            self.assertSameAnswers('named', key, 'class', False)
+            self.assertSameAnswers('named', key, 'class', True)
+            self.assertSameAnswers('inModule', key, 'PackageA.ModuleA')
+        for key in ['HIERARCHY', 'POINTERS', 'CLASSES']:
+            self.assertSameAnswers('withPrefix', key, 'PackageA.')
+        self.assertSameAnswers('starPointers')
+        klass = self.source.lookup('CLASSES', 'PackageA.ModuleA.ClassA')
+        expected = self.modules['CLASSES']['PackageA.ModuleA.ClassA']
+        for key in ['bases', 'constructor', 'methods', 'properties']:
+            self.assertEquals(klass[key], expected[key])
+        self.assertEquals(self.source.lookup('CLASSES', 'PackageA.Missing'), None)
+
+    def testCompletions(self):
+        store = TagStore([self.source])
+        for base, compType, module in [('Cla', Types.TOPLEVEL, None), ('', Types.MODULE, 'PackageA'),
+                                       ('', Types.MODULE, 'PackageA.ModuleA')]:
+            options = CompletionOptions(compType, module=module, showMembers=True)
+            self.assertEquals(findCompletions(base, store, options, 'case-insensitive'),
+                              findCompletions(base, self.modules, options, 'case-insensitive'))
+
+    def testOverlay(self):
+        store = TagStore([self.source])
+        store['CLASSES'].update({'PackageA.ModuleA.ClassA': 'overlaid'})
+        store['CONSTANTS'].extend(['Buffer.NEW'])
+        self.assertEquals(store['CLASSES']['PackageA.ModuleA.ClassA'], 'overlaid')
+        self.assertEquals(list(store['CONSTANTS'])[-1], 'Buffer.NEW')
+        self.assertEquals(query(store).named('CONSTANTS', 'NEW', True), ['Buffer.NEW'])
+
+
+if sqlite3 is None:
+    del SQLiteTagsTest
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import unittest
+
+from pysmell import tags
+from pysmell.streaming import StreamingWriter, mergeRuns
+
+
+class StreamingTest(unittest.TestCase):
+    def testMergeRuns(self):
+        self.assertEquals(list(mergeRuns([[1, 4, 7], [], [2, 3, 9], [5]])), [1, 2, 3, 4, 5, 7, 9])
+
+    def testWrite(self):
+        # small runs, so that the merge sees several of them
+        writer = StreamingWriter(runSize=1)
+        try:
+            modules = tags.process(['TestData'], [], modules=writer)
+            self.assertTrue(modules is writer)
+            self.assertTrue(len(writer.runs['CLASSES']) > 1)
+            path = os.path.join(writer.directory, 'PYSMELLTAGS')
+            writer.write(path)
+            written = eval(open(path).read())
+        finally:
+            writer.close()
+        self.assertFalse(os.path.exists(writer.directory))
+        self.assertEquals(written, tags.process(['TestData'], []))
+
+    def testLastEntryWins(self):
+        writer = StreamingWriter(runSize=1)
+        try:
+            for pointer in ['first', 'second', 'third']:
+                writer.update({'CONSTANTS': [], 'FUNCTIONS': [], 'HIERARCHY': [], 'CLASSES': {},
+                               'POINTERS': {'a.b': pointer, 'a.%s' % pointer: pointer}})
+            self.assertEquals(list(writer._mapping('POINTERS')),
+                [('a.b', 'third'), ('a.first', 'first'), ('a.second', 'second'), ('a.third', 'third')])
+        finally:
+            writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
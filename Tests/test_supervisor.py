@@ -0,0 +1,63 @@
+import os
+import time
+import unittest
+
+from pysmell import tags
+from pysmell.supervisor import Supervisor, supported, TIMEOUT, MEMORY, CRASHED
+
+
+def work(item):
+    if item == 'sleep':
+        time.sleep(30)
+    elif item == 'crash':
+        os._exit(3)
+    elif item == 'allocate':
+        return 'x' * (512 * 1024 * 1024)
+    return item.upper()
+
+
+class SupervisorTest(unittest.TestCase):
+    def testLimits(self):
+        if not supported(1):
+            return
+        supervisor = Supervisor(work, 2, timeout=1, memoryLimit=64 * 1024 * 1024)
+        start = time.time()
+        results = list(supervisor.map(['a', 'sleep', 'b', 'crash', 'allocate', 'c']))
+        self.assertTrue(time.time() - start < 10)
+        self.assertEquals([result for result, _, _ in results], ['A', None, 'B', None, None, 'C'])
+        reasons = [reason for _, reason, _ in results]
+        self.assertEquals(reasons[1], TIMEOUT)
+        self.assertEquals(reasons[3], '%s (exit code 3)' % CRASHED)
+        self.assertEquals(reasons[4], MEMORY)
+        self.assertEquals([reasons[0], reasons[2], reasons[5]], [None, None, None])
+
+    def testProcessSkips(self):
+        if not supported():
+            return
+        processFile = tags.processFile
+        def slowProcessFile(filename, absPath, *args):
+            if filename == 'ModuleA.py':
+                time.sleep(30)
+            return processFile(filename, absPath, *args)
+        tags.processFile = slowProcessFile
+        try:
+            stats = {}
+            modules = tags.process(['TestData'], [], stats=stats, jobs=2, timeout=2)
+        finally:
+            tags.processFile = processFile
+        self.assertEquals(stats['skipped'], [(os.path.abspath('TestData/PackageA/ModuleA.py'), TIMEOUT)])
+        self.assertEquals(stats['files'], 7)
+        self.assertFalse('PackageA.ModuleA' in modules['HIERARCHY'])
+        self.assertTrue('PackageB' in modules['HIERARCHY'])
+
+    def testSupervisedMatchesSerial(self):
+        if not supported():
+            return
+        stats = {}
+        self.assertEquals(tags.process(['TestData'], [], timeout=60, stats=stats),
+                          tags.process(['TestData'], []))
+        self.assertEquals(stats['skipped'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
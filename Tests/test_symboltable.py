@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pysmell import tags
+from pysmell.symboltable import indexPath, isFresh, SymbolTableSource
+from pysmell.tagsformat import openTags, readTags
+from pysmell.tagstore import TagStore, DictSource
+from pysmell.idehelper import findCompletions, CompletionOptions, Types
+
+
+class SymbolTableTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.modules = tags.process(['TestData'], [])
+        self.modules['CONSTANTS'].append('PackageA.ModuleA.UNICODE_\xc3\xa9')
+        self.path = os.path.join(self.directory, 'PYSMELLTAGS')
+        tags.generateClassTag(self.modules, self.path)
+        self.source = openTags(self.path)
+
+    def tearDown(self):
+        self.source.close()
+        shutil.rmtree(self.directory)
+
+    def testOpened(self):
+        self.assertTrue(os.path.exists(indexPath(self.path)))
+        self.assertTrue(isinstance(self.source, SymbolTableSource))
+        self.assertEquals(readTags(self.path), self.modules)
+        self.assertEquals(self.source.loaded, None)
+
+    def testStale(self):
+        time.sleep(0.01)
+        f = open(self.path, 'a')
+        f.write('\n')
+        f.close()
+        self.assertFalse(isFresh(indexPath(self.path), self.path))
+        self.assertEquals(openTags(self.path), self.modules)
+
+    def assertSameAnswers(self, method, *args):
+        expected = getattr(DictSource(self.modules), method)(*args)
+        actual = getattr(self.source, method)(*args)
+        if args[:1] == ('CLASSES',):
+            actual = [(name, dict(klass, methods=klass['methods'], properties=klass['properties']))
+                        for name, klass in actual]
+        self.assertEquals(sorted(actual), sorted(expected))
+
+    def testQueries(self):
+        for key in ['CONSTANTS', 'FUNCTIONS', 'CLASSES']:
+            for prefix in ['Class', 'class', 'C', '', 'UNICODE_\xc3']:
+                self.assertSameAnswers('named', key, prefix, True)
+                self.assertSameAnswers('named', key, prefix, False)
+            self.assertSameAnswers('inModule', key, 'PackageA.ModuleA')
+            self.assertSameAnswers('inModule', key, 'PackageA')
+        for key in ['HIERARCHY', 'POINTERS', 'CLASSES', 'FUNCTIONS']:
+            self.assertSameAnswers('withPrefix', key, 'PackageA.')
+            self.assertSameAnswers('withPrefix', key, 'PackageA.Nested')
+            self.assertSameAnswers('withPrefix', key, 'Missing')
+        self.assertSameAnswers('starPointers')
+
+    def testListingsAndLookups(self):
+        self.assertEquals(len(list(self.source.entries('CLASSES'))), len(self.modules['CLASSES']))
+        klass = self.source.lookup('CLASSES', 'PackageA.ModuleA.ClassA')
+        expected = self.modules['CLASSES']['PackageA.ModuleA.ClassA']
+        self.assertEquals(klass['bases'], expected['bases'])
+        self.assertEquals(klass['constructor'], expected['constructor'])
+        self.assertEquals(self.source.lookup('CLASSES', 'PackageA.ModuleA'), None)
+        self.assertEquals(self.source.lookup('CLASSES', 'PackageA.ModuleA.Class'), None)
+        for name, pointer in self.modules['POINTERS'].items():
+            self.assertEquals(self.source.lookup('POINTERS', name), pointer)
+        self.assertEquals(self.source.loaded, None)
+        self.assertEquals(klass['methods'], expected['methods'])
+        self.assertNotEquals(self.source.loaded, None)
+        for key in ['CONSTANTS', 'FUNCTIONS', 'CLASSES', 'POINTERS', 'HIERARCHY']:
+            self.assertSameAnswers('entries', key)
+
+    def testCompletionsDontLoadTags(self):
+        store = TagStore([self.source])
+        for base, compType, module in [('Cla', Types.TOPLEVEL, None), ('', Types.TOPLEVEL, None),
+                                       ('', Types.MODULE, 'PackageA'), ('', Types.MODULE, 'PackageA.ModuleA')]:
+            options = CompletionOptions(compType, module=module, showMembers=True)
+            self.assertEquals(findCompletions(base, store, options, 'case-insensitive'),
+                              findCompletions(base, self.modules, options, 'case-insensitive'))
+        self.assertEquals(self.source.loaded, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
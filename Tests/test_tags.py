@@ -2,22 +2,29 @@ import unittest
 from textwrap import dedent
 import subprocess
 import os
+import shutil
+import tempfile
+import time
 from pysmell import idehelper
 from pysmell.codefinder import ModuleDict
 from pysmell import tags
+from pysmell import tagsformat
+from pysmell import symboltable
+from pysmell.tagstore import TagStore
 
 class ProducesFile(object):
     def __init__(self, *files):
         self.files = files
     def __call__(self, func):
         def patched(*args, **kw):
-            for f in self.files:
+            files = list(self.files) + [symboltable.indexPath(f) for f in self.files]
+            for f in files:
                 if os.path.exists(f):
                     os.remove(f)
             try:
                 return func(*args, **kw)
             finally:
-                for f in self.files:
+                for f in files:
                     if os.path.exists(f):
                         os.remove(f)
         patched.__name__ = func.__name__
@@ -147,7 +154,7 @@ class FunctionalTest(unittest.TestCase):
         self.assertDictsEqual(PYSMELLDICT, expectedDict)
 
         foundDict = idehelper.findPYSMELLDICT(os.path.join('TestData', 'PackageA', 'something'))
-        self.assertDictsEqual(foundDict, expectedDict)
+        self.assertDictsEqual(foundDict.toDict(), expectedDict)
 
 
     @ProducesFile('TestData/PYSMELLTAGS')
@@ -237,14 +244,66 @@ class FunctionalTest(unittest.TestCase):
         self.assertDictsEqual(PYSMELLDICT, expectedDict)
 
 
+    @ProducesFile('TestData/PYSMELLTAGS')
+    def testBinaryFormat(self):
+        subprocess.call(["pysmell", "PackageA", "-f", "binary"], cwd='TestData')
+        self.assertTrue(os.path.exists('TestData/PYSMELLTAGS'))
+        self.assertTrue(open('TestData/PYSMELLTAGS', 'rb').read().startswith(tagsformat.MAGIC))
+        foundDict = idehelper.findPYSMELLDICT(os.path.join('TestData', 'PackageA', 'something'))
+        self.assertDictsEqual(foundDict.toDict(), self.packageA)
+
+        subprocess.call(["pysmell", "PackageB", "-i", "PYSMELLTAGS"], cwd='TestData')
+        PYSMELLDICT = eval(open('TestData/PYSMELLTAGS').read())
+        expectedDict = {}
+        expectedDict.update(self.packageA)
+        expectedDict['CLASSES'].update(self.packageB['CLASSES'])
+        expectedDict['CONSTANTS'].extend(self.packageB['CONSTANTS'])
+        expectedDict['FUNCTIONS'].extend(self.packageB['FUNCTIONS'])
+        expectedDict['HIERARCHY'].extend(self.packageB['HIERARCHY'])
+        self.assertDictsEqual(PYSMELLDICT, expectedDict)
+
+
+    @ProducesFile('TestData/PYSMELLTAGS')
+    def testSQLiteFormat(self):
+        if 'sqlite' not in tagsformat.FORMATS:
+            return
+        subprocess.call(["pysmell", "PackageA", "-f", "sqlite"], cwd='TestData')
+        self.assertTrue(open('TestData/PYSMELLTAGS', 'rb').read().startswith('SQLite format 3'))
+        store = idehelper.findPYSMELLDICT(os.path.join('TestData', 'PackageA', 'something'))
+        self.assertTrue(isinstance(store, TagStore))
+        self.assertEquals(sorted(store['CLASSES'].keys()), sorted(self.packageA['CLASSES'].keys()))
+        self.assertEquals(store['CLASSES']['PackageA.ModuleA.ClassA']['methods'],
+                          self.packageA['CLASSES']['PackageA.ModuleA.ClassA']['methods'])
+        store.sources[0].close()
+
+        subprocess.call(["pysmell", "PackageB", "-i", "PYSMELLTAGS"], cwd='TestData')
+        PYSMELLDICT = eval(open('TestData/PYSMELLTAGS').read())
+        self.assertEquals(sorted(PYSMELLDICT['HIERARCHY']),
+                          sorted(self.packageA['HIERARCHY'] + self.packageB['HIERARCHY']))
+
+
+    @ProducesFile('TestData/PYSMELLTAGS')
+    def testStreaming(self):
+        subprocess.call(["pysmell", "PackageA", "PackageB", "--streaming"], cwd='TestData')
+        PYSMELLDICT = eval(open('TestData/PYSMELLTAGS').read())
+        self.assertEquals(PYSMELLDICT, tags.process(['TestData/PackageA', 'TestData/PackageB'], []))
+        self.assertEquals([name for name in os.listdir('TestData') if name.startswith('.')], [])
+
+
     def testNoArgs(self):
         proc = subprocess.Popen(["pysmell"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         proc.wait()
         stderr = proc.stderr.read()
         expected = dedent("""\
-        usage: pysmell [-h] [-v] [-x [package [package ...]]] [-o OUTPUT] [-i INPUT]
-                       [-t] [-d]
-                       package [package ...]
+        usage: pysmell [-h] [-v] [-x [package [package ...]]] [--vcs-ignore] [-o
+                       OUTPUT] [-f {text,binary,sqlite}] [-i INPUT] [--since REV]
+                       [--incremental] [-w] [--debounce DEBOUNCE] [--cache] [--cache-
+                       dir CACHE_DIR] [--cache-size CACHE_SIZE] [--cache-stats]
+                       [--streaming] [--shards] [--libs] [--libs-dir LIBS_DIR]
+                       [--parser {ast,compiler,outline}] [--fast] [--timeout TIMEOUT]
+                       [--memory-limit MB] [-t] [--slowest N] [--timing-json FILE] [-j
+                       JOBS] [-d]
+                       [package [package ...]]
         pysmell: error: too few arguments
         """)
         self.assertEquals(stderr.replace('\r\n', '\n'), expected)
@@ -262,5 +321,47 @@ class FunctionalTest(unittest.TestCase):
         self.assertDictsEqual(modules, self.packageA)
 
 
+    def testParallelMatchesSerial(self):
+        serial = tags.process(['TestData'], [])
+        stats = {}
+        parallel = tags.process(['TestData'], [], jobs=2, stats=stats)
+        self.assertEquals(parallel, serial)
+        self.assertEquals(parallel['CONSTANTS'], serial['CONSTANTS'])
+        self.assertEquals(parallel['FUNCTIONS'], serial['FUNCTIONS'])
+        self.assertEquals(parallel['HIERARCHY'], serial['HIERARCHY'])
+        self.assertEquals(stats['files'], 7)
+        # processor time of the workers, not their (competing) wall clock time
+        self.assertTrue(0 < stats['cpu'] <= stats['analysis'] + 0.01 * stats['files'])
+
+
+    def testIncremental(self):
+        tempDir = tempfile.mkdtemp()
+        try:
+            root = os.path.join(tempDir, 'TestData')
+            shutil.copytree('TestData', root)
+            manifest = {}
+            stats = {}
+            modules = tags.process([root], [], manifest=manifest, stats=stats)
+            self.assertEquals(stats['files'], 7)
+            self.assertEquals(len(manifest), 7)
+
+            modules = tags.process([root], [], inputDict=modules, manifest=manifest, stats=stats)
+            self.assertEquals(stats['files'], 0)
+
+            moduleA = os.path.join(root, 'PackageA', 'ModuleA.py')
+            source = open(moduleA).read().replace('ChildClassA', 'RenamedChild')
+            time.sleep(0.01)
+            open(moduleA, 'w').write(source)
+            os.remove(os.path.join(root, 'standalone.py'))
+            modules = tags.process([root], [], inputDict=modules, manifest=manifest, stats=stats)
+            self.assertEquals(stats['files'], 1)
+            self.assertEquals(len(manifest), 6)
+            self.assertDictsEqual(modules, tags.process([root], []))
+            self.assertTrue('PackageA.ModuleA.RenamedChild' in modules['CLASSES'])
+            self.assertFalse('standalone' in modules['HIERARCHY'])
+        finally:
+            shutil.rmtree(tempDir)
+
+
 if __name__ == '__main__':
     unittest.main()
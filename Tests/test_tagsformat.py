@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from pysmell import tags
+from pysmell.bundles import writeLink
+from pysmell.tagsformat import dumpTags, loadTags, TagsFormatError, MAGIC, TagsCache
+
+
+class TagsFormatTest(unittest.TestCase):
+    def roundTrip(self, modules, format):
+        f = StringIO()
+        dumpTags(modules, f, format)
+        return f.getvalue(), loadTags(f.getvalue())
+
+    def testRoundTrip(self):
+        modules = tags.process(['TestData'], [])
+        for format in ['text', 'binary']:
+            data, loaded = self.roundTrip(modules, format)
+            self.assertEquals(loaded, modules)
+            self.assertEquals(loaded['FUNCTIONS'], modules['FUNCTIONS'])
+            self.assertEquals(loaded['HIERARCHY'], modules['HIERARCHY'])
+        self.assertTrue(data.startswith(MAGIC))
+
+    def testStringsAreShared(self):
+        modules = {
+            'CONSTANTS': ['mod.A'], 'FUNCTIONS': [('mod.f', ['a', 'b=1'], '')],
+            'CLASSES': {'mod.K': {'docstring': 'doc', 'bases': ['object'], 'constructor': ['a'],
+                                  'properties': ['a'], 'methods': [('m', ['a'], 'doc')]}},
+            'POINTERS': {'mod.B': 'mod.A'}, 'HIERARCHY': ['mod'],
+        }
+        _, loaded = self.roundTrip(modules, 'binary')
+        self.assertEquals(loaded, modules)
+        klass = loaded['CLASSES']['mod.K']
+        self.assertTrue(klass['constructor'][0] is klass['properties'][0])
+        self.assertTrue(klass['docstring'] is klass['methods'][0][2])
+
+    def testNulInStrings(self):
+        modules = {'CONSTANTS': [], 'FUNCTIONS': [('mod.f', [], 'a\0b')], 'CLASSES': {},
+                   'POINTERS': {}, 'HIERARCHY': ['', 'mod']}
+        _, loaded = self.roundTrip(modules, 'binary')
+        self.assertEquals(loaded, modules)
+
+    def testTruncated(self):
+        data, _ = self.roundTrip(tags.process(['TestData'], []), 'binary')
+        self.assertRaises(TagsFormatError, loadTags, data[:-4])
+
+
+class TagsCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'PYSMELLTAGS')
+        self.modules = tags.process(['TestData'], [])
+        tags.generateClassTag(self.modules, self.path, 'binary')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testReloadedWhenReplaced(self):
+        cache = TagsCache()
+        opened = cache.open(self.path)
+        self.assertTrue(cache.open(self.path) is opened)
+        self.assertEquals(cache.counts(), (1, 1))
+        tags.generateClassTag(self.modules, self.path, 'binary')
+        self.assertFalse(cache.open(self.path) is opened)
+        self.assertEquals(cache.counts(), (1, 2))
+
+    def testLinksFollowed(self):
+        cache = TagsCache()
+        link = os.path.join(self.directory, 'PYSMELLTAGS.libs')
+        tags.writeAtomically(link, lambda f: writeLink(self.path, f))
+        self.assertTrue(cache.open(link) is cache.open(self.path))
+        tags.generateClassTag(self.modules, self.path, 'binary')
+        klass = cache.open(link).lookup('CLASSES', 'PackageA.ModuleA.ClassA')
+        self.assertEquals(dict(klass, methods=klass['methods'], properties=klass['properties']),
+                          self.modules['CLASSES']['PackageA.ModuleA.ClassA'])
+        self.assertEquals(cache.counts(), (2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pysmell import traversal
+from pysmell.traversal import Walker, Excludes, parseGitignore, parseHgignore
+
+
+def touch(root, *paths):
+    for path in paths:
+        path = os.path.join(root, *path.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        open(path, 'w').close()
+
+
+def matches(rules, path, isDir=False):
+    result = False
+    for match, negated, dirOnly in rules:
+        if (not dirOnly or isDir) and match(path):
+            result = not negated
+    return result
+
+
+class TraversalTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        touch(self.root, 'a.py', 'notes.txt', 'pkg/b.py', 'pkg/test/c.py', 'build/lib/d.py',
+              'x.egg-info/e.py', 'node_modules/f.py', 'gen/g_pb2.py', 'gen/h.py')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def walk(self, walker, root=None):
+        root = root or self.root
+        return sorted(os.path.join(directory, name)[len(self.root) + 1:].replace(os.sep, '/')
+                      for directory, name in walker.walk(root))
+
+    def testSameAsWalk(self):
+        expected = []
+        for path, dirs, files in os.walk(self.root):
+            expected.extend((path, f) for f in files if f.endswith('.py'))
+        self.assertEquals(list(Walker().walk(self.root)), expected)
+        oldScandir = traversal.scandir
+        traversal.scandir = None
+        try:
+            self.assertEquals(list(Walker().walk(self.root)), expected)
+        finally:
+            traversal.scandir = oldScandir
+
+    def testExcludes(self):
+        walker = Walker(['test', '*.egg-info', 'build/lib', 're:^node_', '*_pb2.py'])
+        self.assertEquals(self.walk(walker), ['a.py', 'gen/h.py', 'pkg/b.py'])
+        self.assertEquals(walker.pruned, 4)
+
+    def testVCSIgnore(self):
+        os.mkdir(os.path.join(self.root, '.git'))
+        touch(self.root, '.git/hooks/hook.py')
+        f = open(os.path.join(self.root, '.gitignore'), 'w')
+        f.write('# build output\nbuild/\n*.egg-info\n/node_modules\npkg/test\n')
+        f.close()
+        f = open(os.path.join(self.root, 'gen', '.gitignore'), 'w')
+        f.write('*.py\n!h.py\n')
+        f.close()
+        walker = Walker(vcsIgnore=True)
+        self.assertEquals(self.walk(walker), ['a.py', 'gen/h.py', 'pkg/b.py'])
+        self.assertEquals(walker.pruned, 5)
+        # the .gitignore of the repository applies to directories inside it
+        walker = Walker(vcsIgnore=True)
+        self.assertEquals(self.walk(walker, os.path.join(self.root, 'pkg')), ['pkg/b.py'])
+        self.assertEquals(walker.pruned, 1)
+
+    def testGitignore(self):
+        rules = parseGitignore(['*.pyc', 'build/', '/top', 'docs/**/gen', '!keep.pyc', 'a?c', '\\#hash'])
+        self.assertTrue(matches(rules, 'x/y.pyc'))
+        self.assertFalse(matches(rules, 'x/keep.pyc'))
+        self.assertTrue(matches(rules, 'x/build', True))
+        self.assertFalse(matches(rules, 'x/build'))
+        self.assertTrue(matches(rules, 'top'))
+        self.assertFalse(matches(rules, 'x/top'))
+        self.assertTrue(matches(rules, 'docs/gen'))
+        self.assertTrue(matches(rules, 'docs/a/b/gen'))
+        self.assertTrue(matches(rules, 'abc'))
+        self.assertFalse(matches(rules, 'a/c'))
+        self.assertTrue(matches(rules, '#hash'))
+
+    def testHgignore(self):
+        rules = parseHgignore(['\\.orig$  # comment', 'syntax: glob', '*.pyc', 'build', 're:^gen/'])
+        self.assertTrue(matches(rules, 'x/y.orig'))
+        self.assertTrue(matches(rules, 'x/y.pyc'))
+        self.assertTrue(matches(rules, 'x/build'))
+        self.assertTrue(matches(rules, 'gen/a.py'))
+        self.assertFalse(matches(rules, 'x/gen/a.py'))
+
+    def testExcludesMatch(self):
+        excludes = Excludes(['test', '*.egg-info', 'a/b', 're:c+d'])
+        self.assertTrue(excludes.matches('test'))
+        self.assertFalse(excludes.matches('tests'))
+        self.assertTrue(excludes.matches('x.egg-info'))
+        self.assertTrue(excludes.matches('b', 'a/b'))
+        self.assertFalse(excludes.matches('b', 'x/a/b'))
+        self.assertTrue(excludes.matches('x', 'y/ccd/x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from pysmell import tags
+from pysmell.vcs import changedSince, moduleName, GitError
+
+
+def git(directory, *args):
+    proc = subprocess.Popen(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com'] + list(args),
+                            cwd=directory, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    proc.communicate()
+    return proc.returncode
+
+
+def write(path, source):
+    f = open(path, 'w')
+    try:
+        f.write(source)
+    finally:
+        f.close()
+
+
+def sortedDict(modules):
+    return dict((key, isinstance(value, list) and sorted(value) or value)
+                    for key, value in modules.items())
+
+
+class VCSTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = os.path.realpath(tempfile.mkdtemp())
+        shutil.copytree('TestData', os.path.join(self.directory, 'TestData'))
+        self.root = os.path.join(self.directory, 'TestData')
+        if git(self.directory, 'init', '-q') != 0:
+            self.root = None
+            return
+        git(self.directory, 'add', '.')
+        git(self.directory, 'commit', '-q', '-m', 'initial')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testChangedSince(self):
+        if self.root is None:
+            return
+        packageA = os.path.join(self.root, 'PackageA')
+        write(os.path.join(packageA, 'ModuleA.py'), 'class Changed(object):\n    pass\n')
+        evenMore = os.path.join(packageA, 'NestedPackage', 'EvenMore')
+        git(self.directory, 'mv', os.path.join(evenMore, 'ModuleC.py'), os.path.join(evenMore, 'Renamed.py'))
+        os.remove(os.path.join(self.root, 'standalone.py'))
+        write(os.path.join(self.root, 'PackageB', 'untracked.py'), 'UNTRACKED = 1\n')
+        write(os.path.join(self.root, 'notes.txt'), 'not python\n')
+
+        changed, deleted = changedSince('HEAD', [self.root])
+        self.assertEquals(sorted(changed), [
+            os.path.join(packageA, 'ModuleA.py'),
+            os.path.join(evenMore, 'Renamed.py'),
+            os.path.join(self.root, 'PackageB', 'untracked.py'),
+        ])
+        self.assertEquals(sorted(deleted), [
+            os.path.join(evenMore, 'ModuleC.py'),
+            os.path.join(self.root, 'standalone.py'),
+        ])
+
+    def testPatch(self):
+        if self.root is None:
+            return
+        before = tags.process([self.root], [])
+        packageA = os.path.join(self.root, 'PackageA')
+        write(os.path.join(packageA, 'ModuleA.py'), 'class Changed(object):\n    pass\n')
+        os.remove(os.path.join(self.root, 'standalone.py'))
+        evenMore = os.path.join(packageA, 'NestedPackage', 'EvenMore')
+        git(self.directory, 'mv', os.path.join(evenMore, 'ModuleC.py'), os.path.join(evenMore, 'Renamed.py'))
+        # EvenMore is no longer part of PackageA
+        os.remove(os.path.join(packageA, 'NestedPackage', '__init__.py'))
+
+        stats = {}
+        patched = tags.process([self.root], [], inputDict=before, stats=stats,
+                               changes=changedSince('HEAD', [self.root]))
+        self.assertEquals(sortedDict(patched), sortedDict(tags.process([self.root], [])))
+        # ModuleA, and EvenMore's __init__ and Renamed
+        self.assertEquals(stats['files'], 3)
+
+    def testSymlinkedRoot(self):
+        if self.root is None or not hasattr(os, 'symlink'):
+            return
+        link = os.path.join(tempfile.mkdtemp(), 'link')
+        os.symlink(self.directory, link)
+        try:
+            root = os.path.join(link, 'TestData')
+            before = tags.process([root], [])
+            write(os.path.join(self.root, 'PackageA', 'ModuleA.py'), 'class Changed(object):\n    pass\n')
+            stats = {}
+            patched = tags.process([root], [], inputDict=before, stats=stats,
+                                   changes=changedSince('HEAD', [root]))
+            self.assertEquals(stats['files'], 1)
+            self.assertTrue('PackageA.ModuleA.Changed' in patched['CLASSES'])
+            self.assertEquals(sortedDict(patched), sortedDict(tags.process([root], [])))
+        finally:
+            shutil.rmtree(os.path.dirname(link))
+
+    def testModuleName(self):
+        packageA = os.path.join(os.path.abspath('TestData'), 'PackageA')
+        self.assertEquals(moduleName('ModuleA.py', packageA), 'PackageA.ModuleA')
+        self.assertEquals(moduleName('__init__.py', packageA), 'PackageA')
+        self.assertEquals(moduleName('standalone.py', os.path.abspath('TestData')), 'standalone')
+
+    def testNotARepository(self):
+        directory = tempfile.mkdtemp()
+        try:
+            if git(directory, 'rev-parse', '--show-toplevel') == 0:
+                return # the temporary directory is in a git repository
+            self.assertRaises(GitError, changedSince, 'HEAD', [directory])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pysmell.watcher import PollingObserver, watch
+
+
+class FakeObserver(object):
+    def __init__(self, changes):
+        self.changes = changes
+        self.timeouts = []
+
+    def wait(self, timeout=None):
+        self.timeouts.append(timeout)
+        return self.changes.pop(0)
+
+
+class WatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'module.py')
+        open(self.path, 'w').write('a = 1\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testPollingObserver(self):
+        observer = PollingObserver(lambda: [self.path], interval=0.01)
+        self.assertFalse(observer.wait(0.05))
+        open(self.path, 'a').write('b = 2\n')
+        self.assertTrue(observer.wait(0.05))
+        self.assertFalse(observer.wait(0.05))
+        os.remove(self.path)
+        self.assertTrue(observer.wait(0.05))
+
+    def testWatchDebounces(self):
+        regenerated = []
+        # one change, two more within the debounce interval, then quiet
+        observer = FakeObserver([True, True, True, False])
+        watch(observer, lambda: regenerated.append(True), debounce=0.5, rounds=1)
+        self.assertEquals(regenerated, [True])
+        self.assertEquals(observer.timeouts, [None, 0.5, 0.5, 0.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
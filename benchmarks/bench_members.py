@@ -0,0 +1,78 @@
+# bench_members.py
+# Time the analysis of a generated class with thousands of members
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+Usage: python benchmarks/bench_members.py [--members N]
+
+Analyses a module with one class that has --members methods (default 5000),
+each of which assigns a couple of attributes, like generated protobuf or ORM
+models do. Also times the ModuleDict calls analysing it makes on their own,
+without parsing.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pysmell import argparse
+from pysmell.codefinder import processFile, ModuleDict
+
+
+def generate(members):
+    lines = ['class Model(object):']
+    for i in range(members):
+        lines.append('    def method%d(self, a, b=%d):' % (i, i))
+        lines.append('        self.field%d = a' % i)
+        lines.append('        self.shared = b')
+    return '\n'.join(lines) + '\n'
+
+
+def index(members):
+    modules = ModuleDict()
+    modules.enterModule('model')
+    modules.enterClass('Model', ['object'], '')
+    for i in range(members):
+        modules.addMethod('Model', 'method%d' % i, ['a', 'b=%d' % i], '')
+        modules.addProperty('Model', 'field%d' % i)
+        modules.addProperty('Model', 'shared')
+    modules.exitModule()
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1], prog='bench_members.py')
+    parser.add_argument('--members', type=int, default=5000, help='methods of the class')
+    members = parser.parse_args().members
+    directory = tempfile.mkdtemp()
+    try:
+        f = open(os.path.join(directory, 'model.py'), 'w')
+        try:
+            f.write(generate(members))
+        finally:
+            f.close()
+        start = time.time()
+        modules = processFile('model.py', directory)
+        took = time.time() - start
+    finally:
+        shutil.rmtree(directory)
+    klass = modules['CLASSES']['model.Model']
+    print '%d methods, %d properties: %.3f seconds' % (len(klass['methods']),
+        len(klass['properties']), took)
+    start = time.time()
+    index(members)
+    print 'ModuleDict alone: %.3f seconds' % (time.time() - start)
+
+
+if __name__ == '__main__':
+    main()
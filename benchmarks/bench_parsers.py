@@ -0,0 +1,119 @@
+# bench_parsers.py
+# Compare the parser backends on a corpus of python files
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+Usage: python benchmarks/bench_parsers.py [-n N] [-p PARSER ...] [directory ...]
+
+Analyses every python file below the directories (the standard library by
+default) with every parser backend (or the given ones), prints the time
+each took to import, parse and visit, and lists the files for which the
+backends disagree with the first one, showing the first N differences and
+counting them by kind.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pysmell import argparse
+from pysmell.tags import findFiles
+
+
+def importTime(module):
+    "seconds it takes to import module in a fresh interpreter"
+    import subprocess
+    start = time.time()
+    subprocess.call([sys.executable, '-c', 'import %s' % module])
+    return time.time() - start
+
+
+def differences(first, second):
+    "describe how two PYSMELLDICTs differ, as (key, line) for every difference"
+    lines = []
+    for key in ['CONSTANTS', 'FUNCTIONS', 'HIERARCHY']:
+        if first[key] != second[key]:
+            lines.append((key, '%s: %r != %r' % (key, first[key], second[key])))
+    for key in ['CLASSES', 'POINTERS']:
+        for name in sorted(set(first[key]) | set(second[key])):
+            if first[key].get(name) != second[key].get(name):
+                lines.append((key, '%s %s: %r != %r' % (key, name, first[key].get(name),
+                                                        second[key].get(name))))
+    return lines
+
+
+def main():
+    from pysmell.codefinder import processFile
+    from pysmell.parsers import PARSERS
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1], prog='bench_parsers.py')
+    parser.add_argument('directories', nargs='*', default=[os.path.dirname(os.__file__)])
+    parser.add_argument('-n', type=int, default=3, help='differences to show per file')
+    parser.add_argument('-p', '--parser', dest='parsers', action='append', choices=sorted(PARSERS),
+        help='a parser to compare, the first one given is the reference')
+    options = parser.parse_args()
+
+    names = options.parsers or sorted(PARSERS)
+    for name, module in [('compiler', 'compiler'), ('ast', 'ast'), ('outline', 'tokenize')]:
+        if name in names:
+            print 'import %s: %.3f seconds' % (module, importTime(module))
+    files = list(findFiles(options.directories, []))
+    totals = dict((name, {'parse': 0.0, 'visit': 0.0}) for name in names)
+    failed = dict((name, 0) for name in names)
+    lines = 0
+    disagreements = 0
+    kinds = {}
+    stdout = sys.stdout
+    for filename, absPath in files:
+        results = {}
+        for name in names:
+            timings = {}
+            # processFile prints the exceptions of the files it can't analyse
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                results[name] = processFile(filename, absPath, timings, PARSERS[name])
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            if results[name] is None:
+                failed[name] += 1
+                continue
+            totals[name]['parse'] += timings['parse']
+            totals[name]['visit'] += timings['visit']
+        lines += timings.get('lines', 0)
+        first = results[names[0]]
+        for name in names[1:]:
+            other = results[name]
+            if (first is None) != (other is None) or (first is not None and first != other):
+                disagreements += 1
+                print '%s: %s and %s disagree' % (os.path.join(absPath, filename), names[0], name)
+                if first is not None and other is not None:
+                    found = differences(first, other)
+                    for key, line in found[:options.n]:
+                        print '   ', line[:300]
+                    for key, _ in found:
+                        kinds[key] = kinds.get(key, 0) + 1
+                else:
+                    kinds['failed'] = kinds.get('failed', 0) + 1
+
+    print '%d files, %d lines' % (len(files), lines)
+    for name in names:
+        total = totals[name]['parse'] + totals[name]['visit']
+        print '%-10s parse %7.3f s, visit %7.3f s, total %7.3f s, %.0f lines/s, %d files failed' % (
+            name, totals[name]['parse'], totals[name]['visit'], total,
+            total and lines / total, failed[name])
+    print '%d files where the backends disagree' % disagreements
+    for kind in sorted(kinds):
+        print '    %-10s %d' % (kind, kinds[kind])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+# bench_tags.py
+# Time tag generation for a generated code base of a configurable size
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+Usage: python benchmarks/bench_tags.py [options]
+
+Generates a tree of --packages packages with --modules modules each, every
+one of them with --classes classes of --members methods and --imports
+imports of other modules, and times tags.process and generateClassTag on it.
+The tree is the same for the same options and --seed.
+
+The results (throughput and peak memory) are written as JSON to --output;
+give the JSON of an earlier run to --compare to fail (exit status 1) when
+throughput dropped by more than --tolerance percent.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import platform
+import tempfile
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from pysmell import argparse
+from pysmell import tags
+from pysmell.tagsformat import FORMATS
+
+
+def generateModule(rand, package, module, options):
+    lines = ['"generated module %s.%s"' % (package, module)]
+    others = []
+    for _ in range(options.imports):
+        otherPackage = 'pkg%d' % rand.randrange(options.packages)
+        otherModule = 'module%d' % rand.randrange(options.modules)
+        if (otherPackage, otherModule) == (package, module):
+            continue
+        lines.append('from %s.%s import Class0 as Imported%d' % (otherPackage, otherModule, len(others)))
+        others.append('Imported%d' % len(others))
+    lines.append('import os')
+    lines.append('')
+    lines.append('CONSTANT = %d' % rand.randrange(1000))
+    lines.append('')
+    for klass in range(options.classes):
+        base = others and rand.choice(others) or 'object'
+        lines.append('class Class%d(%s):' % (klass, base))
+        lines.append('    "docstring of Class%d"' % klass)
+        lines.append('    attribute = %d' % klass)
+        lines.append('    def __init__(self, first, second=None):')
+        lines.append('        self.first = first')
+        lines.append('        self.second = second')
+        for member in range(options.members):
+            lines.append('    def method%d(self, arg, *args, **kwargs):' % member)
+            lines.append('        "docstring of method%d"' % member)
+            lines.append('        self.field%d = arg' % member)
+            lines.append('        return os.path.join(arg, *args)')
+        lines.append('')
+    lines.append('def function(first, second=%d):' % rand.randrange(1000))
+    lines.append('    return first')
+    return '\n'.join(lines) + '\n'
+
+
+def generateTree(root, options):
+    "write the synthetic tree to root, return the number of files and lines"
+    rand = random.Random(options.seed)
+    files = lines = 0
+    for p in range(options.packages):
+        package = 'pkg%d' % p
+        directory = os.path.join(root, package)
+        os.mkdir(directory)
+        contents = {'__init__.py': '"generated package %s"\n' % package}
+        for m in range(options.modules):
+            module = 'module%d' % m
+            contents[module + '.py'] = generateModule(rand, package, module, options)
+        for filename, source in contents.items():
+            f = open(os.path.join(directory, filename), 'w')
+            try:
+                f.write(source)
+            finally:
+                f.close()
+            files += 1
+            lines += source.count('\n')
+    return files, lines
+
+
+def peakMemory():
+    "peak resident memory of this process and of its largest child, in KB"
+    if resource is None:
+        return None, None
+    # bytes on OS X, KB everywhere else
+    scale = sys.platform == 'darwin' and 1024 or 1
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale)
+
+
+def run(options):
+    root = tempfile.mkdtemp(prefix='pysmell-bench-')
+    try:
+        files, lines = generateTree(root, options)
+        output = os.path.join(root, 'PYSMELLTAGS')
+        runs = []
+        for _ in range(options.repeat):
+            stats = {}
+            start = time.time()
+            modules = tags.process([root], [], jobs=options.jobs, stats=stats)
+            processed = time.time()
+            tags.generateClassTag(modules, output, options.format)
+            written = time.time()
+            del modules
+            runs.append({'process': processed - start, 'write': written - processed,
+                         'analysis': stats['analysis']})
+        size = os.path.getsize(output)
+    finally:
+        shutil.rmtree(root)
+    best = min(runs, key=lambda r: r['process'] + r['write'])
+    total = best['process'] + best['write']
+    peak, childPeak = peakMemory()
+    return {
+        'parameters': {
+            'packages': options.packages, 'modules': options.modules,
+            'classes': options.classes, 'members': options.members,
+            'imports': options.imports, 'seed': options.seed,
+            'format': options.format, 'jobs': options.jobs, 'repeat': options.repeat,
+        },
+        'environment': {
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'pysmell': tags.version,
+        },
+        'files': files,
+        'lines': lines,
+        'tagsBytes': size,
+        'processSeconds': best['process'],
+        'writeSeconds': best['write'],
+        'analysisSeconds': best['analysis'],
+        'totalSeconds': total,
+        'filesPerSecond': total and files / total,
+        'linesPerSecond': total and lines / total,
+        'peakMemoryKB': peak,
+        'peakChildMemoryKB': childPeak,
+        'runs': runs,
+    }
+
+
+def compare(result, baseline, tolerance):
+    "print how result compares to baseline, return False on a regression"
+    ok = True
+    if result['parameters'] != baseline['parameters']:
+        print 'warning: the baseline was run with different parameters', baseline['parameters']
+    for key in ('filesPerSecond', 'linesPerSecond'):
+        old, new = baseline[key], result[key]
+        change = old and (new - old) * 100.0 / old or 0.0
+        print '%s: %.1f -> %.1f (%+.1f%%)' % (key, old, new, change)
+        if change < -tolerance:
+            ok = False
+    old, new = baseline.get('peakMemoryKB'), result['peakMemoryKB']
+    if old and new:
+        print 'peakMemoryKB: %d -> %d (%+.1f%%)' % (old, new, (new - old) * 100.0 / old)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1], prog='bench_tags.py')
+    parser.add_argument('--packages', type=int, default=20)
+    parser.add_argument('--modules', type=int, default=20, help='modules per package')
+    parser.add_argument('--classes', type=int, default=5, help='classes per module')
+    parser.add_argument('--members', type=int, default=10, help='methods per class')
+    parser.add_argument('--imports', type=int, default=3, help='imports per module')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-f', '--format', choices=FORMATS, default='text')
+    parser.add_argument('-j', '--jobs', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3, help='runs to keep the fastest of')
+    parser.add_argument('-o', '--output', default='bench_tags.json')
+    parser.add_argument('--compare', metavar='JSON', help='results of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=10.0,
+        help='percent of throughput that may be lost before --compare fails')
+    options = parser.parse_args()
+
+    result = run(options)
+    print '%d files, %d lines: process %.3f s, write %.3f s, %.1f files/s, %.1f lines/s' % (
+        result['files'], result['lines'], result['processSeconds'], result['writeSeconds'],
+        result['filesPerSecond'], result['linesPerSecond'])
+    if result['peakMemoryKB'] is not None:
+        print 'peak memory: %d KB (largest worker %d KB)' % (result['peakMemoryKB'],
+            result['peakChildMemoryKB'])
+    f = open(options.output, 'w')
+    try:
+        json.dump(result, f, indent=2, sort_keys=True)
+    finally:
+        f.close()
+    if options.compare:
+        f = open(options.compare)
+        try:
+            baseline = json.load(f)
+        finally:
+            f.close()
+        if not compare(result, baseline, options.tolerance):
+            print 'throughput regressed by more than %.1f%%' % options.tolerance
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -34,7 +34,7 @@ if !exists('g:pysmell_matcher')
 endif
 
 python << eopython
-from pysmell import vimhelper, idehelper
+from pysmell import vimhelper, idehelper, client
 import vim
 import string
 TRANSLATEQUOTES = string.maketrans("\'\"", "\"\'")
@@ -72,13 +72,8 @@ endfunction
 python << eopython
 def vimcompletePYSMELL(origSource, origLineNo, origCol, base):
     fullPath = vim.current.buffer.name
-    PYSMELLDICT = idehelper.findPYSMELLDICT(fullPath)
-    if not PYSMELLDICT:
-        vim.command("echoerr 'No PYSMELLTAGS found. You have to generate one.'")
-        return
-
     try:
-        options = idehelper.detectCompletionType(fullPath, origSource, origLineNo, origCol, base, PYSMELLDICT)
+        result = client.complete(fullPath, origSource, origLineNo, origCol, base, vim.eval('g:pysmell_matcher'))
     except:
         f = file('pysmell_exc.txt', 'wb')
         import traceback
@@ -86,15 +81,24 @@ def vimcompletePYSMELL(origSource, origLineNo, origCol, base):
         f.close()
         vim.command("echoerr 'Exception written out at pysmell_exc.txt'")
         return
+    if result is None:
+        vim.command("echoerr 'No PYSMELLTAGS found. You have to generate one.'")
+        return
+    options, completions = result
 
     if int(vim.eval('g:pysmell_debug')):
         for b in vim.buffers:
             if b.name.endswith('PYSMELL_DEBUG'):
                 b.append("%s %s %s %s" % (fullPath, origSource[origLineNo], origCol, base))
                 b.append("%r" % options)
+                counts = client.tagsCacheCounts()
+                if counts is None:
+                    b.append("tags cache: pysmell serve is gone")
+                else:
+                    b.append("tags cache%s: %d hits, %d misses" % (
+                        client.answeredBy and ' of pysmell serve' or '', counts[0], counts[1]))
                 break
 
-    completions = idehelper.findCompletions(base, PYSMELLDICT, options, vim.eval('g:pysmell_matcher'))
     output = repr(completions)
     translated = output.translate(TRANSLATEQUOTES)
     vim.command('let g:pysmell_completions = %s' % (translated, ))
@@ -0,0 +1,427 @@
+# astfinder.py
+# Statically analyze python code with the ast module
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+AstCodeFinder is codefinder.CodeFinder for the trees of the ast module,
+which parses in C instead of in python. Both produce the same ModuleDict:
+the names of defaults, bases and decorators are spelled the way
+codefinder.getName spells the compiler's nodes, down to its quirks.
+"""
+
+import os
+import re
+import ast
+
+from pysmell.codefinder import BaseVisitor, ModuleDict, fscache, argToStr, constName
+
+MATHNODES = {
+    ast.Add: '+',
+    ast.Sub: '-',
+    ast.Mult: '*',
+    ast.Pow: '**',
+    ast.Div: '/',
+    ast.Mod: '%',
+}
+
+BINOPS = {
+    ast.Add: 'Add', ast.Sub: 'Sub', ast.Mult: 'Mul', ast.Div: 'Div', ast.Mod: 'Mod',
+    ast.Pow: 'Power', ast.FloorDiv: 'FloorDiv', ast.LShift: 'LeftShift', ast.RShift: 'RightShift',
+}
+
+BITOPS = {ast.BitOr: 'Bitor', ast.BitAnd: 'Bitand', ast.BitXor: 'Bitxor'}
+
+UNARYOPS = {ast.USub: 'UnarySub', ast.UAdd: 'UnaryAdd', ast.Invert: 'Invert', ast.Not: 'Not'}
+
+CODING = re.compile(r'^[ \t\f]*#.*coding[:=][ \t]*([-\w.]+)')
+
+COMPARISONS = {
+    ast.Eq: '==', ast.NotEq: '!=', ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=',
+    ast.Is: 'is', ast.IsNot: 'is not', ast.In: 'in', ast.NotIn: 'not in',
+}
+
+
+def _isNegative(node):
+    # the ast module folds -1 into Num(-1), where the compiler keeps UnarySub(Const(1))
+    return isinstance(node, ast.Num) and not isinstance(node.n, complex) and node.n < 0
+
+
+def _children(node):
+    "the names of what the compiler's node would iterate over"
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if isinstance(node, ast.Attribute):
+        return [getName(node.value), node.attr]
+    if isinstance(node, (ast.Num, ast.Str)) and not _isNegative(node):
+        return [str(getattr(node, 'n', getattr(node, 's', None)))]
+    return [getName(node)]
+
+
+def _argNames(args):
+    "the compiler's argnames of ast arguments"
+    def name(arg):
+        if isinstance(arg, ast.Tuple):
+            return tuple(name(elt) for elt in arg.elts)
+        return arg.id
+    names = [name(arg) for arg in args.args]
+    if args.vararg:
+        names.append(args.vararg)
+    if args.kwarg:
+        names.append(args.kwarg)
+    return names
+
+
+def _compilerRepr(node):
+    """
+    repr of the compiler's node for node, which codefinder.getName falls
+    back to. Falls back to ast.dump for the nodes that hardly ever need it.
+    """
+    r = _compilerRepr
+    rs = lambda nodes: '[%s]' % ', '.join(map(r, nodes))
+    if node is None:
+        return 'None'
+    if isinstance(node, ast.Name):
+        return 'Name(%r)' % node.id
+    if _isNegative(node):
+        return 'UnarySub(Const(%r))' % -node.n
+    if isinstance(node, ast.Num):
+        return 'Const(%r)' % node.n
+    if isinstance(node, ast.Str):
+        return 'Const(%r)' % node.s
+    if isinstance(node, ast.Attribute):
+        return 'Getattr(%s, %r)' % (r(node.value), node.attr)
+    if isinstance(node, ast.keyword):
+        return 'Keyword(%r, %s)' % (node.arg, r(node.value))
+    if isinstance(node, ast.Call):
+        return 'CallFunc(%s, %s, %s, %s)' % (r(node.func), rs(node.args + node.keywords),
+                                             r(node.starargs), r(node.kwargs))
+    if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Index):
+        index = node.slice.value
+        if isinstance(index, ast.Tuple):
+            subs = index.elts
+        else:
+            subs = [index]
+        return 'Subscript(%s, %r, %s)' % (r(node.value), 'OP_APPLY', rs(subs))
+    if isinstance(node, ast.IfExp):
+        return 'IfExp(%s, %s, %s)' % (r(node.test), r(node.body), r(node.orelse))
+    if isinstance(node, ast.BinOp) and node.op.__class__ in BINOPS:
+        return '%s((%s, %s))' % (BINOPS[node.op.__class__], r(node.left), r(node.right))
+    if isinstance(node, ast.BinOp) and node.op.__class__ in BITOPS:
+        operands = [node.right]
+        while isinstance(node.left, ast.BinOp) and node.left.op.__class__ is node.op.__class__:
+            node = node.left
+            operands.append(node.right)
+        operands.append(node.left)
+        operands.reverse()
+        return '%s(%s)' % (BITOPS[node.op.__class__], rs(operands))
+    if isinstance(node, ast.UnaryOp):
+        return '%s(%s)' % (UNARYOPS[node.op.__class__], r(node.operand))
+    if isinstance(node, ast.BoolOp):
+        return '%s(%s)' % (isinstance(node.op, ast.Or) and 'Or' or 'And', rs(node.values))
+    if isinstance(node, ast.Compare):
+        ops = ['(%r, %s)' % (COMPARISONS[op.__class__], r(comparator))
+                    for op, comparator in zip(node.ops, node.comparators)]
+        return 'Compare(%s, [%s])' % (r(node.left), ', '.join(ops))
+    if isinstance(node, ast.Tuple):
+        return 'Tuple(%s)' % rs(node.elts)
+    if isinstance(node, ast.List):
+        return 'List(%s)' % rs(node.elts)
+    if isinstance(node, ast.Set):
+        return 'Set(%s)' % rs(node.elts)
+    if isinstance(node, ast.Dict):
+        return 'Dict([%s])' % ', '.join('(%s, %s)' % (r(key), r(value))
+                                        for key, value in zip(node.keys, node.values))
+    if isinstance(node, ast.Repr):
+        return 'Backquote(%s)' % r(node.value)
+    if isinstance(node, ast.Lambda):
+        flags = (node.args.vararg and 4 or 0) | (node.args.kwarg and 8 or 0)
+        return 'Lambda(%r, %s, %d, %s)' % (_argNames(node.args), rs(node.args.defaults),
+                                           flags, r(node.body))
+    return ast.dump(node)
+
+
+def getName(node):
+    "codefinder.getName for ast nodes"
+    if node is None: return ''
+    if isinstance(node, (basestring, int, long, float)):
+        return str(node)
+    if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+        return node.name
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Dict):
+        pairs = ['%s: %s' % (getName(key), getName(value)) for key, value in zip(node.keys, node.values)]
+        return '{%s}' % ', '.join(pairs)
+    if isinstance(node, ast.Call):
+        left = [node.func, node.starargs, node.kwargs]
+        args = node.args + node.keywords
+        return '%s(%s)' % (''.join(getName(n) for n in left if n is not None),
+                           ', '.join(map(getName, args)))
+    if _isNegative(node):
+        return '-%s' % constName(-node.n)
+    if isinstance(node, ast.Num):
+        return constName(node.n)
+    if isinstance(node, ast.Str):
+        return constName(node.s)
+    if isinstance(node, ast.BinOp):
+        if isinstance(node.op, (ast.LShift, ast.RShift)):
+            template = isinstance(node.op, ast.LShift) and '%s<<%s' or '%s>>%s'
+            return template % (''.join(_children(node.left)), ''.join(_children(node.right)))
+        if node.op.__class__ in MATHNODES:
+            return '%s%s%s' % (getName(node.left), MATHNODES[node.op.__class__], getName(node.right))
+        if isinstance(node.op, ast.BitOr):
+            return '%s|%s' % (getName(node.left), getName(node.right))
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, ast.USub):
+            return '-%s' % getName(node.operand)
+        if isinstance(node.op, ast.Not):
+            return 'not %s' % getName(node.operand)
+    if isinstance(node, ast.List):
+        return '[%s]' % ', '.join(map(getName, node.elts))
+    if isinstance(node, ast.Tuple):
+        return '(%s)' % ', '.join(map(getName, node.elts))
+    if isinstance(node, ast.Lambda):
+        return 'lambda %s: %s' % (', '.join(map(getName, _argNames(node.args))), getName(node.body))
+    if isinstance(node, ast.Attribute):
+        return '%s.%s' % (getName(node.value), node.attr)
+    if isinstance(node, ast.Compare):
+        parts = [getName(node.left)]
+        for op, comparator in zip(node.ops, node.comparators)[:-1]:
+            parts.extend([COMPARISONS[op.__class__], getName(comparator)])
+        parts.append(COMPARISONS[node.ops[-1].__class__])
+        rhs = node.comparators[-1]
+        if isinstance(rhs, ast.Num) and not _isNegative(rhs):
+            value = rhs.n
+        elif isinstance(rhs, ast.Str):
+            value = rhs.s
+        else:
+            # like the compiler, which only knows how to spell constants there
+            raise AttributeError("'%s' object has no attribute 'value'" % rhs.__class__.__name__)
+        return '%s %r' % (' '.join(parts), value)
+    if (isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Slice)
+            and node.slice.step is None):
+        return '%s[%s:%s]' % (getName(node.value), getName(node.slice.lower), getName(node.slice.upper))
+    if isinstance(node, ast.BoolOp):
+        return (isinstance(node.op, ast.Or) and ' or ' or ' and ').join(map(getName, node.values))
+    if isinstance(node, ast.keyword):
+        return "%s=%s" % (node.arg, getName(node.value))
+    return _compilerRepr(node)
+
+
+def getFuncArgs(func, inClass=True):
+    "codefinder.getFuncArgs for an ast.FunctionDef"
+    args = map(argToStr, _argNames(func.args))
+    if func.args.kwarg and func.args.vararg:
+        args[-1] = '**' + args[-1]
+        args[-2] = '*' + args[-2]
+    elif func.args.kwarg:
+        args[-1] = '**' + args[-1]
+    elif func.args.vararg:
+        args[-1] = '*' + args[-1]
+
+    if inClass:
+        args = args[1:]
+
+    offset = bool(func.args.vararg) + bool(func.args.kwarg) + 1
+    for default in reversed(func.args.defaults):
+        if isinstance(default, ast.Num) and not _isNegative(default):
+            name = repr(default.n)
+        elif isinstance(default, ast.Str):
+            name = repr(default.s)
+        else:
+            name = getName(default)
+        args[-offset] = args[-offset] + "=" + name
+        offset += 1
+
+    return args
+
+
+class AstCodeFinder(ast.NodeVisitor):
+    """
+    codefinder.CodeFinder for ast trees. Nodes are visited in the order the
+    compiler's nodes would be, so that names come out in the same order.
+    """
+    def __init__(self):
+        self.imports = {}
+        self.scope = []
+        self.modules = ModuleDict()
+        self.module = '__module__'
+        self.__package = '__package__'
+        self.path = '__path__'
+
+    def __setPackage(self, package):
+        if package:
+            self.__package = package + '.'
+        else:
+            self.__package = ''
+
+    package = property(lambda s: s.__package, __setPackage)
+
+    qualify = BaseVisitor.qualify.im_func
+
+    @property
+    def inClass(self):
+        return (len(self.scope) > 0 and (isinstance(self.scope[-1], ast.ClassDef)
+                    or self.inClassFunction))
+
+    @property
+    def inClassFunction(self):
+        return (len(self.scope) == 2 and
+                isinstance(self.scope[-1], ast.FunctionDef) and
+                isinstance(self.scope[-2], ast.ClassDef))
+
+    @property
+    def currentClass(self):
+        if self.inClassFunction:
+            return self.scope[-2].name
+        elif self.inClass:
+            return self.scope[-1].name
+        return None
+
+    def visitBody(self, nodes):
+        for node in nodes:
+            self.visit(node)
+
+    def visit_Module(self, node):
+        if self.module == '__init__':
+            self.modules.enterModule('%s' % self.package[:-1]) # remove dot
+        else:
+            self.modules.enterModule('%s%s' % (self.package, self.module))
+        self.visitBody(node.body)
+        self.modules.exitModule()
+
+    def visit_Attribute(self, node):
+        if isinstance(node.ctx, (ast.Store, ast.Del)) and self.inClassFunction:
+            if isinstance(node.value, ast.Name) and node.value.id == 'self':
+                self.modules.addProperty(self.currentClass, node.attr)
+        self.visit(node.value)
+
+    def visit_Name(self, node):
+        if not isinstance(node.ctx, (ast.Store, ast.Del)):
+            return
+        if self.inClass and len(self.scope) == 1:
+            self.modules.addProperty(self.currentClass, node.id)
+        elif len(self.scope) == 0:
+            self.modules.addProperty(None, node.id)
+
+    def visit_AugAssign(self, node):
+        # the compiler doesn't treat the target as assigned to
+        if isinstance(node.target, ast.Attribute):
+            self.visit(node.target.value)
+        elif not isinstance(node.target, ast.Name):
+            self.visit(node.target)
+        self.visit(node.value)
+
+    def visit_Dict(self, node):
+        for key, value in zip(node.keys, node.values):
+            self.visit(key)
+            self.visit(value)
+
+    def visit_Print(self, node):
+        self.visitBody(node.values)
+        if node.dest is not None:
+            self.visit(node.dest)
+
+    def visit_Lambda(self, node):
+        # the arguments are names, not assignments
+        self.visitBody(node.args.defaults)
+        self.visit(node.body)
+
+    def visit_ImportFrom(self, node):
+        modname = node.module or ''
+        for alias in node.names:
+            asName = alias.asname or alias.name
+            self.imports[asName] = "%s.%s" % (modname, alias.name)
+        for alias in node.names:
+            asName = alias.asname or alias.name
+            imported = alias.name
+            if self.isRelativeImport(modname):
+                imported = "%s%s.%s" % (self.package, modname, imported)
+            else:
+                imported = "%s.%s" % (modname, imported)
+            self.modules.addPointer("%s.%s" % (self.modules.currentModule, asName), imported)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            asName = alias.asname or alias.name
+            self.imports[asName] = alias.name
+        for alias in node.names:
+            asName = alias.asname or alias.name
+            imported = alias.name
+            if self.isRelativeImport(imported):
+                imported = "%s%s" % (self.package, imported)
+            self.modules.addPointer("%s.%s" % (self.modules.currentModule, asName), imported)
+
+    def isRelativeImport(self, imported):
+        pathToImport = os.path.join(self.path, *imported.split('.'))
+        return fscache.exists(pathToImport) or fscache.exists(pathToImport + '.py')
+
+    def visit_ClassDef(self, klass):
+        self.scope.append(klass)
+        if len(self.scope) == 1:
+            bases = [self.qualify(getName(b), self.modules.currentModule) for b in klass.bases]
+            self.modules.enterClass(klass.name, bases, ast.get_docstring(klass, False) or '')
+        self.visitBody(klass.body)
+        self.scope.pop()
+
+    def visit_FunctionDef(self, func):
+        self.scope.append(func)
+        if self.inClassFunction:
+            if func.name != '__init__':
+                if func.decorator_list and 'property' in [getName(n) for n in func.decorator_list]:
+                    self.modules.addProperty(self.currentClass, func.name)
+                else:
+                    self.modules.addMethod(self.currentClass, func.name,
+                                    getFuncArgs(func), ast.get_docstring(func, False) or "")
+            else:
+                self.modules.setConstructor(self.currentClass, getFuncArgs(func))
+        elif len(self.scope) == 1:
+            self.modules.addFunction(func.name, getFuncArgs(func,
+                                inClass=False), ast.get_docstring(func, False) or "")
+
+        self.visitBody(func.body)
+        self.scope.pop()
+
+
+def _unicodeLiterals(tree):
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module == '__future__':
+            if 'unicode_literals' in [alias.name for alias in node.names]:
+                return True
+        elif not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Str)):
+            # future imports can only follow the docstring
+            break
+    return False
+
+
+class AstParser(object):
+    "The parser backend built on the ast module"
+    name = 'ast'
+
+    def parse(self, source, path='<unknown>'):
+        tree = compile(source, path, 'exec', ast.PyCF_ONLY_AST)
+        if _unicodeLiterals(tree):
+            # the compiler package ignores the future import, and keeps the
+            # literals in the encoding of the source
+            encoding = 'utf-8'
+            for line in source.splitlines()[:2]:
+                match = CODING.match(line)
+                if match:
+                    encoding = match.group(1)
+                    break
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Str) and isinstance(node.s, unicode):
+                    node.s = node.s.encode(encoding)
+        return tree
+
+    def codeFinder(self):
+        return AstCodeFinder()
+
+    def walk(self, tree, codeFinder):
+        codeFinder.visit(tree)
@@ -0,0 +1,218 @@
+# bundles.py
+# Tags of the standard library and installed distributions, shared by projects
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+With --libs, pysmell keeps a tags file, a bundle, for the standard library
+and for every distribution installed in site-packages in a directory of the
+user (~/.pysmell/bundles by default), with one subdirectory per interpreter
+and parser (--fast bundles don't replace the complete ones). A bundle is
+named after the distribution and its version (the version of python for the
+standard library), so only the distributions that are new or were upgraded
+are analysed again.
+
+The bundles of an interpreter and parser are the shards (see
+pysmell.shards) of a manifest in their subdirectory, which maps every top
+level package to the bundles providing it. Projects link to that manifest
+with a PYSMELLTAGS.libs file holding its path:
+
+    # PYSMELLLINK
+    /home/user/.pysmell/bundles/python-2.5.2-0123abcd/compiler/PYSMELLTAGS
+
+so every project sees the bundles as soon as they are updated.
+"""
+
+import os
+import re
+import sys
+import site
+import platform
+from distutils import sysconfig
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
+
+try:
+    import pkg_resources
+except ImportError:
+    pkg_resources = None
+
+from pysmell.parsers import DEFAULT as DEFAULT_PARSER
+
+version = __import__('pysmell').__version__
+
+DEFAULT_DIRECTORY = os.path.join('~', '.pysmell', 'bundles')
+LINK_MAGIC = '# PYSMELLLINK\n'
+STDLIB = 'python'
+# what the README always told people to leave out of the standard library
+STDLIB_EXCLUDED = ['site-packages', 'dist-packages', 'test']
+
+TOP_LEVEL = re.compile(r'^[A-Za-z_]\w*(\.py)?$')
+
+
+class Distribution(object):
+    """
+    Something that gets a bundle: its name, version, the files and
+    directories to analyse and the patterns to exclude (like the arguments
+    of pysmell.tags.process).
+    """
+    def __init__(self, name, version, paths, excluded=()):
+        self.name = name
+        self.version = version
+        self.paths = paths
+        self.excluded = list(excluded)
+
+    def names(self):
+        "the top level packages and modules of the distribution"
+        names = []
+        for path in self.paths:
+            if os.path.isdir(path) and not os.path.exists(os.path.join(path, '__init__.py')):
+                names.extend(_topLevel(path, self.excluded))
+            elif TOP_LEVEL.match(os.path.basename(path)):
+                names.append(_moduleName(os.path.basename(path)))
+        return sorted(set(names))
+
+    def __repr__(self):
+        return 'Distribution(%r, %r, %r)' % (self.name, self.version, self.paths)
+
+
+def _moduleName(filename):
+    if filename.endswith('.py'):
+        return filename[:-3]
+    return filename
+
+
+def _topLevel(directory, excluded=()):
+    "the names of the packages and modules directly in directory"
+    names = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if not TOP_LEVEL.match(name) or name in excluded:
+            continue
+        if name.endswith('.py') and os.path.isfile(path):
+            names.append(name[:-3])
+        elif os.path.exists(os.path.join(path, '__init__.py')):
+            names.append(name)
+    return names
+
+
+def interpreterKey():
+    """
+    The subdirectory of the bundles of the running interpreter: its version,
+    and a digest telling apart installations (and virtualenvs) of the same
+    version, and versions of pysmell that may tag differently.
+    """
+    digest = md5('\0'.join([sys.prefix, sys.executable, version]))
+    return 'python-%s-%s' % (platform.python_version(), digest.hexdigest()[:8])
+
+
+def bundleDirectory(directory=DEFAULT_DIRECTORY, parser=DEFAULT_PARSER):
+    "where the bundles of the running interpreter and the named parser go"
+    return os.path.join(os.path.abspath(os.path.expanduser(directory)), interpreterKey(), parser)
+
+
+def bundleFilename(distribution, parser):
+    "the bundle of distribution, analysed with the named parser"
+    safe = lambda string: re.sub(r'[^\w.]+', '_', string)
+    return '%s-%s.%s.tags' % (safe(distribution.name), safe(distribution.version), parser)
+
+
+def siteDirectories():
+    "the site-packages directories of the running interpreter"
+    directories = [sysconfig.get_python_lib()]
+    if hasattr(site, 'getsitepackages'):
+        directories.extend(site.getsitepackages())
+    found = []
+    for directory in directories:
+        directory = os.path.abspath(directory)
+        if os.path.isdir(directory) and directory not in found:
+            found.append(directory)
+    return found
+
+
+def stdlibDistribution():
+    return Distribution(STDLIB, platform.python_version(),
+                        [sysconfig.get_python_lib(standard_lib=True)], STDLIB_EXCLUDED)
+
+
+def siteDistributions(directories):
+    """
+    Return a Distribution for every distribution installed in directories,
+    with the packages its top_level.txt lists, and one for every package or
+    module there that no distribution claims, versioned by its modification
+    time. Without setuptools, every package and module is one of the latter.
+
+    Distributions sharing a package (like namespace packages) share one
+    Distribution too, named and versioned after all of them.
+    """
+    distributions = []
+    claimed = {}
+    for directory in directories:
+        if pkg_resources is not None:
+            # in a stable order, that shared bundles keep their names
+            found = sorted(pkg_resources.find_distributions(directory, only=True),
+                           key=lambda dist: (dist.key, dist.version))
+            for dist in found:
+                if not dist.has_metadata('top_level.txt'):
+                    continue
+                paths = []
+                for name in dist.get_metadata_lines('top_level.txt'):
+                    name = name.strip().replace('/', os.sep)
+                    for path in [os.path.join(dist.location, name),
+                                 os.path.join(dist.location, name + '.py')]:
+                        if os.path.exists(path):
+                            paths.append(path)
+                shared = [claimed[path] for path in paths if path in claimed]
+                if shared:
+                    distribution = shared[0]
+                    distribution.name += '+' + dist.project_name
+                    distribution.version += '+' + dist.version
+                    distribution.paths = sorted(set(distribution.paths + paths))
+                elif paths:
+                    distribution = Distribution(dist.project_name, dist.version, sorted(paths))
+                    distributions.append(distribution)
+                for path in paths:
+                    claimed[path] = distribution
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if path in claimed or not TOP_LEVEL.match(name):
+                continue
+            if (name.endswith('.py') and os.path.isfile(path)
+                or os.path.exists(os.path.join(path, '__init__.py'))):
+                modified = str(int(os.path.getmtime(path)))
+                claimed[path] = Distribution(_moduleName(name), modified, [path])
+                distributions.append(claimed[path])
+    return distributions
+
+
+def findDistributions():
+    "the standard library and the distributions of the running interpreter"
+    return [stdlibDistribution()] + siteDistributions(siteDirectories())
+
+
+def writeLink(target, f):
+    f.write(LINK_MAGIC)
+    f.write(os.path.abspath(target))
+    f.write('\n')
+
+
+def isLink(header):
+    return header.startswith(LINK_MAGIC)
+
+
+def readLink(path):
+    "the path of the tags the link at path points to"
+    f = open(path, 'r')
+    try:
+        data = f.read()
+    finally:
+        f.close()
+    return data[len(LINK_MAGIC):].strip()
@@ -0,0 +1,182 @@
+# cache.py
+# Content addressed cache of analysed files, shared between checkouts
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import os
+from pprint import pprint
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
+
+from pysmell.codefinder import ModuleDict, findPackage
+from pysmell.fscache import fscache
+
+version = __import__('pysmell').__version__
+
+DEFAULT_DIRECTORY = os.path.join('~', '.pysmell', 'cache')
+DEFAULT_SIZE = 200 * 1024 * 1024
+STATSFILE = 'stats'
+
+
+class AnalysisCache(object):
+    """
+    Stores the ModuleDict produced for a file under a key made of the contents
+    of the file, its package and module name and the names next to it (which
+    decide whether an import is relative). Identical files in different
+    checkouts share an entry.
+
+    The least recently used entries are evicted when the cache grows over
+    ``maxSize`` bytes.
+    """
+    def __init__(self, directory=DEFAULT_DIRECTORY, maxSize=DEFAULT_SIZE):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.maxSize = maxSize
+
+    def keyFor(self, filename, absPath, parser='compiler'):
+        "parser: the name of the parser backend the file is analysed with"
+        f = open(os.path.join(absPath, filename), 'rb')
+        try:
+            source = f.read()
+        finally:
+            f.close()
+        siblings = sorted(name for name in fscache.listdir(absPath)
+                    if name.endswith('.py') or os.path.isdir(os.path.join(absPath, name)))
+        digest = md5(source)
+        digest.update('\0'.join([version, parser, findPackage(absPath), filename] + siblings))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        "return the cached ModuleDict for key, or None"
+        path = self._path(key)
+        try:
+            f = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            try:
+                partial = pickle.load(f)
+            finally:
+                f.close()
+        except Exception:
+            return None
+        try:
+            os.utime(path, None) # mark as recently used
+        except OSError:
+            pass
+        modules = ModuleDict()
+        modules.update(partial)
+        return modules
+
+    def put(self, key, modules):
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                pass # created by another process
+        tmpPath = '%s.%d.tmp' % (path, os.getpid())
+        f = open(tmpPath, 'wb')
+        try:
+            pickle.dump(dict(modules.items()), f, 2)
+        finally:
+            f.close()
+        try:
+            os.rename(tmpPath, path)
+        except OSError:
+            # windows won't replace an existing entry, which is identical anyway
+            os.remove(tmpPath)
+
+    def entries(self):
+        "return a list of (mtime, size, path) for every entry"
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for bucket in os.listdir(self.directory):
+            bucketPath = os.path.join(self.directory, bucket)
+            if not os.path.isdir(bucketPath):
+                continue
+            for name in os.listdir(bucketPath):
+                path = os.path.join(bucketPath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        "remove the least recently used entries until the cache fits in maxSize"
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.maxSize:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        return evicted
+
+    def _statsPath(self):
+        return os.path.join(self.directory, STATSFILE)
+
+    def readStats(self):
+        stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+        try:
+            f = open(self._statsPath(), 'r')
+        except IOError:
+            return stats
+        try:
+            stats.update(eval(f.read()))
+        finally:
+            f.close()
+        return stats
+
+    def saveStats(self, hits, misses, evicted=0):
+        "add the hits and misses of a run to the stats kept in the cache"
+        stats = self.readStats()
+        stats['hits'] += hits
+        stats['misses'] += misses
+        stats['evicted'] += evicted
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        f = open(self._statsPath(), 'w')
+        try:
+            pprint(stats, f)
+        finally:
+            f.close()
+
+    def report(self):
+        stats = self.readStats()
+        entries = self.entries()
+        lookups = stats['hits'] + stats['misses']
+        ratio = lookups and 100.0 * stats['hits'] / lookups or 0.0
+        return '\n'.join([
+            'cache directory: %s' % self.directory,
+            'entries: %d' % len(entries),
+            'size: %.1f of %.1f MB' % (sum(size for _, size, _ in entries) / 1048576.0,
+                                       self.maxSize / 1048576.0),
+            'hits: %d, misses: %d (%.1f%% hit ratio)' % (stats['hits'], stats['misses'], ratio),
+            'evicted: %d' % stats['evicted'],
+        ])
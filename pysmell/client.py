@@ -0,0 +1,99 @@
+# client.py
+# Completions for editors, from pysmell serve when it runs
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import socket
+
+from pysmell import idehelper
+from pysmell.server import json, supported, socketPath, toJSON, fromJSON, decodeOptions
+
+# seconds to wait for the server before completing in process
+TIMEOUT = 5
+
+# the socket of the server that answered the last complete, None if it
+# was completed in process
+answeredBy = None
+
+
+class ServerError(Exception):
+    "the server could not answer a request"
+
+
+def request(method, params, path=None):
+    """
+    Return the result of a request to the server listening at path (by
+    default pysmell.server.socketPath()). Raises socket.error if there is no
+    server, ServerError if it failed to answer.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(TIMEOUT)
+        sock.connect(path or socketPath())
+        sock.sendall(json.dumps(toJSON({'id': 1, 'method': method, 'params': params})) + '\n')
+        received = []
+        while not received or not received[-1].endswith('\n'):
+            data = sock.recv(65536)
+            if not data:
+                raise socket.error('the server closed the connection')
+            received.append(data)
+    finally:
+        sock.close()
+    response = fromJSON(json.loads(''.join(received)))
+    if 'error' in response:
+        raise ServerError(response['error'])
+    return response['result']
+
+
+def complete(fullPath, source, lineNo, col, base, matcher=None, path=None):
+    """
+    Return (options, completions) for the completion of base at col of line
+    lineNo of source, the edited buffer of fullPath, or None if there is no
+    PYSMELLTAGS for it (like idehelper.detectCompletionType and
+    idehelper.findCompletions).
+
+    Asks the server listening at path (by default
+    pysmell.server.socketPath()), and completes in this process if there is
+    none or it could not answer.
+    """
+    global answeredBy
+    answeredBy = None
+    path = path or socketPath()
+    if path is not None and supported():
+        params = {'fullPath': fullPath, 'source': source, 'lineNo': lineNo, 'col': col,
+                  'base': base, 'matcher': matcher}
+        try:
+            result = request('complete', params, path)
+        except (socket.error, ValueError, ServerError):
+            pass
+        else:
+            answeredBy = path
+            if result is None:
+                return None
+            return decodeOptions(result['options']), result['completions']
+    PYSMELLDICT = idehelper.findPYSMELLDICT(fullPath)
+    if not PYSMELLDICT:
+        return None
+    options = idehelper.detectCompletionType(fullPath, source, lineNo, col, base, PYSMELLDICT)
+    return options, idehelper.findCompletions(base, PYSMELLDICT, options, matcher)
+
+
+def tagsCacheCounts():
+    """
+    Return (hits, misses) of the tags cache (see
+    pysmell.tagsformat.TagsCache) the last complete used: the one of the
+    server if it answered, the one of this process otherwise. None if the
+    server is gone since.
+    """
+    if answeredBy is None:
+        return idehelper.tagsCache.counts()
+    try:
+        stats = request('stats', {}, answeredBy)
+    except (socket.error, ValueError, ServerError):
+        return None
+    return stats['tagsHits'], stats['tagsMisses']
@@ -10,14 +10,31 @@
 
 import os
 import sys
+import time
 import __builtin__
 import compiler
 
 from compiler import ast
 
+from pysmell.fscache import fscache
+
 class ModuleDict(dict):
     def __init__(self):
         self._modules = {'CLASSES': {}, 'FUNCTIONS': [], 'CONSTANTS': [], 'POINTERS': {}, 'HIERARCHY': []}
+        self._forgetClasses()
+
+    def _forgetClasses(self):
+        # full class name -> (class dict, set of method keys, set of properties)
+        self._memberIndex = {}
+        # (module, klass, index) of the class members were last added to
+        self._lastClass = None
+
+    def __getstate__(self):
+        # the member index is only needed while analysing
+        state = self.__dict__.copy()
+        state['_memberIndex'] = {}
+        state['_lastClass'] = None
+        return state
 
     def enterModule(self, module):
         self.currentModule = module
@@ -25,10 +42,29 @@ class ModuleDict(dict):
 
     def exitModule(self):
         self.currentModule = None
+        self._forgetClasses()
+
+    def _classIndex(self, klass):
+        """
+        Return (class dict, method keys, properties) for klass in the current
+        module. The sets mirror the member lists, so that adding a member
+        doesn't have to search them.
+        """
+        last = self._lastClass
+        if last is not None and last[0] == self.currentModule and last[1] == klass:
+            return last[2]
+        fullClass = "%s.%s" % (self.currentModule, klass)
+        klassDict = self['CLASSES'][fullClass]
+        index = self._memberIndex.get(fullClass)
+        if index is None or index[0] is not klassDict:
+            index = (klassDict, set(_methodKey(*method) for method in klassDict['methods']),
+                     set(klassDict['properties']))
+            self._memberIndex[fullClass] = index
+        self._lastClass = (self.currentModule, klass, index)
+        return index
 
     def currentClass(self, klass):
-        fullClass = "%s.%s" % (self.currentModule, klass)
-        return self['CLASSES'][fullClass]
+        return self._classIndex(klass)[0]
 
     def enterClass(self, klass, bases, docstring):
         fullClass = "%s.%s" % (self.currentModule, klass)
@@ -38,10 +74,14 @@ class ModuleDict(dict):
         self['CLASSES'][fullClass]['constructor'] = []
         self['CLASSES'][fullClass]['bases'] = bases
         self['CLASSES'][fullClass]['docstring'] = docstring
+        self._lastClass = None
 
     def addMethod(self, klass, method, args, docstring):
-        if (method, args, docstring) not in self.currentClass(klass)['methods']:
-            self.currentClass(klass)['methods'].append((method, args, docstring))
+        klassDict, methods, _ = self._classIndex(klass)
+        key = _methodKey(method, args, docstring)
+        if key not in methods:
+            methods.add(key)
+            klassDict['methods'].append((method, args, docstring))
 
     def addPointer(self, name, pointer):
         self['POINTERS'][name] = pointer
@@ -52,24 +92,51 @@ class ModuleDict(dict):
 
     def addProperty(self, klass, prop):
         if klass is not None:
-            if prop not in self.currentClass(klass)['properties']:
-                self.currentClass(klass)['properties'].append(prop)
+            klassDict, _, properties = self._classIndex(klass)
+            if prop not in properties:
+                properties.add(prop)
+                klassDict['properties'].append(prop)
         else:
             fullProp = "%s.%s" % (self.currentModule, prop)
             self['CONSTANTS'].append(fullProp)
 
     def setConstructor(self, klass, args):
-        fullClass = "%s.%s" % (self.currentModule, klass)
-        self['CLASSES'][fullClass]['constructor'] = args
+        self.currentClass(klass)['constructor'] = args
 
     def update(self, other):
         if other:
+            self._lastClass = None
             self['CONSTANTS'].extend(other['CONSTANTS'])
             self['FUNCTIONS'].extend(other['FUNCTIONS'])
             self['HIERARCHY'].extend(other['HIERARCHY'])
             self['CLASSES'].update(other['CLASSES'])
             self['POINTERS'].update(other['POINTERS'])
 
+    def dropModules(self, moduleNames):
+        """
+        Remove everything that was produced by the modules in ``moduleNames``.
+        Every name is attributed to the longest module in HIERARCHY it is
+        prefixed with.
+        """
+        moduleNames = set(moduleNames)
+        if not moduleNames:
+            return
+        self._forgetClasses()
+        hierarchy = set(self['HIERARCHY'])
+        def dropped(name):
+            while '.' in name:
+                name = name.rsplit('.', 1)[0]
+                if name in hierarchy:
+                    return name in moduleNames
+            return False
+
+        self['HIERARCHY'][:] = [mod for mod in self['HIERARCHY'] if mod not in moduleNames]
+        self['CONSTANTS'][:] = [const for const in self['CONSTANTS'] if not dropped(const)]
+        self['FUNCTIONS'][:] = [func for func in self['FUNCTIONS'] if not dropped(func[0])]
+        for key in ('CLASSES', 'POINTERS'):
+            for name in [name for name in self[key] if dropped(name)]:
+                del self[key][name]
+
     def keys(self):
         return self._modules.keys()
 
@@ -97,6 +164,10 @@ class ModuleDict(dict):
         return not self == other
 
 
+def _methodKey(method, args, docstring):
+    return method, tuple(args), docstring
+
+
 def VisitChildren(fun):
     def decorated(self, *args, **kwargs):
         fun(self, *args, **kwargs)
@@ -235,7 +306,7 @@ class CodeFinder(BaseVisitor):
 
     def isRelativeImport(self, imported):
         pathToImport = os.path.join(self.path, *imported.split('.'))
-        return os.path.exists(pathToImport) or os.path.exists(pathToImport + '.py')
+        return fscache.exists(pathToImport) or fscache.exists(pathToImport + '.py')
         
     def visitClass(self, klass):
         self.enterScope(klass)
@@ -281,6 +352,15 @@ def getNameMath(node):
     return '%s%s%s' % (getName(node.left), MATHNODES[node.__class__], getName(node.right))
 
 
+def constName(value):
+    "how getName spells a constant"
+    try:
+        float(value)
+        return str(value)
+    except:
+        return repr(str(value))
+
+
 def getName(node):
     if node is None: return ''
     if isinstance(node, (basestring, int, long, float)):
@@ -295,11 +375,7 @@ def getName(node):
         notArgs = [n for n in node.getChildNodes() if n not in node.args]
         return getNameTwo('%s(%s)', notArgs, node.args, rightJ=', ')
     if isinstance(node, ast.Const):
-        try:
-            float(node.value)
-            return str(node.value)
-        except:
-            return repr(str(node.value))
+        return constName(node.value)
     if isinstance(node, ast.LeftShift):
         return getNameTwo('%s<<%s', node.left, node.right)
     if isinstance(node, ast.RightShift):
@@ -375,17 +451,57 @@ def getFuncArgs(func, inClass=True):
     return args
 
 
-def getClassDict(path, codeFinder=None):
-    tree = compiler.parseFile(path)
+class CompilerParser(object):
+    """
+    The parser backend built on the compiler package. A parser backend
+    parses source into a tree, and makes the code finder that walks it into
+    a ModuleDict (see pysmell.parsers).
+    """
+    name = 'compiler'
+
+    def parse(self, source, path='<unknown>'):
+        return compiler.parse(source)
+
+    def codeFinder(self):
+        return CodeFinder()
+
+    def walk(self, tree, codeFinder):
+        compiler.walk(tree, codeFinder)
+
+
+def getClassDict(path, codeFinder=None, timings=None, parser=None):
+    """
+    timings: an optional dict that is filled in with the seconds it took to
+             'parse' the file and to 'visit' its tree, and its 'lines'
+
+    parser: the parser backend to use, CompilerParser by default. codeFinder
+            must be one of its code finders.
+    """
+    if parser is None:
+        parser = CompilerParser()
+    start = time.time()
+    # what compiler.parseFile does
+    f = open(path, 'U')
+    try:
+        source = f.read()
+    finally:
+        f.close()
+    tree = parser.parse(source + '\n', path)
+    if timings is not None:
+        timings['parse'] = time.time() - start
+        timings['lines'] = len(source.splitlines())
+        start = time.time()
     if codeFinder is None:
-        codeFinder = CodeFinder()
-    compiler.walk(tree, codeFinder)
+        codeFinder = parser.codeFinder()
+    parser.walk(tree, codeFinder)
+    if timings is not None:
+        timings['visit'] = time.time() - start
     return codeFinder.modules
 
 
 def findRootPackageList(directory, filename):
     "should walk up the tree until there is no __init__.py"
-    isPackage = lambda path: os.path.exists(os.path.join(path, '__init__.py'))
+    isPackage = fscache.isPackage
     if not isPackage(directory):
         return []
     packages = []
@@ -403,10 +519,13 @@ def findPackage(path):
     return package
 
 
-def processFile(f, path):
+def processFile(f, path, timings=None, parser=None):
     """f is the the filename, path is the relative path in the project, root is
-    the topmost package"""
-    codeFinder = CodeFinder()
+    the topmost package. timings and parser are passed on to getClassDict,
+    timings gets the 'error' that stopped the analysis, if any"""
+    if parser is None:
+        parser = CompilerParser()
+    codeFinder = parser.codeFinder()
 
     package = findPackage(path)
     codeFinder.package = package
@@ -414,9 +533,11 @@ def processFile(f, path):
     codeFinder.path = path
     try:
         assert os.path.isabs(path), "path should be absolute"
-        modules = getClassDict(os.path.join(path, f), codeFinder)
+        modules = getClassDict(os.path.join(path, f), codeFinder, timings, parser)
         return modules
     except Exception, e:
+        if timings is not None:
+            timings['error'] = '%s: %s' % (e.__class__.__name__, e)
         print '-=#=- '* 10
         print 'EXCEPTION in', os.path.join(path, f)
         print e
@@ -453,19 +574,24 @@ class SelfInferer(BaseVisitor):
 
     def visitClass(self, klassNode):
         self.visit(klassNode.code)
-        nestedStart, nestedEnd = None, None
-        for klass, _, start, end in self.classRanges:
-            if start > klassNode.lineno and end < self.lastlineno:
-                nestedStart, nestedEnd = start, end
-            
-        bases = [self.qualify(getName(b), None) for b in klassNode.bases]
-        if nestedStart == nestedEnd == None:
-            self.classRanges.append((klassNode.name, bases, klassNode.lineno, self.lastlineno))
-        else:
-            start, end = klassNode.lineno, self.lastlineno
-            self.classRanges.append((klassNode.name, bases, start, nestedStart-1))
-            self.classRanges.append((klassNode.name, bases, nestedEnd+1, end))
-        self.lastlineno = klassNode.lineno
+        _addClassRange(self, klassNode)
+
+
+def _addClassRange(inferer, klassNode):
+    "add the lines of klassNode to inferer.classRanges, once its code was visited"
+    nestedStart, nestedEnd = None, None
+    for klass, _, start, end in inferer.classRanges:
+        if start > klassNode.lineno and end < inferer.lastlineno:
+            nestedStart, nestedEnd = start, end
+        
+    bases = [inferer.qualify(getName(b), None) for b in klassNode.bases]
+    if nestedStart == nestedEnd == None:
+        inferer.classRanges.append((klassNode.name, bases, klassNode.lineno, inferer.lastlineno))
+    else:
+        start, end = klassNode.lineno, inferer.lastlineno
+        inferer.classRanges.append((klassNode.name, bases, start, nestedStart-1))
+        inferer.classRanges.append((klassNode.name, bases, nestedEnd+1, end))
+    inferer.lastlineno = klassNode.lineno
 
 
 def getSafeTree(source, lineNo):
@@ -506,19 +632,23 @@ class NameVisitor(BaseVisitor):
 
     @VisitChildren
     def visitAssign(self, node):
-        assNode = node.nodes[0]
-        name = None
-        if isinstance(assNode, ast.AssName):
-            name = assNode.name
-        elif isinstance(assNode, ast.AssAttr):
-            name = assNode.attrname
-        self.names[name] = getName(node.expr)
+        self.names[_assignedName(node)] = getName(node.expr)
 
     @VisitChildren
     def visitClass(self, node):
         self.klasses.append(node.name)
 
 
+def _assignedName(node):
+    assNode = node.nodes[0]
+    name = None
+    if isinstance(assNode, ast.AssName):
+        name = assNode.name
+    elif isinstance(assNode, ast.AssAttr):
+        name = assNode.attrname
+    return name
+
+
 def getNames(tree):
     if tree is None:
         return None
@@ -545,14 +675,117 @@ def getClassAndParents(tree, lineNo):
 
     inferer = SelfInferer()
     compiler.walk(tree, inferer)
-    classRanges = inferer.classRanges
-    classRanges.sort(sortClassRanges)
+    return _classAt(inferer.classRanges, lineNo)
+
+def _classAt(classRanges, lineNo):
+    classRanges = sorted(classRanges, sortClassRanges)
     
     for klass, parents, start, end in classRanges:
         if lineNo >= start:
-            return klass, parents
+            return klass, list(parents)
     return None, []
 
 def sortClassRanges(a, b):
     return b[2] - a[2]
 
+
+class BufferAnalyser(CodeFinder):
+    """
+    Collects in a single walk what analyzeFile, getImports, getNames and
+    getClassAndParents each walk the tree of the edited buffer for.
+    """
+    def __init__(self):
+        CodeFinder.__init__(self)
+        # name -> the expression last assigned to it
+        self.assignments = {}
+        self.klasses = []
+        self.classRanges = []
+        self.lastlineno = 1
+        # > 0 below the defaults and decorators of functions, which
+        # CodeFinder doesn't visit
+        self.hidden = 0
+
+    def __getattr__(self, name):
+        if name.startswith('visit'):
+            return self.handleChildren
+        raise AttributeError(name)
+
+    def handleChildren(self, node):
+        self.lastlineno = node.lineno
+        CodeFinder.handleChildren(self, node)
+
+    def visitModule(self, node):
+        self.lastlineno = node.lineno
+        CodeFinder.visitModule(self, node)
+
+    @VisitChildren
+    def visitAssign(self, node):
+        self.assignments[_assignedName(node)] = node.expr
+
+    def visitAssName(self, node):
+        if self.hidden:
+            self.handleChildren(node)
+        else:
+            CodeFinder.visitAssName(self, node)
+
+    def visitAssAttr(self, node):
+        if self.hidden:
+            self.handleChildren(node)
+        else:
+            CodeFinder.visitAssAttr(self, node)
+
+    def visitClass(self, klass):
+        self.klasses.append(klass.name)
+        CodeFinder.visitClass(self, klass)
+        _addClassRange(self, klass)
+
+    def visitFunction(self, func):
+        self.lastlineno = func.lineno
+        self.hidden += 1
+        if func.decorators is not None:
+            self.visit(func.decorators)
+        for default in func.defaults:
+            self.visit(default)
+        self.hidden -= 1
+        CodeFinder.visitFunction(self, func)
+
+
+class BufferAnalysis(object):
+    """
+    What completions need to know about the edited buffer: its tags
+    ('modules'), 'imports', assigned 'names' and 'klasses' (like getNames)
+    and the class around every line.
+    """
+    def __init__(self, analyser):
+        self.modules = analyser.modules
+        self.imports = analyser.imports
+        self.assignments = analyser.assignments
+        self.klasses = analyser.klasses
+        self.classRanges = analyser.classRanges
+        self._names = None
+
+    @property
+    def names(self):
+        # spelled out when first needed, getName fails on some expressions
+        if self._names is None:
+            names = dict((name, getName(expr)) for (name, expr) in self.assignments.items())
+            names.update(self.imports)
+            self._names = names
+        return self._names
+
+    def classAndParents(self, lineNo):
+        "like getClassAndParents"
+        return _classAt(self.classRanges, lineNo)
+
+
+def analyzeBuffer(fullPath, tree):
+    "the BufferAnalysis of the tree of the file at fullPath, None if there is no tree"
+    if tree is None:
+        return None
+    analyser = BufferAnalyser()
+    absPath, filename = os.path.split(fullPath)
+    analyser.module = filename[:-3]
+    analyser.path = absPath
+    analyser.package = findPackage(absPath)
+    compiler.walk(tree, analyser)
+    return BufferAnalysis(analyser)
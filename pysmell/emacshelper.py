@@ -1,4 +1,4 @@
-from pysmell import idehelper
+from pysmell import client
 from re import split
 
 
@@ -16,13 +16,13 @@ def get_completions(fullPath, origSource, lineNo, origCol, matcher):
 When visiting the file at fullPath, with edited source origSource, find a list 
 of possible completion strings for the symbol located at origCol on orgLineNo using 
 matching mode matcher"""
-    PYSMELLDICT = idehelper.findPYSMELLDICT(fullPath)
-    if not PYSMELLDICT:
-        return
     origLine = origSource.splitlines()[lineNo - 1]
     base = split("[,.\-+/|\[\]]", origLine[:origCol].strip())[-1]
-    options = idehelper.detectCompletionType(fullPath, origSource, lineNo, origCol, base, PYSMELLDICT)
-    completions = [completion['word'] for completion in idehelper.findCompletions(base, PYSMELLDICT, options, matcher)]
+    result = client.complete(fullPath, origSource, lineNo, origCol, base, matcher)
+    if result is None:
+        return
+    _, found = result
+    completions = [completion['word'] for completion in found]
     completions = list(_uniquify(completions))
     return completions
 
@@ -0,0 +1,75 @@
+# fscache.py
+# Memoized filesystem probes for package discovery
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import os
+import time
+
+
+class FSCache(object):
+    """
+    Answers whether paths exist and directories are packages from memoized
+    directory listings, so that every directory is listed once instead of
+    being probed with a stat call for every file and every import.
+
+    The listings go stale when files are added or removed: ``invalidate``
+    forgets them all (or a directory's), ``expire`` the ones older than a
+    number of seconds, for long lived processes.
+    """
+    def __init__(self):
+        self.probes = 0
+        self.listings = 0
+        self.invalidate()
+
+    def invalidate(self, directory=None):
+        if directory is None:
+            self.entries = {}
+        else:
+            self.entries.pop(directory or os.curdir, None)
+
+    def expire(self, maxAge):
+        "forget the listings made more than maxAge seconds ago"
+        oldest = time.time() - maxAge
+        for directory, (listed, _, _) in self.entries.items():
+            if listed < oldest:
+                del self.entries[directory]
+
+    def _entry(self, directory):
+        directory = directory or os.curdir
+        self.probes += 1
+        entry = self.entries.get(directory)
+        if entry is None:
+            self.listings += 1
+            try:
+                names = sorted(os.listdir(directory))
+            except OSError:
+                names = []
+            entry = self.entries[directory] = (time.time(), names, frozenset(names))
+        return entry
+
+    def listdir(self, directory):
+        "the sorted names in directory, empty if it can't be listed"
+        return self._entry(directory)[1]
+
+    def exists(self, path):
+        directory, name = os.path.split(path.rstrip(os.sep))
+        if not name:
+            return os.path.exists(path)
+        return name in self._entry(directory)[2]
+
+    def isPackage(self, directory):
+        return self.exists(os.path.join(directory, '__init__.py'))
+
+    def counts(self):
+        "(probes answered, directories listed) so far"
+        return self.probes, self.listings
+
+
+# shared by everything in a process
+fscache = FSCache()
@@ -10,10 +10,21 @@
 import __builtin__
 import os, re
 import fnmatch
-from dircache import listdir
+from bisect import bisect_left
+from itertools import chain
 
-from pysmell.codefinder import findRootPackageList, getImports, getNames, getClassAndParents, analyzeFile, getSafeTree
-from pysmell.matchers import MATCHERS
+from pysmell.fscache import fscache
+from pysmell.codefinder import findRootPackageList, getImports, getNames, getClassAndParents, getSafeTree
+from pysmell.codefinder import analyzeBuffer, BufferAnalysis
+from pysmell.matchers import MATCHERS, Symbol, Names
+from pysmell.tagsformat import tagsCache
+from pysmell.tagstore import TagStore, DictSource, query, splitName, emptyPYSMELLDICT
+from pysmell.symboltable import SymbolTableSource
+
+listdir = fscache.listdir
+
+# seconds that what is known about the filesystem is trusted for, between completions
+MAX_AGE = 5
 
 def findBase(line, col):
     index = col
@@ -28,6 +39,8 @@ def findBase(line, col):
     
 
 def updatePySmellDict(master, partial):
+    if isinstance(master, IndexedTags):
+        master.merging(partial)
     for key, value in partial.items():
         if isinstance(value, dict):
             master.setdefault(key, {}).update(value)
@@ -36,28 +49,43 @@ def updatePySmellDict(master, partial):
 
 
 def tryReadPYSMELLDICT(directory, filename, dictToUpdate):
+    """
+    Merge the tags in directory/filename into dictToUpdate. Tags that are
+    queried where they are instead of being loaded (see pysmell.tagstore)
+    are returned instead. Tags files that did not change since the last call
+    are not loaded again (see pysmell.tagsformat.TagsCache).
+    """
     if os.path.exists(os.path.join(directory, filename)):
-        tagsFile = open(os.path.join(directory, filename), 'r')
-        try:
-            updatePySmellDict(dictToUpdate, eval(tagsFile.read()))
-        finally:
-            tagsFile.close()
+        tags = tagsCache.open(os.path.join(directory, filename))
+        if isinstance(tags, dict):
+            updatePySmellDict(dictToUpdate, tags)
+        else:
+            return tags
     
 
 def findPYSMELLDICT(filename):
+    fscache.expire(MAX_AGE)
     pathParts = _getPathParts(filename)[:-1]
-    PYSMELLDICT = {}
+    PYSMELLDICT = IndexedTags()
+    sources = []
+    def read(directory, tagsfile):
+        source = tryReadPYSMELLDICT(directory, tagsfile, PYSMELLDICT)
+        if source is not None:
+            sources.append(source)
     while pathParts:
         directory = os.path.join(*pathParts)
-        for tagsfile in fnmatch.filter(listdir(directory), 'PYSMELLTAGS.*'):
-            tryReadPYSMELLDICT(directory, tagsfile, PYSMELLDICT)
-        tagsPath = os.path.join(directory, 'PYSMELLTAGS')
-        if os.path.exists(tagsPath):
-            tryReadPYSMELLDICT(directory, 'PYSMELLTAGS', PYSMELLDICT)
+        names = listdir(directory)
+        for tagsfile in fnmatch.filter(names, 'PYSMELLTAGS.*'):
+            read(directory, tagsfile)
+        if 'PYSMELLTAGS' in names:
+            read(directory, 'PYSMELLTAGS')
             break
         pathParts.pop()
     else:
         return None
+    if sources:
+        return TagStore(sources + [DictSource(part) for part in PYSMELLDICT.parts])
+    PYSMELLDICT.seal()
     return PYSMELLDICT
             
 
@@ -86,7 +114,11 @@ def debug(vim, msg):
 
 
 def inferModule(chain, AST, lineNo):
-    imports = getImports(AST)
+    "AST: the tree of the buffer, or its BufferAnalysis (as for inferInstance and inferClass)"
+    if isinstance(AST, BufferAnalysis):
+        imports = AST.imports
+    else:
+        imports = getImports(AST)
     fullModuleParts = []
     valid = False
     for part in chain.split('.'):
@@ -102,7 +134,10 @@ def inferModule(chain, AST, lineNo):
 
 funcCellRE = re.compile(r'(.+)\(.*\)')
 def inferInstance(fullPath, AST, lineNo, var, PYSMELLDICT):
-    names, klasses = getNames(AST)
+    if isinstance(AST, BufferAnalysis):
+        names, klasses = AST.names, AST.klasses
+    else:
+        names, klasses = getNames(AST)
     assignment = names.get(var, None)
     klass = None
     parents = []
@@ -129,13 +164,16 @@ def _qualify(thing, PYSMELLDICT):
     if thing in PYSMELLDICT['POINTERS']:
         return PYSMELLDICT['POINTERS'][thing]
     else:
-        for pointer in PYSMELLDICT['POINTERS']:
-            if pointer.endswith('*') and thing.startswith(pointer[:-2]):
-                return '%s.%s' % (PYSMELLDICT['POINTERS'][pointer][:-2], thing.split('.', 1)[-1])
+        for pointer, target in query(PYSMELLDICT).starPointers():
+            if thing.startswith(pointer[:-2]):
+                return '%s.%s' % (target[:-2], thing.split('.', 1)[-1])
     return thing
 
 def inferClass(fullPath, AST, origLineNo, PYSMELLDICT, vim=None):
-    klass, parents = getClassAndParents(AST, origLineNo)
+    if isinstance(AST, BufferAnalysis):
+        klass, parents = AST.classAndParents(origLineNo)
+    else:
+        klass, parents = getClassAndParents(AST, origLineNo)
 
     # replace POINTERS with their full reference
     for index, parent in enumerate(parents[:]):
@@ -145,7 +183,7 @@ def inferClass(fullPath, AST, origLineNo, PYSMELLDICT, vim=None):
     fullKlass = klass
     while pathParts:
         fullKlass = "%s.%s" % (pathParts.pop(), fullKlass)
-        if fullKlass in PYSMELLDICT['CLASSES'].keys():
+        if fullKlass in PYSMELLDICT['CLASSES']:
             break
     else:
         # we don't know about this class, look in the file system
@@ -213,11 +251,10 @@ def detectCompletionType(fullPath, origSource, lineNo, origCol, base, PYSMELLDIC
     Note that Vim deletes the "base" when a completion is requested so extra trickery must be performed to get it from the source.
 
     """
-    AST = getSafeTree(origSource, lineNo)
-    if update:
-        currentDict = analyzeFile(fullPath, AST)
-        if currentDict is not None:
-            updatePySmellDict(PYSMELLDICT, currentDict)
+    # everything below needs to know about the buffer is collected in one walk
+    analysis = analyzeBuffer(fullPath, getSafeTree(origSource, lineNo))
+    if update and analysis is not None:
+        updatePySmellDict(PYSMELLDICT, analysis.modules)
     origLineText = origSource.splitlines()[lineNo - 1] # lineNo is 1 based
     leftSide, rightSide = origLineText[:origCol], origLineText[origCol:]
     leftSideStripped = leftSide.lstrip()
@@ -247,11 +284,11 @@ def detectCompletionType(fullPath, origSource, lineNo, origCol, base, PYSMELLDIC
         else:
             return CompletionOptions(Types.FUNCTION, name=funcName, rindex=rindex)
 
-    if isAttrLookup and AST is not None:
+    if isAttrLookup and analysis is not None:
         var = leftSideStripped[:leftSideStripped.rindex('.')]
         isClassLookup = var == 'self'
         if isClassLookup:
-            klass, parents = inferClass(fullPath, AST, lineNo, PYSMELLDICT)
+            klass, parents = inferClass(fullPath, analysis, lineNo, PYSMELLDICT)
             return CompletionOptions(Types.INSTANCE, klass=klass, parents=parents)
         else:
             chain = getChain(leftSideStripped) # strip dot
@@ -259,10 +296,10 @@ def detectCompletionType(fullPath, origSource, lineNo, origCol, base, PYSMELLDIC
                 chain = chain[:-len(base)]
             if chain.endswith('.'):
                 chain = chain[:-1]
-            possibleModule = inferModule(chain, AST, lineNo)
+            possibleModule = inferModule(chain, analysis, lineNo)
             if possibleModule is not None:
                 return CompletionOptions(Types.MODULE, module=possibleModule, showMembers=True)
-        klass, parents = inferInstance(fullPath, AST, lineNo, var, PYSMELLDICT)
+        klass, parents = inferInstance(fullPath, analysis, lineNo, var, PYSMELLDICT)
         return CompletionOptions(Types.INSTANCE, klass=klass, parents=parents)
         
 
@@ -271,26 +308,44 @@ def detectCompletionType(fullPath, origSource, lineNo, origCol, base, PYSMELLDIC
 
 
 def findCompletions(base, PYSMELLDICT, options, matcher=None):
-    doesMatch = MATCHERS[matcher](base)
+    symbolMatches = MATCHERS.forSymbols(matcher)(base)
+    doesMatch = None
     compType = options.compType
+    # only look at names that start with the base, if that's all the matcher accepts
+    caseSensitive = MATCHERS.prefixCaseSensitivity(matcher)
+    prefix = None
+    if base and caseSensitive is not None:
+        prefix = base
+    index = completionIndex(PYSMELLDICT)
 
     if compType is Types.MODULE:
-        completions = _createModuleCompletions(PYSMELLDICT, options.module, options.showMembers)
+        candidates = _createModuleCompletions(PYSMELLDICT, options.module, options.showMembers, index)
     elif compType is Types.INSTANCE:
-        completions = _createInstanceCompletionList(PYSMELLDICT, options.klass, options.parents)
+        candidates = _createInstanceCompletionList(PYSMELLDICT, options.klass, options.parents, index)
     elif compType is Types.METHOD:
-        completions = _createInstanceCompletionList(PYSMELLDICT, options.klass, options.parents)
+        candidates = _createInstanceCompletionList(PYSMELLDICT, options.klass, options.parents, index)
         doesMatch = lambda word: word == options.name
     elif compType is Types.FUNCTION:
-        completions = [_getCompForFunction(func, 'f') for func in PYSMELLDICT['FUNCTIONS']]
+        if base:
+            functions = query(PYSMELLDICT).named('FUNCTIONS', options.name, True)
+        else:
+            functions = PYSMELLDICT['FUNCTIONS']
+        candidates = _memberCandidates([], functions, [])
         doesMatch = lambda word: word == options.name
     elif compType is Types.TOPLEVEL:
-        completions = _createTopLevelCompletionList(PYSMELLDICT)
+        if base:
+            # the index matches all its names in one search
+            candidates = index.topLevel(prefix, caseSensitive, MATCHERS.batch(matcher)(base))
+            symbolMatches = None
+        else:
+            candidates = index.topLevel(prefix, caseSensitive)
         
-    if base:
-        filteredCompletions = [comp for comp in completions if doesMatch(comp['word'])]
-    else:
-        filteredCompletions = completions
+    if base and doesMatch is not None:
+        candidates = [candidate for candidate in candidates if doesMatch(candidate[0])]
+    elif base and symbolMatches is not None:
+        symbol = index.symbol
+        candidates = [candidate for candidate in candidates if symbolMatches(symbol(candidate[0]))]
+    filteredCompletions = [_complete(candidate) for candidate in candidates]
 
     filteredCompletions.sort(sortCompletions)
 
@@ -302,29 +357,311 @@ def findCompletions(base, PYSMELLDICT, options, matcher=None):
     return filteredCompletions
 
 
-def _createInstanceCompletionList(PYSMELLDICT, klass, parents):
+# Completion candidates are (word, full name, kind, value) tuples, which
+# _complete turns into the completions editors get, once they matched.
+
+def _complete(candidate):
+    word, fullName, kind, value = candidate
+    if kind == 'CONSTANTS':
+        return _getCompForConstant(fullName)
+    elif kind == 'FUNCTIONS':
+        return _getCompForFunction(value, 'f')
+    elif kind == 'CLASSES':
+        return _getCompForConstructor(fullName, value)
+    elif kind == 'PROPERTY':
+        return dict(word=word, kind='m', dup='1', menu=value)
+    elif kind == 'METHOD':
+        func, menu = value
+        return _getCompForFunction(func, 'm', module=menu)
+    return dict(word=word, kind='t', dup='1')
+
+
+def _memberCandidates(constants, functions, classes):
+    candidates = [(splitName(word)[1], word, 'CONSTANTS', None) for word in constants]
+    candidates.extend((splitName(func[0])[1], func[0], 'FUNCTIONS', func) for func in functions)
+    candidates.extend((splitName(klass)[1], klass, 'CLASSES', klassDict) for (klass, klassDict) in classes)
+    return candidates
+
+
+def _classCandidates(klass, klassDict):
+    "the properties and methods of klass itself"
+    module, klassName = klass.rsplit('.', 1)
+    menu = '%s:%s' % (module, klassName)
+    candidates = [(prop, klass, 'PROPERTY', menu) for prop in klassDict['properties']]
+    candidates.extend((func[0], klass, 'METHOD', (func, menu)) for func in klassDict['methods'])
+    return candidates
+
+
+class _Symbols(object):
+    "The Symbols (see pysmell.matchers) of the names of an index, made once"
+    def knownSymbol(self, word):
+        return self.symbols.get(word)
+
+    def symbol(self, word):
+        try:
+            return self.symbols[word]
+        except KeyError:
+            symbol = self.symbols[word] = Symbol(word)
+            return symbol
+
+
+class CompletionIndex(_Symbols):
+    """
+    The completion candidates of a PYSMELLDICT, made once: the top level ones
+    sorted by their lowercase name, so that the ones starting with a prefix
+    are found with a binary search, the members of every module, and those
+    of every class once asked for, and the Symbols the matchers compare.
+    """
+    def __init__(self, PYSMELLDICT):
+        candidates = _memberCandidates(PYSMELLDICT['CONSTANTS'], PYSMELLDICT['FUNCTIONS'],
+                                       PYSMELLDICT['CLASSES'].items())
+        self.modules = {}
+        for candidate in candidates:
+            self.modules.setdefault(splitName(candidate[1])[0], []).append(candidate)
+        # stable, so that equal names stay in the order findCompletions always listed them
+        candidates.sort(key=lambda candidate: candidate[0].lower())
+        self.candidates = candidates
+        self.symbols = {}
+        for candidate in candidates:
+            self.symbol(candidate[0])
+        self.lowered = [self.symbols[candidate[0]].lowered for candidate in candidates]
+        self.names = Names([self.symbols[candidate[0]] for candidate in candidates])
+        self.classNames = set(candidate[1] for candidate in candidates if candidate[2] == 'CLASSES')
+        self.classes = {}
+
+    def topLevel(self, prefix=None, caseSensitive=False, matching=None):
+        """
+        prefix: if given, only names that start with it are needed
+        matching: if given, a batch matcher (see MatchDict.batch) of the names needed
+        """
+        start, end = 0, len(self.lowered)
+        if prefix:
+            lowered = prefix.lower()
+            start = end = bisect_left(self.lowered, lowered)
+            while end < len(self.lowered) and self.lowered[end].startswith(lowered):
+                end += 1
+        if matching is not None:
+            candidates = [self.candidates[i] for i in matching(self.names, start, end)]
+        else:
+            candidates = self.candidates[start:end]
+        if prefix and caseSensitive:
+            candidates = [candidate for candidate in candidates if candidate[0].startswith(prefix)]
+        return candidates
+
+    def moduleMembers(self, module):
+        return self.modules.get(module, [])
+
+    def hasClass(self, klass):
+        return klass in self.classNames
+
+    def classMembers(self, klass, klassDict):
+        if klass not in self.classes:
+            self.classes[klass] = _classCandidates(klass, klassDict)
+        return self.classes[klass]
+
+
+class _QueryIndex(_Symbols):
+    """
+    Answers like a CompletionIndex by querying the tags on every request,
+    but keeps the Symbols of the names it found, and if the tags are loaded
+    (they don't change) the packed Names of all their top level ones.
+    """
+    def __init__(self, PYSMELLDICT, loaded=False):
+        self.tags = PYSMELLDICT
+        self.loaded = loaded
+        self.symbols = {}
+        self.listing = None
+
+    def _candidates(self):
+        return _memberCandidates(self.tags['CONSTANTS'], self.tags['FUNCTIONS'],
+                                 self.tags['CLASSES'].items())
+
+    def _listing(self):
+        "(candidates, Names) of all the top level names"
+        if self.listing is not None:
+            return self.listing
+        candidates = self._candidates()
+        listing = (candidates, Names([self.symbol(candidate[0]) for candidate in candidates]))
+        if self.loaded:
+            self.listing = listing
+        return listing
+
+    def topLevel(self, prefix=None, caseSensitive=False, matching=None):
+        if prefix:
+            tags = query(self.tags)
+            candidates = _memberCandidates(tags.named('CONSTANTS', prefix, caseSensitive),
+                                           tags.named('FUNCTIONS', prefix, caseSensitive),
+                                           tags.named('CLASSES', prefix, caseSensitive))
+            if matching is not None:
+                # only the few the query found
+                names = Names([self.symbol(candidate[0]) for candidate in candidates])
+                candidates = [candidates[i] for i in matching(names)]
+            return candidates
+        if matching is None and not self.loaded:
+            return self._candidates()
+        candidates, names = self._listing()
+        if matching is not None:
+            return [candidates[i] for i in matching(names)]
+        return list(candidates)
+
+    def moduleMembers(self, module):
+        tags = query(self.tags)
+        return _memberCandidates(tags.inModule('CONSTANTS', module),
+                tags.inModule('FUNCTIONS', module), tags.inModule('CLASSES', module))
+
+    def hasClass(self, klass):
+        return query(self.tags).lookup('CLASSES', klass) is not None
+
+    def classMembers(self, klass, klassDict):
+        return _classCandidates(klass, klassDict)
+
+
+
+class _CombinedIndex(object):
+    """
+    Answers for a number of indexes, like TagStore does for its sources: a
+    class of a later one replaces the classes of the same name before it.
+    """
+    def __init__(self, indexes):
+        self.indexes = indexes
+
+    def _combine(self, results):
+        later = set()
+        kept = []
+        for candidates in reversed(results):
+            kept.append([candidate for candidate in candidates
+                            if candidate[2] != 'CLASSES' or candidate[1] not in later])
+            later.update(candidate[1] for candidate in candidates if candidate[2] == 'CLASSES')
+        kept.reverse()
+        return list(chain(*kept))
+
+    def topLevel(self, prefix=None, caseSensitive=False, matching=None):
+        return self._combine([index.topLevel(prefix, caseSensitive, matching) for index in self.indexes])
+
+    def moduleMembers(self, module):
+        return self._combine([index.moduleMembers(module) for index in self.indexes])
+
+    def hasClass(self, klass):
+        return [index for index in self.indexes if index.hasClass(klass)] != []
+
+    def classMembers(self, klass, klassDict):
+        for index in reversed(self.indexes):
+            if index.hasClass(klass):
+                return index.classMembers(klass, klassDict)
+        return _classCandidates(klass, klassDict)
+
+    def knownSymbol(self, word):
+        for index in self.indexes:
+            symbol = index.knownSymbol(word)
+            if symbol is not None:
+                return symbol
+        return None
+
+    def symbol(self, word):
+        return self.knownSymbol(word) or Symbol(word)
+
+
+class IndexedTags(dict):
+    """
+    The PYSMELLDICT findPYSMELLDICT returns. It remembers the tags files
+    merged into it until ``sealed``, to find their CompletionIndex, and keeps
+    what gets merged after that (like the edited buffer) in ``overlay`` too.
+    """
+    def __init__(self):
+        dict.__init__(self)
+        self.parts = []
+        self.sealed = False
+        self.overlay = emptyPYSMELLDICT()
+
+    def merging(self, partial):
+        if self.sealed:
+            updatePySmellDict(self.overlay, partial)
+        else:
+            self.parts.append(partial)
+
+    def seal(self):
+        self.sealed = True
+
+
+# (tags, their index), the most recently used first
+_indexes = []
+INDEXES = 8
+
+def _cachedIndex(parts, make):
+    "the index make returns for the tags in parts, made once while they stay loaded"
+    for i, (indexed, index) in enumerate(_indexes):
+        if len(indexed) == len(parts) and all(a is b for a, b in zip(indexed, parts)):
+            _indexes.insert(0, _indexes.pop(i))
+            return index
+    index = make()
+    _indexes.insert(0, (parts, index))
+    del _indexes[INDEXES:]
+    return index
+
+
+def _indexOf(parts):
+    "the CompletionIndex of the PYSMELLDICTs in parts"
+    def make():
+        merged = {}
+        for part in parts:
+            updatePySmellDict(merged, part)
+        if merged:
+            return CompletionIndex(merged)
+        return CompletionIndex(emptyPYSMELLDICT())
+    return _cachedIndex(parts, make)
+
+
+def _sourceIndex(source):
+    "the index of a tag source of a TagStore"
+    if isinstance(source, DictSource):
+        return _indexOf([source.tags])
+    if isinstance(source, SymbolTableSource):
+        return _cachedIndex([source], lambda: CompletionIndex(TagStore([source])))
+    # the ones that only open what a query needs (like shards) are queried
+    return _cachedIndex([source], lambda: _QueryIndex(TagStore([source]), True))
+
+
+def completionIndex(PYSMELLDICT):
+    "where findCompletions looks for the candidates of PYSMELLDICT"
+    if isinstance(PYSMELLDICT, IndexedTags) and PYSMELLDICT.sealed:
+        indexes = [_indexOf(PYSMELLDICT.parts)]
+    elif isinstance(PYSMELLDICT, TagStore):
+        indexes = [_sourceIndex(source) for source in PYSMELLDICT.sources]
+    else:
+        return _QueryIndex(PYSMELLDICT)
+    # what was merged since, like the edited buffer
+    if [value for value in PYSMELLDICT.overlay.values() if value]:
+        indexes.append(CompletionIndex(PYSMELLDICT.overlay))
+    if len(indexes) == 1:
+        return indexes[0]
+    return _CombinedIndex(indexes)
+
+
+def _createInstanceCompletionList(PYSMELLDICT, klass, parents, index=None):
+    if index is None:
+        index = _QueryIndex(PYSMELLDICT)
     completions = []
     if klass: #if we know the class
-        completions.extend(getCompletionsForClass(klass, parents, PYSMELLDICT))
+        completions.extend(_classAndParentsCandidates(klass, parents, PYSMELLDICT, index))
     else: #just put everything
         for klass, klassDict in PYSMELLDICT['CLASSES'].items():
-            addCompletionsForClass(klass, klassDict, completions)
+            completions.extend(index.classMembers(klass, klassDict))
     return completions
 
 
-def _createTopLevelCompletionList(PYSMELLDICT):
-    completions = []
-    completions.extend(_getCompForConstant(word) for word in PYSMELLDICT['CONSTANTS'])
-    completions.extend(_getCompForFunction(func, 'f') for func in PYSMELLDICT['FUNCTIONS'])
-    completions.extend(_getCompForConstructor(klass, klassDict) for (klass, klassDict) in PYSMELLDICT['CLASSES'].items())
-    return completions
+def _createTopLevelCompletionList(PYSMELLDICT, prefix=None, caseSensitive=False):
+    "prefix: if given, only names that start with it are needed"
+    candidates = completionIndex(PYSMELLDICT).topLevel(prefix, caseSensitive)
+    return [_complete(candidate) for candidate in candidates]
 
 
-def _createModuleCompletions(PYSMELLDICT, module, completeModuleMembers):
+def _createModuleCompletions(PYSMELLDICT, module, completeModuleMembers, index=None):
+    if index is None:
+        index = _QueryIndex(PYSMELLDICT)
     completions = []
     splitModules = set()
-    for reference in PYSMELLDICT['HIERARCHY']:
-        if not reference.startswith(module): continue
+    tags = query(PYSMELLDICT)
+    for reference in tags.withPrefix('HIERARCHY', module):
         if reference == module: continue
 
         # like zip, but pad with None
@@ -334,24 +671,28 @@ def _createModuleCompletions(PYSMELLDICT, module, completeModuleMembers):
                 break
 
     if completeModuleMembers:
-        members = _createTopLevelCompletionList(PYSMELLDICT)
-        completions.extend(comp for comp in members if comp["menu"] == module and not comp["word"].startswith("_"))
-        pointers = []
-        for pointer in PYSMELLDICT['POINTERS']:
-            if pointer.startswith(module) and '.' not in pointer[len(module)+1:]:
+        members = index.moduleMembers(module)
+        completions.extend(member for member in members if not member[0].startswith("_"))
+        for pointer, target in tags.withPrefix('POINTERS', module):
+            if '.' not in pointer[len(module)+1:]:
                 basename = pointer[len(module)+1:]
                 if pointer.endswith(".*"):
-                    otherModule = PYSMELLDICT['POINTERS'][pointer][:-2] # remove .*
-                    completions.extend(_createModuleCompletions(PYSMELLDICT, otherModule, True))
+                    otherModule = target[:-2] # remove .*
+                    completions.extend(_createModuleCompletions(PYSMELLDICT, otherModule, True, index))
                 else:
                     splitModules.add(basename)
                 
                 
-    completions.extend(dict(word=name, kind="t", dup="1") for name in splitModules)
+    completions.extend((name, name, 'MODULE', None) for name in splitModules)
     return completions
 
 
 def getCompletionsForClass(klass, parents, PYSMELLDICT):
+    return [_complete(candidate) for candidate in
+                _classAndParentsCandidates(klass, parents, PYSMELLDICT, completionIndex(PYSMELLDICT))]
+
+
+def _classAndParentsCandidates(klass, parents, PYSMELLDICT, index):
         klassDict = PYSMELLDICT['CLASSES'].get(klass, None)
         completions = []
         ancestorList = []
@@ -363,28 +704,24 @@ def getCompletionsForClass(klass, parents, PYSMELLDICT):
                 _findAllParents(anc, PYSMELLDICT['CLASSES'], ancestorList)
                 ancDict = PYSMELLDICT['CLASSES'].get(anc, None)
                 if ancDict is None: continue
-                addCompletionsForClass(anc, ancDict, completions)
+                completions.extend(index.classMembers(anc, ancDict))
             for anc in ancestorList:
                 ancDict = PYSMELLDICT['CLASSES'].get(anc, None)
                 if ancDict is None: continue
-                addCompletionsForClass(anc, ancDict, completions)
+                completions.extend(index.classMembers(anc, ancDict))
             return completions
             
         _findAllParents(klass, PYSMELLDICT['CLASSES'], ancestorList)
-        addCompletionsForClass(klass, klassDict, completions)
+        completions.extend(index.classMembers(klass, klassDict))
         for anc in ancestorList:
             ancDict = PYSMELLDICT['CLASSES'].get(anc, None)
             if ancDict is None: continue
-            addCompletionsForClass(anc, ancDict, completions)
+            completions.extend(index.classMembers(anc, ancDict))
         return completions
 
 
 def addCompletionsForClass(klass, klassDict, completions):
-    module, klassName = klass.rsplit('.', 1)
-    completions.extend([dict(word=prop, kind='m', dup='1', menu='%s:%s' %
-                    (module, klassName)) for prop in klassDict['properties']])
-    completions.extend([_getCompForFunction(func, 'm', module='%s:%s' % (module,
-                klassName)) for func in klassDict['methods']])
+    completions.extend(_complete(candidate) for candidate in _classCandidates(klass, klassDict))
 
 
 def _findAllParents(klass, classesDICT, ancList):
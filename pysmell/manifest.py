@@ -0,0 +1,124 @@
+# manifest.py
+# Keep track of the files a PYSMELLTAGS file was generated from
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import os
+from pprint import pprint
+
+from pysmell.tagstore import hiddenSibling
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import md5
+
+
+def manifestPath(output):
+    return hiddenSibling(output, 'manifest')
+
+
+def readManifest(path):
+    "return the manifest stored in path, or an empty one if there is none"
+    if not os.path.exists(path):
+        return {}
+    f = open(path, 'r')
+    try:
+        return eval(f.read())
+    finally:
+        f.close()
+
+
+def writeManifest(manifest, path):
+    f = open(os.path.abspath(path), 'w')
+    try:
+        pprint(manifest, f, width=100)
+    finally:
+        f.close()
+
+
+def hashFile(path):
+    f = open(path, 'rb')
+    try:
+        return md5(f.read()).hexdigest()
+    finally:
+        f.close()
+
+
+def fileEntry(path, modules):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime': st.st_mtime,
+            'hash': hashFile(path), 'modules': modules}
+
+
+def isUnchanged(path, entry):
+    """
+    Return True if the file at ``path`` is the one ``entry`` was recorded for.
+    The contents are only hashed when the mtime has changed but the size has not.
+    """
+    if entry is None:
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_size != entry['size']:
+        return False
+    if st.st_mtime == entry['mtime']:
+        return True
+    if hashFile(path) == entry['hash']:
+        entry['mtime'] = st.st_mtime
+        return True
+    return False
+
+
+def _isUnder(path, roots):
+    for root in roots:
+        if path == root or path.startswith(root + os.sep):
+            return True
+    return False
+
+
+def findOutdated(files, manifest, roots):
+    """
+    Compare the (filename, absPath) pairs in ``files`` against ``manifest``.
+
+    roots: the absolute paths that were walked to find ``files``. Manifest
+           entries under them that were not found are considered deleted and
+           are removed from the manifest.
+
+    returns: (outdated, stale), the pairs that have to be analysed again and
+             the names of the modules that have to be dropped from the tags.
+
+    When an __init__.py appears, disappears or changes, every file below it
+    is analysed again as its package may have changed.
+    """
+    found = {}
+    for filename, absPath in files:
+        found[os.path.join(absPath, filename)] = (filename, absPath)
+
+    changed = [path for path in found if not isUnchanged(path, manifest.get(path))]
+    deleted = [path for path in manifest if path not in found and _isUnder(path, roots)]
+
+    packageDirs = [os.path.dirname(path) for path in changed + deleted
+                        if os.path.basename(path) == '__init__.py']
+    if packageDirs:
+        changedSet = set(changed)
+        changed = [path for path in found
+                        if path in changedSet or _isUnder(os.path.dirname(path), packageDirs)]
+
+    stale = set()
+    for path in changed + deleted:
+        if path in manifest:
+            stale.update(manifest[path]['modules'])
+    for path in deleted:
+        del manifest[path]
+
+    changed = set(changed)
+    outdated = [pair for pair in files if os.path.join(pair[1], pair[0]) in changed]
+    return outdated, stale
@@ -9,6 +9,7 @@
 # Released subject to the BSD License 
 
 import re
+from bisect import bisect_right
 try:
     all
 except:
@@ -19,7 +20,8 @@ except:
          return True
 
 def matchCaseInsensitively(base):
-    return lambda comp: comp.lower().startswith(base.lower())
+    base = base.lower()
+    return lambda comp: comp.lower().startswith(base)
 
 def matchCaseSensitively(base):
     return lambda comp: comp.startswith(base)
@@ -38,28 +40,88 @@ def camelGroups(word):
         groups.append(part)
     return groups
 
-def matchCamelCasedPrecise(base):
+# the bits of the characters letterMask records, the only ones names have
+_BITS = dict((c, 1 << i) for (i, c) in enumerate('abcdefghijklmnopqrstuvwxyz0123456789_'))
+
+def letterMask(word):
+    "a bitmask of the letters, digits and underscores in word, whatever their case"
+    mask = 0
+    for c in set(word.lower()):
+        mask |= _BITS.get(c, 0)
+    return mask
+
+
+class Symbol(object):
+    """
+    A name to complete, with what the matchers need of it worked out once:
+    its lowercase form and letterMask, and its camelGroups the first time a
+    matcher needs them.
+    """
+    __slots__ = ['word', 'lowered', 'mask', '_groups', '_loweredGroups']
+
+    def __init__(self, word):
+        self.word = word
+        self.lowered = word.lower()
+        self.mask = letterMask(self.lowered)
+        self._groups = self._loweredGroups = None
+
+    def groups(self):
+        if self._groups is None:
+            self._groups = camelGroups(self.word)
+        return self._groups
+
+    def loweredGroups(self):
+        if self._loweredGroups is None:
+            self._loweredGroups = [group.lower() for group in self.groups()]
+        return self._loweredGroups
+
+    def __repr__(self):
+        return 'Symbol(%r)' % self.word
+
+
+def _havingLetters(base, check):
+    "check, only for the symbols that have every letter of base"
+    needed = letterMask(base)
+    def matches(symbol):
+        return needed & symbol.mask == needed and check(symbol)
+    return matches
+
+def _perWord(symbolMatcher):
+    "the matcher taking words of symbolMatcher"
+    def matcher(base):
+        matches = symbolMatcher(base)
+        return lambda comp: matches(Symbol(comp))
+    matcher.__name__ = symbolMatcher.__name__.replace('Symbols', '')
+    return matcher
+
+def matchSymbolsCaseInsensitively(base):
+    base = base.lower()
+    return lambda symbol: symbol.lowered.startswith(base)
+
+def matchSymbolsCaseSensitively(base):
+    return lambda symbol: symbol.word.startswith(base)
+
+def matchSymbolsCamelCasedPrecise(base):
     baseGr = camelGroups(base)
     baseLen = len(baseGr)
-    def check(comp):
-        compGr = camelGroups(comp)
-        return baseLen <= len(compGr) and all(matchCaseSensitively(bg)(cg) for bg, cg in zip(baseGr, compGr))
-    return check
+    def check(symbol):
+        compGr = symbol.groups()
+        return baseLen <= len(compGr) and all(cg.startswith(bg) for bg, cg in zip(baseGr, compGr))
+    return _havingLetters(base, check)
 
-def matchCamelCased(base):
-    baseGr = camelGroups(base)
+def matchSymbolsCamelCased(base):
+    baseGr = [group.lower() for group in camelGroups(base)]
     baseLen = len(baseGr)
-    def check(comp):
-        compGr = camelGroups(comp)
-        return baseLen <= len(compGr) and all(matchCaseInsensitively(bg)(cg) for bg, cg in zip(baseGr, compGr))
-    return check
+    def check(symbol):
+        compGr = symbol.loweredGroups()
+        return baseLen <= len(compGr) and all(cg.startswith(bg) for bg, cg in zip(baseGr, compGr))
+    return _havingLetters(base, check)
 
-def matchSmartass(base):
+def matchSymbolsSmartass(base):
     rev_base_letters = list(reversed(base.lower()))
-    def check(comp):
+    def check(symbol):
         stack = rev_base_letters[:]
-        for group in camelGroups(comp):
-            lowered = group.lower()
+        for lowered in symbol.loweredGroups():
             while True:
                 if lowered and stack:
                     if lowered.startswith(stack[-1]):
@@ -68,7 +130,19 @@ def matchSmartass(base):
                 else:
                     break
         return not stack
-    return check
+    return _havingLetters(base, check)
+
+def matchSymbolsFuzzyCS(base):
+    regex = re.compile('.*'.join([] + list(base) + []))
+    return _havingLetters(base, lambda symbol: bool(regex.match(symbol.word)))
+
+def matchSymbolsFuzzyCI(base):
+    regex = re.compile('.*'.join([] + list(base) + []), re.IGNORECASE)
+    return _havingLetters(base, lambda symbol: bool(regex.match(symbol.word)))
+
+matchCamelCasedPrecise = _perWord(matchSymbolsCamelCasedPrecise)
+matchCamelCased = _perWord(matchSymbolsCamelCased)
+matchSmartass = _perWord(matchSymbolsSmartass)
 
 def matchFuzzyCS(base):
     regex = re.compile('.*'.join([] + list(base) + []))
@@ -79,6 +153,80 @@ def matchFuzzyCI(base):
     return lambda comp: bool(regex.match(comp))
 
 
+class Names(object):
+    """
+    Symbols packed for the batch matchers: their words, a line each, in one
+    string that a regular expression searches at once.
+    """
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.blob = '\n'.join([symbol.word for symbol in symbols])
+        # where the line of every word starts, and where one after the last would
+        self.starts = [0]
+        for symbol in symbols:
+            self.starts.append(self.starts[-1] + len(symbol.word) + 1)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def search(self, regex, start=0, end=None):
+        """
+        The indices of the words from start to end that regex (compiled with
+        _lines) matches.
+        """
+        if end is None:
+            end = len(self.symbols)
+        if start >= end:
+            return []
+        starts = self.starts
+        return [bisect_right(starts, match.start()) - 1
+                    for match in regex.finditer(self.blob, starts[start], starts[end] - 1)]
+
+
+def _lines(pattern, flags=0):
+    "a regex matching pattern at the start of the lines of Names.blob"
+    return re.compile('^(?:%s)' % pattern, re.MULTILINE | flags)
+
+def _batch(regex, refine=None):
+    """
+    The batch matcher of Names that regex matches, and refine (a matcher of
+    Symbols) if regex only rules out some of those that don't match.
+    """
+    def matching(names, start=0, end=None):
+        indices = names.search(regex, start, end)
+        if refine is not None:
+            symbols = names.symbols
+            indices = [i for i in indices if refine(symbols[i])]
+        return indices
+    return matching
+
+def _inOrder(base):
+    "the letters of base, in the same order, whatever is between them"
+    return '.*'.join([re.escape(c) for c in base])
+
+def batchCaseSensitively(base):
+    return _batch(_lines(re.escape(base)))
+
+def batchCaseInsensitively(base):
+    return _batch(_lines(re.escape(base), re.IGNORECASE))
+
+def batchCamelCased(base):
+    return _batch(_lines(_inOrder(base), re.IGNORECASE), matchSymbolsCamelCased(base))
+
+def batchCamelCasedPrecise(base):
+    return _batch(_lines(_inOrder(base)), matchSymbolsCamelCasedPrecise(base))
+
+def batchSmartass(base):
+    # smartass finds the letters of base in order anywhere in the word
+    return _batch(_lines('.*' + _inOrder(base), re.IGNORECASE))
+
+def batchFuzzyCS(base):
+    return _batch(_lines('.*'.join([] + list(base) + [])))
+
+def batchFuzzyCI(base):
+    return _batch(_lines('.*'.join([] + list(base) + []), re.IGNORECASE))
+
+
 class MatchDict(object):
     _MATCHERS = {
         'case-sensitive': matchCaseSensitively,
@@ -90,7 +238,55 @@ class MatchDict(object):
         'fuzzy-cs': matchFuzzyCS,
     }
 
+    # the same, taking Symbols instead of words
+    _SYMBOL_MATCHERS = {
+        'case-sensitive': matchSymbolsCaseSensitively,
+        'case-insensitive': matchSymbolsCaseInsensitively,
+        'camel-case': matchSymbolsCamelCased,
+        'camel-case-sensitive': matchSymbolsCamelCasedPrecise,
+        'smartass': matchSymbolsSmartass,
+        'fuzzy-ci': matchSymbolsFuzzyCI,
+        'fuzzy-cs': matchSymbolsFuzzyCS,
+    }
+
+    # the same, taking Names and returning the indices of the matches in them
+    _BATCH_MATCHERS = {
+        'case-sensitive': batchCaseSensitively,
+        'case-insensitive': batchCaseInsensitively,
+        'camel-case': batchCamelCased,
+        'camel-case-sensitive': batchCamelCasedPrecise,
+        'smartass': batchSmartass,
+        'fuzzy-ci': batchFuzzyCI,
+        'fuzzy-cs': batchFuzzyCS,
+    }
+
+    # matchers that only accept words starting with the base
+    _PREFIX = {
+        'case-sensitive': True,
+        'case-insensitive': False,
+    }
+
     def __getitem__(self, item):
         return self._MATCHERS.get(item, matchCaseInsensitively)
 
+    def forSymbols(self, item):
+        "like self[item], for matchers taking Symbols"
+        return self._SYMBOL_MATCHERS.get(item, matchSymbolsCaseInsensitively)
+
+    def batch(self, item):
+        """
+        like self[item], for matchers taking Names and optionally the range of
+        them to search, like batch(item)(base)(names, start, end)
+        """
+        return self._BATCH_MATCHERS.get(item, batchCaseInsensitively)
+
+    def prefixCaseSensitivity(self, item):
+        """
+        Return True or False if the matcher for item only accepts words that
+        start with the base, case sensitively or not. None otherwise.
+        """
+        if item not in self._MATCHERS:
+            return False
+        return self._PREFIX.get(item, None)
+
 MATCHERS = MatchDict()
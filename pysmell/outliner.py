@@ -0,0 +1,561 @@
+# outliner.py
+# Approximate tags from the token stream, without parsing
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+OutlineFinder builds the ModuleDict of a module from its tokens alone:
+class and def headers with their arguments, bases and docstrings, imports,
+names assigned to at module and class level and self.x assignments in
+methods. It doesn't build a tree, so it is several times faster than
+CodeFinder, but it spells defaults and bases from their tokens, which is
+not always the way codefinder.getName would, and it doesn't notice some
+of the rarer ways of assigning to a name. benchmarks/bench_parsers.py
+lists the differences.
+"""
+
+import re
+import tokenize
+from tokenize import NAME, NUMBER, STRING, OP
+
+from pysmell.codefinder import BaseVisitor, CodeFinder, ModuleDict, argToStr, constName
+
+def _uncaptured(pattern):
+    "pattern, without the groups of tokenize.group"
+    return pattern.replace('(', '(?:')
+
+
+# a string literal, without its prefix
+STRING_LITERAL = r"""(?:'''[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'''
+                  |\"\"\"[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*\"\"\"
+                  |'[^\n'\\]*(?:\\.[^\n'\\]*)*'
+                  |"[^\n"\\]*(?:\\.[^\n"\\]*)*")"""
+
+# what tokenize would make of a logical line, but matched all at once
+TOKEN = re.compile(r"""
+    [ \t\f]+
+  | \#[^\n]*
+  | \\?\r?\n
+  | ([uUbB]?[rR]?%s)
+  | (%s)
+  | ([a-zA-Z_]\w*)
+  | (%s|%s|[:;.,`@])
+  | (.)
+""" % (STRING_LITERAL, _uncaptured(tokenize.Number), _uncaptured(tokenize.Operator),
+       tokenize.Bracket), re.VERBOSE | re.DOTALL)
+
+# the stretches of source that logical lines can't end in
+CHUNK = re.compile(r"""
+    [^\n'"\#()\[\]{}\\]+
+  | %s
+  | \#[^\n]*
+  | \\\r?\n
+  | (?P<newline>\n)
+  | (?P<open>[(\[{])
+  | (?P<close>[)\]}])
+  | (?P<error>.)
+""" % STRING_LITERAL, re.VERBOSE | re.DOTALL)
+
+FIRST = re.compile(r'(@|[a-zA-Z_]\w*)')
+
+# lines of methods that may assign to self.x
+SELF_ASSIGNMENT = re.compile(r'self\s*\.\s*\w+\s*(?:[,)\]]|=(?!=)|in\b|$)')
+
+OPENING = {'(': ')', '[': ']', '{': '}'}
+CLOSING = set(OPENING.values())
+
+HEADERS = set(['class', 'def', '@', 'import', 'from'])
+
+COMPOUND = set(['if', 'elif', 'else', 'while', 'for', 'try', 'except', 'finally', 'with'])
+
+# spelled with spaces around them, like getName does
+SPACED = set(['and', 'or', 'not', 'in', 'is', 'if', 'else', 'for',
+              '==', '!=', '<>', '<', '>', '<=', '>='])
+
+
+def _literal(tokens):
+    """
+    (True, value) if tokens are a number or (adjacent) strings, (False, None)
+    otherwise. A STRING token holds nothing but a literal, so eval is safe.
+    """
+    if len(tokens) == 1 and tokens[0][0] == NUMBER:
+        return True, eval(tokens[0][1])
+    if tokens and not [kind for kind, _ in tokens if kind != STRING]:
+        values = [eval(string) for _, string in tokens]
+        return True, values[0][:0].join(values)
+    return False, None
+
+
+def spell(tokens):
+    "spell the expression of tokens roughly the way codefinder.getName would"
+    parts = []
+    brackets = []
+    index = 0
+    while index < len(tokens):
+        kind, string = tokens[index]
+        index += 1
+        if kind == STRING:
+            strings = [tokens[index - 1]]
+            while index < len(tokens) and tokens[index][0] == STRING:
+                strings.append(tokens[index])
+                index += 1
+            parts.append(constName(_literal(strings)[1]))
+        elif kind == NUMBER:
+            parts.append(constName(eval(string)))
+        elif string == ',':
+            parts.append(', ')
+        elif string == ':':
+            if brackets and brackets[-1] == '{':
+                parts.append(': ')
+            else:
+                parts.append(':')
+        elif string == 'lambda' and kind == NAME:
+            # the names of the arguments only
+            end = index + _headerEnd(tokens[index:])
+            names = [[name for kind, name in arg if kind == NAME][:1]
+                     for arg in _split(tokens[index:end], ',')]
+            parts.append('lambda %s: ' % ', '.join(name[0] for name in names if name))
+            index = end + 1
+        elif string in SPACED:
+            if parts and parts[-1][-1:] not in (' ', '(', '['):
+                parts.append(' ')
+            parts.append(string + ' ')
+        elif string in OPENING:
+            brackets.append(string)
+            parts.append(string)
+        elif string in CLOSING:
+            if brackets:
+                brackets.pop()
+            # a trailing comma, which getName doesn't spell
+            if parts and parts[-1] == ', ':
+                parts.pop()
+            parts.append(string)
+        else:
+            parts.append(string)
+    return ''.join(parts).strip()
+
+
+def logicalLines(source):
+    """
+    Return the logical lines of source as (indentation, text), leaving out
+    blank lines and comments. Only what is needed to find where they end is
+    tokenized.
+    """
+    lines = []
+    start = 0
+    depth = 0
+    for match in CHUNK.finditer(source):
+        group = match.lastgroup
+        if group is None:
+            continue
+        if group == 'newline':
+            if not depth:
+                _addLine(lines, source[start:match.start()])
+                start = match.end()
+        elif group == 'open':
+            depth += 1
+        elif group == 'close':
+            depth -= 1
+        else:
+            raise SyntaxError('invalid token %r at %d' % (match.group(), match.start()))
+    _addLine(lines, source[start:])
+    return lines
+
+
+def _addLine(lines, line):
+    text = line.lstrip()
+    if text and text[0] != '#':
+        lines.append((len(line[:len(line) - len(text)].expandtabs(8)), text))
+
+
+def tokens(text):
+    "the (kind, string) tokens of a logical line, with the kinds of tokenize"
+    found = []
+    for string, number, name, op, error in TOKEN.findall(text):
+        if name:
+            found.append((NAME, name))
+        elif op:
+            found.append((OP, op))
+        elif string:
+            found.append((STRING, string))
+        elif number:
+            found.append((NUMBER, number))
+        elif error:
+            raise SyntaxError('invalid token %r' % error)
+    return found
+
+
+def _split(tokens, separator):
+    "split tokens at the separator outside of brackets and lambda arguments"
+    pieces = [[]]
+    depth = 0
+    lambdas = 0
+    for token in tokens:
+        string = token[1]
+        if string in OPENING:
+            depth += 1
+        elif string in CLOSING:
+            depth -= 1
+        elif depth == 0:
+            if string == 'lambda' and token[0] == NAME:
+                lambdas += 1
+            elif lambdas and string == ':':
+                lambdas -= 1
+            elif string == separator and not lambdas:
+                pieces.append([])
+                continue
+        pieces[-1].append(token)
+    return pieces
+
+
+def _closing(tokens, start):
+    "the index of the bracket that closes the one at start"
+    depth = 0
+    for index in range(start, len(tokens)):
+        string = tokens[index][1]
+        if string in OPENING:
+            depth += 1
+        elif string in CLOSING:
+            depth -= 1
+            if depth == 0:
+                return index
+    return len(tokens)
+
+
+def _headerEnd(tokens):
+    "the index of the colon that ends the header of a compound statement"
+    depth = 0
+    lambdas = 0
+    for index, (kind, string) in enumerate(tokens):
+        if string in OPENING:
+            depth += 1
+        elif string in CLOSING:
+            depth -= 1
+        elif depth == 0:
+            if string == 'lambda' and kind == NAME:
+                lambdas += 1
+            elif string == ':':
+                if not lambdas:
+                    return index
+                lambdas -= 1
+    return len(tokens)
+
+
+def _strip(tokens):
+    "tokens without the brackets around all of them"
+    while (len(tokens) > 1 and tokens[0][1] in ('(', '[')
+            and _closing(tokens, 0) == len(tokens) - 1):
+        tokens = tokens[1:-1]
+    return tokens
+
+
+class _Scope(object):
+    def __init__(self, kind, name, indentation):
+        self.kind = kind
+        self.name = name
+        # of the header
+        self.indentation = indentation
+
+
+class OutlineFinder(object):
+    """
+    codefinder.CodeFinder for the tokens of a module. Feed it the
+    logicalLines of the module with scan; only the lines that can add to
+    the tags are tokenized.
+    """
+    def __init__(self):
+        self.imports = {}
+        self.scope = []
+        self.modules = ModuleDict()
+        self.module = '__module__'
+        self.__package = '__package__'
+        self.path = '__path__'
+        self.decorators = []
+        # what to do with the docstring of the last header
+        self.pending = None
+
+    def __setPackage(self, package):
+        if package:
+            self.__package = package + '.'
+        else:
+            self.__package = ''
+
+    package = property(lambda s: s.__package, __setPackage)
+
+    qualify = BaseVisitor.qualify.im_func
+    isRelativeImport = CodeFinder.isRelativeImport.im_func
+
+    @property
+    def inClassFunction(self):
+        return (len(self.scope) == 2 and self.scope[-1].kind == 'def'
+                and self.scope[-2].kind == 'class')
+
+    def scan(self, lines):
+        if self.module == '__init__':
+            self.modules.enterModule('%s' % self.package[:-1]) # remove dot
+        else:
+            self.modules.enterModule('%s%s' % (self.package, self.module))
+        for indentation, text in lines:
+            # the line is not in the bodies it is not indented under
+            while self.scope and self.scope[-1].indentation >= indentation:
+                self.scope.pop()
+            if self.pending is None and not self.matters(text):
+                continue
+            line = tokens(text)
+            if self.pending is not None:
+                self.docstring(line)
+            self.logicalLine(line, indentation)
+        self.docstring(None)
+        self.modules.exitModule()
+
+    def docstring(self, tokens):
+        "the first line of a body was tokens, give the header its docstring"
+        if self.pending is None:
+            return
+        register, self.pending = self.pending, None
+        isLiteral, doc = tokens and _literal(tokens) or (False, None)
+        if not isLiteral or not isinstance(doc, basestring):
+            doc = ''
+        register(doc)
+
+    def matters(self, text):
+        "whether the logical line can add to the tags, in the current scope"
+        first = FIRST.match(text)
+        if first is not None and first.group() in HEADERS:
+            return True
+        scope = self.scope
+        if not scope or (len(scope) == 1 and scope[0].kind == 'class'):
+            return True
+        if 'import' in text:
+            return True
+        return self.inClassFunction and SELF_ASSIGNMENT.search(text) is not None
+
+    def logicalLine(self, tokens, indentation):
+        first = tokens[0][1]
+        if first == '@':
+            self.decorators.append(''.join(string for _, string in tokens[1:]))
+        elif first == 'class' or first == 'def':
+            self.header(tokens, indentation)
+        else:
+            self.statements(tokens)
+
+    def header(self, tokens, indentation):
+        decorators, self.decorators = self.decorators, []
+        if len(tokens) < 3:
+            return
+        kind, name = tokens[0][1], tokens[1][1]
+        if tokens[2][1] == '(':
+            close = _closing(tokens, 2)
+            inside = tokens[3:close]
+            body = tokens[close + 2:]
+        else:
+            inside = []
+            body = tokens[3:]
+        scope = _Scope(kind, name, indentation)
+        self.scope.append(scope)
+        register = None
+        if kind == 'class':
+            if len(self.scope) == 1:
+                bases = [self.qualify(spell(base), self.modules.currentModule)
+                         for base in _split(inside, ',') if base]
+                register = lambda doc: self.modules.enterClass(name, bases, doc)
+        elif self.inClassFunction:
+            klass = self.scope[-2].name
+            if name != '__init__':
+                if 'property' in decorators:
+                    self.modules.addProperty(klass, name)
+                else:
+                    args = self.arguments(inside)[1:]
+                    register = lambda doc: self.modules.addMethod(klass, name, args, doc)
+            else:
+                self.modules.setConstructor(klass, self.arguments(inside)[1:])
+        elif len(self.scope) == 1:
+            args = self.arguments(inside)
+            register = lambda doc: self.modules.addFunction(name, args, doc)
+        self.pending = register
+        if body:
+            # all on one line
+            self.docstring(body)
+            self.statements(body)
+            self.scope.remove(scope)
+
+    def arguments(self, tokens):
+        "the arguments of a def, spelled like codefinder.getFuncArgs"
+        args = []
+        for param in _split(tokens, ','):
+            if not param:
+                continue
+            if param[0][1] in ('*', '**'):
+                args.append(param[0][1] + param[1][1])
+                continue
+            pieces = _split(param, '=')
+            arg = self.argument(pieces[0])
+            if len(pieces) > 1:
+                isLiteral, value = _literal(pieces[1])
+                if isLiteral:
+                    arg = '%s=%r' % (arg, value)
+                else:
+                    arg = '%s=%s' % (arg, spell(pieces[1]))
+            args.append(arg)
+        return args
+
+    def argument(self, tokens):
+        def names(tokens):
+            if len(tokens) == 1:
+                return tokens[0][1]
+            # a tuple
+            return tuple(names(element) for element in _split(_strip(tokens), ',') if element)
+        return argToStr(names(tokens))
+
+    def statements(self, tokens):
+        for statement in _split(tokens, ';'):
+            if statement:
+                self.statement(statement)
+
+    def statement(self, tokens):
+        first = tokens[0][1]
+        if first == 'import':
+            self.importNames(tokens[1:])
+        elif first == 'from':
+            self.importFrom(tokens[1:])
+        elif first in COMPOUND and tokens[0][0] == NAME:
+            end = _headerEnd(tokens)
+            header = tokens[1:end]
+            if first == 'for':
+                self.forTargets(tokens)
+            elif first == 'with':
+                for item in _split(header, ','):
+                    names = [string for _, string in item]
+                    if 'as' in names:
+                        self.comprehensions(item[:names.index('as')])
+                        self.assign(item[names.index('as') + 1:])
+                    else:
+                        self.comprehensions(item)
+                header = []
+            elif first == 'except':
+                names = [string for _, string in header]
+                if 'as' in names:
+                    target = header[names.index('as') + 1:]
+                else:
+                    target = _split(header, ',')[1:]
+                    target = target and target[0] or []
+                self.comprehensions(header)
+                self.assign(target)
+                header = []
+            self.comprehensions(header)
+            body = tokens[end + 1:]
+            if body:
+                self.statements(body)
+        elif first == 'del':
+            self.assign(tokens[1:])
+        else:
+            for target in _split(tokens, '=')[:-1]:
+                self.assign(target)
+            self.comprehensions(tokens)
+
+    def forTargets(self, tokens):
+        "the targets of the for statement or comprehension that tokens start with"
+        depth = 0
+        for index, (kind, string) in enumerate(tokens):
+            if string in OPENING:
+                depth += 1
+            elif string in CLOSING:
+                depth -= 1
+            elif depth == 0 and string == 'in' and kind == NAME:
+                self.assign(tokens[1:index])
+                return
+
+    def comprehensions(self, tokens):
+        "assign to the variables of the comprehensions in tokens"
+        for index in range(len(tokens)):
+            if tokens[index][1] == 'for' and tokens[index][0] == NAME:
+                self.forTargets(tokens[index:])
+
+    def assign(self, tokens):
+        tokens = _strip(tokens)
+        if not tokens:
+            return
+        elements = _split(tokens, ',')
+        if len(elements) > 1:
+            for element in elements:
+                self.assign(element)
+        elif len(tokens) == 1 and tokens[0][0] == NAME:
+            self.assignName(tokens[0][1])
+        elif len(tokens) == 3 and tokens[0][1] == 'self' and tokens[1][1] == '.':
+            if self.inClassFunction:
+                self.modules.addProperty(self.scope[-2].name, tokens[2][1])
+
+    def assignName(self, name):
+        if not self.scope:
+            self.modules.addProperty(None, name)
+        elif len(self.scope) == 1 and self.scope[0].kind == 'class':
+            self.modules.addProperty(self.scope[0].name, name)
+
+    def dotted(self, tokens):
+        "the dotted name tokens start with, and the tokens after it"
+        parts = []
+        index = 0
+        while index < len(tokens) and (tokens[index][0] == NAME or tokens[index][1] == '.'):
+            if tokens[index][1] in ('import', 'as'):
+                break
+            parts.append(tokens[index][1])
+            index += 1
+        return ''.join(parts), tokens[index:]
+
+    def aliases(self, tokens):
+        "(name, asName) for the imported names in tokens"
+        for alias in _split(_strip(tokens), ','):
+            if not alias:
+                continue
+            name, rest = self.dotted(alias)
+            if alias[0][1] == '*':
+                name, rest = '*', alias[1:]
+            asName = name
+            if len(rest) == 2 and rest[0][1] == 'as':
+                asName = rest[1][1]
+            yield name, asName
+
+    def importNames(self, tokens):
+        for name, asName in self.aliases(tokens):
+            self.imports[asName] = name
+            imported = name
+            if self.isRelativeImport(imported):
+                imported = "%s%s" % (self.package, imported)
+            self.modules.addPointer("%s.%s" % (self.modules.currentModule, asName), imported)
+
+    def importFrom(self, tokens):
+        # relative imports name the module without their leading dots
+        while tokens and tokens[0][1] in ('.', '..', '...'):
+            tokens = tokens[1:]
+        modname, rest = self.dotted(tokens)
+        aliases = list(self.aliases(rest[1:]))
+        for name, asName in aliases:
+            self.imports[asName] = "%s.%s" % (modname, name)
+        for name, asName in aliases:
+            if self.isRelativeImport(modname):
+                imported = "%s%s.%s" % (self.package, modname, name)
+            else:
+                imported = "%s.%s" % (modname, name)
+            self.modules.addPointer("%s.%s" % (self.modules.currentModule, asName), imported)
+
+
+class OutlineParser(object):
+    """
+    The parser backend of --fast. Its tree is the list of the logical lines
+    of the source, which OutlineFinder makes approximate tags from.
+    """
+    name = 'outline'
+
+    def parse(self, source, path='<unknown>'):
+        return logicalLines(source)
+
+    def codeFinder(self):
+        return OutlineFinder()
+
+    def walk(self, lines, codeFinder):
+        codeFinder.scan(lines)
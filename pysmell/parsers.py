@@ -0,0 +1,29 @@
+# parsers.py
+# The parser backends tags can be generated with
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+from pysmell.codefinder import CompilerParser
+from pysmell.outliner import OutlineParser
+
+try:
+    from pysmell.astfinder import AstParser
+except ImportError:
+    # python 2.5 has no ast module
+    AstParser = None
+
+DEFAULT = 'compiler'
+
+PARSERS = {'compiler': CompilerParser(), 'outline': OutlineParser()}
+if AstParser is not None:
+    PARSERS['ast'] = AstParser()
+
+
+def getParser(name=None):
+    "the parser backend called name, the default one for None"
+    return PARSERS[name or DEFAULT]
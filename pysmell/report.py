@@ -0,0 +1,73 @@
+# report.py
+# Per-file timing and throughput reports of tag generation
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        json = None
+
+SLOWEST = 10
+
+PHASES = ('parse', 'visit', 'merge')
+
+
+def _perSecond(count, seconds):
+    if not seconds:
+        return 0.0
+    return count / seconds
+
+
+def timingReport(stats, slowest=SLOWEST):
+    """
+    Summarise the stats ``process`` filled in: the seconds spent in every
+    phase, the files and lines analysed per second of wall clock time, and
+    the ``slowest`` files, slowest first.
+
+    Cached files count as files but not as lines, as they were not read.
+    """
+    perFile = stats.get('perFile', [])
+    totals = dict((phase, sum(entry[phase] for entry in perFile)) for phase in PHASES)
+    lines = sum(entry['lines'] for entry in perFile)
+    byTime = sorted(perFile, key=lambda entry: -entry['total'])
+    return {
+        'files': stats['files'],
+        'lines': lines,
+        'elapsed': stats['elapsed'],
+        'phases': totals,
+        'filesPerSecond': _perSecond(stats['files'], stats['elapsed']),
+        'linesPerSecond': _perSecond(lines, stats['elapsed']),
+        'slowest': byTime[:slowest],
+    }
+
+
+def formatText(report):
+    lines = [
+        '%d files, %d lines in %f seconds: %.1f files/s, %.1f lines/s' % (
+            report['files'], report['lines'], report['elapsed'],
+            report['filesPerSecond'], report['linesPerSecond']),
+        'parse %f, visit %f, merge %f seconds' % tuple(report['phases'][phase] for phase in PHASES),
+    ]
+    if report['slowest']:
+        lines.append('slowest files:')
+        lines.append('%10s %10s %10s %10s %8s  %s' % ('total', 'parse', 'visit', 'merge', 'lines', 'file'))
+        for entry in report['slowest']:
+            lines.append('%10.6f %10.6f %10.6f %10.6f %8s  %s' % (
+                entry['total'], entry['parse'], entry['visit'], entry['merge'],
+                entry['cached'] and 'cached' or entry['lines'], entry['path']))
+    return '\n'.join(lines)
+
+
+def formatJSON(report):
+    if json is None:
+        raise ImportError('JSON reports need the json (or simplejson) module')
+    return json.dumps(report, indent=2, sort_keys=True)
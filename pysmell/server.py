@@ -0,0 +1,257 @@
+# server.py
+# A daemon answering completion requests over a unix domain socket
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+``pysmell serve`` listens on a unix domain socket (~/.pysmell/server.sock,
+or $PYSMELL_SOCKET) and keeps the tags it loaded (see
+pysmell.tagsformat.TagsCache) between the requests of all the editors
+connected to it. Editors talk to it with pysmell.client.
+
+Every request and every response is a JSON object on a line of its own:
+
+    {"id": 1, "method": "complete", "params": {"fullPath": "/src/a.py",
+        "source": "import os\\nos.pa", "lineNo": 2, "col": 5, "base": "pa",
+        "matcher": "case-insensitive"}}
+    {"id": 1, "result": {"options": {"compType": "MODULE", "extra": {...}},
+        "completions": [{"word": "path", ...}]}}
+    {"id": 1, "error": "KeyError: 'lineNo'"}
+
+Buffers and tags are bytes in whatever encoding the files use, so strings
+carry one character per byte (as if they were latin-1), see toJSON.
+
+The methods are those of Session. The connections are served one request
+at a time, in a single thread, with asyncore.
+"""
+
+import os
+import sys
+import errno
+import signal
+import socket
+import asyncore
+import asynchat
+from textwrap import dedent
+
+try:
+    import json
+except ImportError:
+    try:
+        import simplejson as json
+    except ImportError:
+        json = None
+
+from pysmell import idehelper
+from pysmell.idehelper import CompletionOptions, Types
+from pysmell.tagsformat import tagsCache
+from pysmell.fscache import fscache
+from pysmell import argparse
+
+DEFAULT_SOCKET = os.path.join('~', '.pysmell', 'server.sock')
+
+
+def socketPath():
+    "where the server listens, None if $PYSMELL_SOCKET is set to ''"
+    path = os.environ.get('PYSMELL_SOCKET', DEFAULT_SOCKET)
+    if not path:
+        return None
+    return os.path.abspath(os.path.expanduser(path))
+
+
+def supported():
+    return json is not None and hasattr(socket, 'AF_UNIX')
+
+
+def toJSON(data):
+    "data with unicode strings of a character per byte instead of byte strings"
+    if isinstance(data, str):
+        return data.decode('latin-1')
+    if isinstance(data, (list, tuple)):
+        return [toJSON(item) for item in data]
+    if isinstance(data, dict):
+        return dict((toJSON(key), toJSON(value)) for key, value in data.iteritems())
+    return data
+
+
+def fromJSON(data):
+    "data decoded from JSON, with the byte strings toJSON made unicode"
+    if isinstance(data, unicode):
+        return data.encode('latin-1')
+    if isinstance(data, list):
+        return [fromJSON(item) for item in data]
+    if isinstance(data, dict):
+        return dict((fromJSON(key), fromJSON(value)) for key, value in data.iteritems())
+    return data
+
+
+def encodeOptions(options):
+    return {'compType': options.compType, 'extra': options.extra}
+
+
+def decodeOptions(data):
+    # findCompletions compares the completion types by identity
+    return CompletionOptions(getattr(Types, data['compType']), **data['extra'])
+
+
+class Session(object):
+    """
+    What one editor connection can ask. detectCompletionType merges the
+    edited buffer into the tags it finds, and findCompletions reuses them
+    for the same file.
+    """
+    def __init__(self):
+        self.fullPath = None
+        self.tags = None
+
+    def _tags(self, fullPath):
+        if fullPath != self.fullPath or not self.tags:
+            self.fullPath = fullPath
+            self.tags = idehelper.findPYSMELLDICT(fullPath)
+        return self.tags
+
+    def detectCompletionType(self, fullPath, source, lineNo, col, base):
+        "the options of the completion, None if there is no PYSMELLTAGS"
+        self.fullPath = None
+        tags = self._tags(fullPath)
+        if not tags:
+            return None
+        return encodeOptions(idehelper.detectCompletionType(fullPath, source, lineNo, col, base, tags))
+
+    def findCompletions(self, fullPath, base, options, matcher=None):
+        tags = self._tags(fullPath)
+        if not tags:
+            return None
+        return idehelper.findCompletions(base, tags, decodeOptions(options), matcher)
+
+    def complete(self, fullPath, source, lineNo, col, base, matcher=None):
+        "detectCompletionType and findCompletions in one go"
+        options = self.detectCompletionType(fullPath, source, lineNo, col, base)
+        if options is None:
+            return None
+        return {'options': options,
+                'completions': self.findCompletions(fullPath, base, options, matcher)}
+
+    def stats(self):
+        hits, misses = tagsCache.counts()
+        probes, listings = fscache.counts()
+        return {'tagsHits': hits, 'tagsMisses': misses, 'fsProbes': probes, 'fsListings': listings}
+
+
+METHODS = ['detectCompletionType', 'findCompletions', 'complete', 'stats']
+
+
+def answer(session, line):
+    "the response of session to the request on line, both JSON"
+    id = None
+    try:
+        request = fromJSON(json.loads(line))
+        id = request.get('id')
+        method = request['method']
+        if method not in METHODS:
+            raise ValueError('unknown method %r' % method)
+        response = {'id': id, 'result': getattr(session, method)(**request.get('params', {}))}
+    except Exception, e:
+        response = {'id': id, 'error': '%s: %s' % (e.__class__.__name__, e)}
+    return json.dumps(toJSON(response))
+
+
+class Connection(asynchat.async_chat):
+    def __init__(self, sock, map):
+        asynchat.async_chat.__init__(self, sock, map)
+        self.set_terminator('\n')
+        self.buffer = []
+        self.session = Session()
+
+    def collect_incoming_data(self, data):
+        self.buffer.append(data)
+
+    def found_terminator(self):
+        line = ''.join(self.buffer)
+        self.buffer = []
+        if line.strip():
+            self.push(answer(self.session, line) + '\n')
+
+    def handle_error(self):
+        # drop the connection, not the server
+        self.close()
+
+
+class Server(asyncore.dispatcher):
+    """
+    Accepts editor connections on the unix domain socket at path. A socket
+    file left behind by a server that is gone is replaced.
+    """
+    def __init__(self, path):
+        self.map = {}
+        asyncore.dispatcher.__init__(self, map=self.map)
+        self.path = path
+        self.stopped = False
+        if os.path.exists(path):
+            if _answers(path):
+                raise socket.error(errno.EADDRINUSE, 'a server is listening on %s' % path)
+            os.remove(path)
+        elif not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        self.create_socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.bind(path)
+        os.chmod(path, 0600)
+        self.listen(5)
+
+    def handle_accept(self):
+        accepted = self.accept()
+        if accepted is not None:
+            Connection(accepted[0], self.map)
+
+    def serve(self, timeout=1.0):
+        "until stop is called"
+        try:
+            while not self.stopped:
+                asyncore.loop(timeout, map=self.map, count=1)
+        finally:
+            for dispatcher in self.map.values():
+                dispatcher.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def stop(self):
+        self.stopped = True
+
+
+def _answers(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(path)
+        except socket.error:
+            return False
+        return True
+    finally:
+        sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='pysmell serve',
+        description=dedent("""\
+            Answer the completion requests of editors over a unix domain
+            socket, keeping the tags loaded between them."""))
+    parser.add_argument('--socket', default=socketPath() or DEFAULT_SOCKET,
+        help="Path of the socket to listen on")
+    args = parser.parse_args(argv)
+    if not supported():
+        parser.error('needs the json module and unix domain sockets')
+    try:
+        server = Server(os.path.abspath(os.path.expanduser(args.socket)))
+    except socket.error, e:
+        print >> sys.stderr, 'Could not listen on %s: %s' % (args.socket, e)
+        sys.exit(5)
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,210 @@
+# shards.py
+# PYSMELLTAGS split into one tags file per top level package
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+With --shards, PYSMELLTAGS is a small manifest mapping every top level
+package (or module) to the tags file, its shard, that holds the entries of
+the modules below it:
+
+    # PYSMELLSHARDS
+    {'format': 'text', 'shards': {'PackageA': 'PackageA.tags', ...}, 'version': 1}
+
+The shards are written to .PYSMELLTAGS.shards next to the manifest, in the
+text or binary format, each with its own symbol table. ShardedSource opens
+only the shards a query needs, and keeps them open.
+
+A package may also map to a list of files, and several packages to the same
+file, as in the manifests of library bundles (see pysmell.bundles).
+"""
+
+import os
+from pprint import pformat
+
+from pysmell.tagstore import (KEYS, MAPPINGS, TagStore, DictSource, emptyPYSMELLDICT, fullName,
+                              hiddenSibling)
+
+MAGIC = '# PYSMELLSHARDS\n'
+VERSION = 1
+
+
+def shardDirectory(tagsPath):
+    return hiddenSibling(tagsPath, 'shards')
+
+
+def shardOf(name):
+    "the shard the entry with the dotted name belongs to"
+    return name.split('.', 1)[0]
+
+
+def splitShards(modules):
+    "return a PYSMELLDICT for every shard of modules"
+    shards = {}
+    for key in KEYS:
+        if key in MAPPINGS:
+            entries = modules[key].iteritems()
+        else:
+            entries = modules[key]
+        for entry in entries:
+            shard = shardOf(fullName(key, entry))
+            if shard not in shards:
+                shards[shard] = emptyPYSMELLDICT()
+            if key in MAPPINGS:
+                shards[shard][key][entry[0]] = entry[1]
+            else:
+                shards[shard][key].append(entry)
+    return shards
+
+
+def shardFilename(shard):
+    return '%s.tags' % shard
+
+
+def dumpManifest(shards, format, f, filenames=None):
+    """
+    shards: the names of the shards
+    filenames: the files of every shard, by default its shardFilename
+    """
+    if filenames is None:
+        filenames = dict((shard, [shardFilename(shard)]) for shard in shards)
+    files = {}
+    for shard in shards:
+        if len(filenames[shard]) == 1:
+            files[shard] = filenames[shard][0]
+        else:
+            files[shard] = list(filenames[shard])
+    f.write(MAGIC)
+    f.write(pformat({'version': VERSION, 'format': format, 'shards': files}))
+    f.write('\n')
+
+
+def isShardManifest(header):
+    return header.startswith(MAGIC)
+
+
+def readManifest(path):
+    f = open(path, 'r')
+    try:
+        data = f.read()
+    finally:
+        f.close()
+    return eval(data[len(MAGIC):].replace('\r\n', '\n'))
+
+
+class ShardedSource(object):
+    """
+    A tag source (see pysmell.tagstore) over the shards listed in the
+    manifest at path. ``openShard`` opens a shard file, returning a tag source
+    or a PYSMELLDICT (like pysmell.tagsformat.openTags).
+
+    Lookups and queries about a module only open the shard of its top level
+    package; queries by name alone (eg. top level completions) open all of
+    them, which is cheap as long as their symbol tables are fresh. A file
+    shared by several shards is opened, and queried, once.
+    """
+    def __init__(self, path, openShard):
+        self.path = path
+        self.openShard = openShard
+        self.directory = shardDirectory(path)
+        self.shards = {}
+        for shard, filenames in readManifest(path)['shards'].iteritems():
+            if isinstance(filenames, basestring):
+                filenames = [filenames]
+            self.shards[shard] = filenames
+        self.opened = {}
+
+    def _open(self, filename):
+        if filename not in self.opened:
+            source = self.openShard(os.path.join(self.directory, filename))
+            if isinstance(source, dict):
+                source = DictSource(source)
+            self.opened[filename] = source
+        return self.opened[filename]
+
+    def _sources(self, shards):
+        "the tag sources of the files of shards, skipping unknown shards"
+        sources = []
+        seen = set()
+        for shard in shards:
+            for filename in self.shards.get(shard, []):
+                if filename not in seen:
+                    seen.add(filename)
+                    sources.append(self._open(filename))
+        return sources
+
+    def _all(self):
+        return self._sources(sorted(self.shards))
+
+    def _for(self, name):
+        "the sources that can hold the entries below the dotted name"
+        return self._sources([shardOf(name)])
+
+    def _combine(self, sources, ask):
+        results = []
+        for source in sources:
+            results.extend(ask(source))
+        return results
+
+    def entries(self, key):
+        return iter(self._combine(self._all(), lambda source: source.entries(key)))
+
+    def lookup(self, key, name):
+        for source in self._for(name):
+            found = source.lookup(key, name)
+            if found is not None:
+                return found
+        return None
+
+    def named(self, key, prefix, caseSensitive):
+        return self._combine(self._all(), lambda source: source.named(key, prefix, caseSensitive))
+
+    def inModule(self, key, module):
+        if module:
+            sources = self._for(module)
+        else:
+            sources = self._all()
+        return self._combine(sources, lambda source: source.inModule(key, module))
+
+    def withPrefix(self, key, prefix):
+        if '.' in prefix:
+            sources = self._for(prefix)
+        else:
+            sources = self._sources([shard for shard in sorted(self.shards) if shard.startswith(prefix)])
+        return self._combine(sources, lambda source: source.withPrefix(key, prefix))
+
+    def starPointers(self):
+        return self._combine(self._all(), lambda source: source.starPointers())
+
+    def toDict(self):
+        "load every shard into a PYSMELLDICT"
+        return TagStore([self]).toDict()
+
+    def close(self):
+        for source in self.opened.values():
+            if hasattr(source, 'close'):
+                source.close()
+        self.opened = {}
+
+
+_cache = {}
+
+def openShards(path, openShard):
+    """
+    Return the ShardedSource of the manifest at path, the same one for as
+    long as the manifest is not replaced, so that the shards it opened stay
+    open between completions.
+    """
+    st = os.stat(path)
+    key = (st.st_ino, st.st_mtime, st.st_size)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    source = ShardedSource(path, openShard)
+    _cache[path] = (key, source)
+    return source
@@ -0,0 +1,250 @@
+# sqlitetags.py
+# PYSMELLTAGS stored in an indexed SQLite database
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import os
+
+try:
+    import sqlite3
+except ImportError:
+    try:
+        from pysqlite2 import dbapi2 as sqlite3
+    except ImportError:
+        sqlite3 = None
+
+from pysmell.tagstore import splitName, emptyPYSMELLDICT
+
+SQLITE_MAGIC = 'SQLite format 3\0'
+SCHEMA_VERSION = '1'
+
+# separates the elements of argument and base lists
+SEP = '\x1f'
+
+SCHEMA = """
+CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE constants (id INTEGER PRIMARY KEY, fullname TEXT, module TEXT, name TEXT, lname TEXT);
+CREATE TABLE functions (id INTEGER PRIMARY KEY, fullname TEXT, module TEXT, name TEXT, lname TEXT,
+                        args TEXT, docstring TEXT);
+CREATE TABLE classes (id INTEGER PRIMARY KEY, fullname TEXT, module TEXT, name TEXT, lname TEXT,
+                      docstring TEXT, bases TEXT, constructor TEXT);
+CREATE TABLE methods (id INTEGER PRIMARY KEY, class INTEGER, name TEXT, args TEXT, docstring TEXT);
+CREATE TABLE properties (id INTEGER PRIMARY KEY, class INTEGER, name TEXT);
+CREATE TABLE pointers (name TEXT PRIMARY KEY, target TEXT, star INTEGER);
+CREATE TABLE hierarchy (id INTEGER PRIMARY KEY, module TEXT);
+"""
+
+INDEXES = """
+CREATE INDEX constants_name ON constants (name);
+CREATE INDEX constants_lname ON constants (lname);
+CREATE INDEX constants_module ON constants (module);
+CREATE INDEX functions_name ON functions (name);
+CREATE INDEX functions_lname ON functions (lname);
+CREATE INDEX functions_module ON functions (module);
+CREATE UNIQUE INDEX classes_fullname ON classes (fullname);
+CREATE INDEX classes_name ON classes (name);
+CREATE INDEX classes_lname ON classes (lname);
+CREATE INDEX classes_module ON classes (module);
+CREATE INDEX methods_class ON methods (class);
+CREATE INDEX properties_class ON properties (class);
+CREATE INDEX pointers_star ON pointers (star);
+CREATE INDEX hierarchy_module ON hierarchy (module);
+"""
+
+TABLES = {
+    'CONSTANTS': 'constants',
+    'FUNCTIONS': 'functions',
+    'CLASSES': 'classes',
+    'POINTERS': 'pointers',
+    'HIERARCHY': 'hierarchy',
+}
+
+# the column the full name of an entry is kept in
+FULLNAME = {
+    'CONSTANTS': 'fullname',
+    'FUNCTIONS': 'fullname',
+    'CLASSES': 'fullname',
+    'POINTERS': 'name',
+    'HIERARCHY': 'module',
+}
+
+COLUMNS = {
+    'CONSTANTS': 'fullname',
+    'FUNCTIONS': 'fullname, args, docstring',
+    'CLASSES': 'id, fullname, docstring, bases, constructor',
+    'POINTERS': 'name, target',
+    'HIERARCHY': 'module',
+}
+
+
+def isSQLite(data):
+    return data.startswith(SQLITE_MAGIC)
+
+
+def _join(values):
+    return SEP.join(values)
+
+
+def _split(value):
+    if not value:
+        return []
+    return value.split(SEP)
+
+
+def _upperBound(prefix):
+    "the smallest string greater than every string starting with prefix"
+    while prefix and prefix[-1] == '\xff':
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _connect(path):
+    connection = sqlite3.connect(path)
+    connection.text_factory = str
+    return connection
+
+
+def writeSQLite(modules, path):
+    if os.path.exists(path):
+        os.remove(path)
+    connection = _connect(path)
+    try:
+        connection.executescript(SCHEMA)
+        connection.executemany('INSERT INTO info VALUES (?, ?)',
+            [('format', 'PYSMELLTAGS'), ('version', SCHEMA_VERSION)])
+        def names(fullname):
+            module, name = splitName(fullname)
+            return (fullname, module, name, name.lower())
+        connection.executemany('INSERT INTO constants (fullname, module, name, lname) VALUES (?, ?, ?, ?)',
+            [names(const) for const in modules['CONSTANTS']])
+        connection.executemany('INSERT INTO functions (fullname, module, name, lname, args, docstring) '
+                               'VALUES (?, ?, ?, ?, ?, ?)',
+            [names(func) + (_join(args), docstring or '') for func, args, docstring in modules['FUNCTIONS']])
+        for klass, klassDict in modules['CLASSES'].iteritems():
+            cursor = connection.execute('INSERT INTO classes (fullname, module, name, lname, docstring, bases, constructor) '
+                                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                names(klass) + (klassDict.get('docstring', '') or '', _join(klassDict['bases']),
+                                _join(klassDict['constructor'])))
+            klassId = cursor.lastrowid
+            connection.executemany('INSERT INTO methods (class, name, args, docstring) VALUES (?, ?, ?, ?)',
+                [(klassId, method, _join(args), docstring or '') for method, args, docstring in klassDict['methods']])
+            connection.executemany('INSERT INTO properties (class, name) VALUES (?, ?)',
+                [(klassId, prop) for prop in klassDict['properties']])
+        connection.executemany('INSERT INTO pointers VALUES (?, ?, ?)',
+            [(name, pointer, name.endswith('*')) for name, pointer in modules['POINTERS'].iteritems()])
+        connection.executemany('INSERT INTO hierarchy (module) VALUES (?)',
+            [(module,) for module in modules['HIERARCHY']])
+        connection.executescript(INDEXES)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+class LazyClassDict(dict):
+    "A class of a SQLiteSource, which only loads its methods and properties when asked"
+    def __init__(self, source, klassId, **kwargs):
+        dict.__init__(self, **kwargs)
+        self.source = source
+        self.klassId = klassId
+
+    def __missing__(self, key):
+        if key == 'methods':
+            self['methods'] = self.source._methods(self.klassId)
+        elif key == 'properties':
+            self['properties'] = self.source._properties(self.klassId)
+        else:
+            raise KeyError(key)
+        return self[key]
+
+
+class SQLiteSource(object):
+    "A tag source (see pysmell.tagstore) reading a database written by writeSQLite"
+    def __init__(self, path):
+        self.path = path
+        self.connection = _connect(path)
+
+    def _methods(self, klassId):
+        return [(name, _split(args), docstring) for name, args, docstring in
+            self.connection.execute('SELECT name, args, docstring FROM methods WHERE class = ? ORDER BY id', (klassId,))]
+
+    def _properties(self, klassId):
+        return [name for (name,) in
+            self.connection.execute('SELECT name FROM properties WHERE class = ? ORDER BY id', (klassId,))]
+
+    def _entry(self, key, row):
+        if key == 'CONSTANTS' or key == 'HIERARCHY':
+            return row[0]
+        elif key == 'FUNCTIONS':
+            return (row[0], _split(row[1]), row[2])
+        elif key == 'CLASSES':
+            klassId, name, docstring, bases, constructor = row
+            return (name, LazyClassDict(self, klassId, docstring=docstring,
+                                        bases=_split(bases), constructor=_split(constructor)))
+        return row
+
+    def _select(self, key, where='', args=()):
+        sql = 'SELECT %s FROM %s' % (COLUMNS[key], TABLES[key])
+        if where:
+            sql += ' WHERE ' + where
+        elif key != 'POINTERS':
+            # keep the order of the lists, but let lookups use the indexes
+            sql += ' ORDER BY id'
+        return [self._entry(key, row) for row in self.connection.execute(sql, args)]
+
+    def _prefixed(self, key, column, prefix):
+        upper = _upperBound(prefix)
+        if upper is None:
+            return self._select(key, '%s >= ?' % column, (prefix,))
+        return self._select(key, '%s >= ? AND %s < ?' % (column, column), (prefix, upper))
+
+    def entries(self, key):
+        return iter(self._select(key))
+
+    def lookup(self, key, name):
+        result = self._select(key, '%s = ?' % FULLNAME[key], (name,))
+        if not result:
+            return None
+        return result[-1][1]
+
+    def named(self, key, prefix, caseSensitive):
+        if caseSensitive:
+            return self._prefixed(key, 'name', prefix)
+        return self._prefixed(key, 'lname', prefix.lower())
+
+    def inModule(self, key, module):
+        return self._select(key, 'module = ?', (module,))
+
+    def withPrefix(self, key, prefix):
+        return self._prefixed(key, FULLNAME[key], prefix)
+
+    def starPointers(self):
+        return self._select('POINTERS', 'star = 1')
+
+    def toDict(self):
+        "load everything into a PYSMELLDICT"
+        PYSMELLDICT = emptyPYSMELLDICT()
+        for key in ('CONSTANTS', 'FUNCTIONS', 'HIERARCHY'):
+            PYSMELLDICT[key] = self._select(key)
+        PYSMELLDICT['POINTERS'] = dict(self._select('POINTERS'))
+        classes = {}
+        for klassId, name, docstring, bases, constructor in self.connection.execute(
+                'SELECT id, fullname, docstring, bases, constructor FROM classes ORDER BY id'):
+            classes[klassId] = name, dict(docstring=docstring, bases=_split(bases),
+                        constructor=_split(constructor), methods=[], properties=[])
+        for klassId, name, args, docstring in self.connection.execute(
+                'SELECT class, name, args, docstring FROM methods ORDER BY id'):
+            classes[klassId][1]['methods'].append((name, _split(args), docstring))
+        for klassId, name in self.connection.execute('SELECT class, name FROM properties ORDER BY id'):
+            classes[klassId][1]['properties'].append(name)
+        PYSMELLDICT['CLASSES'] = dict(classes.values())
+        return PYSMELLDICT
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,165 @@
+# streaming.py
+# Write PYSMELLTAGS without keeping the whole project in memory
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import os
+import heapq
+import shutil
+import tempfile
+from pprint import pformat
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+LISTS = ('CONSTANTS', 'FUNCTIONS', 'HIERARCHY')
+MAPPINGS = ('CLASSES', 'POINTERS')
+
+# entries of CLASSES and POINTERS kept in memory before being spooled as a sorted run
+RUN_SIZE = 20000
+
+
+def _load(path):
+    "yield every object pickled to path"
+    f = open(path, 'rb')
+    try:
+        unpickler = pickle.Unpickler(f)
+        while True:
+            try:
+                yield unpickler.load()
+            except EOFError:
+                break
+    finally:
+        f.close()
+
+
+def mergeRuns(runs):
+    "merge sorted iterables into one sorted iterator"
+    heap = []
+    for index, run in enumerate(runs):
+        run = iter(run)
+        for item in run:
+            heap.append((item, index, run))
+            break
+    heapq.heapify(heap)
+    while heap:
+        item, index, run = heap[0]
+        yield item
+        for item in run:
+            heapq.heapreplace(heap, (item, index, run))
+            break
+        else:
+            heapq.heappop(heap)
+
+
+class StreamingWriter(object):
+    """
+    Takes the place of the ModuleDict ``process`` collects every file into,
+    and spools the entries to ``directory`` as they come instead.
+
+    The list sections are appended to a spool file each, in the order they
+    come in. CLASSES and POINTERS are spooled as sorted runs of ``runSize``
+    entries, which ``write`` merges (keeping the last entry for every name,
+    like ModuleDict.update) while writing a text PYSMELLTAGS file. At no point
+    is more than a run and an entry per run in memory.
+    """
+    def __init__(self, directory=None, runSize=RUN_SIZE):
+        self.directory = tempfile.mkdtemp(prefix='.pysmell-spool-', dir=directory)
+        self.runSize = runSize
+        self.sequence = 0
+        self.lists = {}
+        for key in LISTS:
+            self.lists[key] = open(os.path.join(self.directory, key), 'wb')
+        self.buffers = dict((key, []) for key in MAPPINGS)
+        self.runs = dict((key, []) for key in MAPPINGS)
+
+    def update(self, other):
+        if not other:
+            return
+        for key in LISTS:
+            if other[key]:
+                pickle.dump(list(other[key]), self.lists[key], 2)
+        for key in MAPPINGS:
+            buffer = self.buffers[key]
+            for name, value in other[key].iteritems():
+                buffer.append((name, self.sequence, value))
+                self.sequence += 1
+            if len(buffer) >= self.runSize:
+                self._spoolRun(key)
+
+    def _spoolRun(self, key):
+        buffer = self.buffers[key]
+        buffer.sort()
+        path = os.path.join(self.directory, '%s.%d' % (key, len(self.runs[key])))
+        f = open(path, 'wb')
+        try:
+            pickler = pickle.Pickler(f, 2)
+            for entry in buffer:
+                pickler.dump(entry)
+                pickler.clear_memo()
+        finally:
+            f.close()
+        self.runs[key].append(path)
+        del buffer[:]
+
+    def _mapping(self, key):
+        "yield the (name, value) pairs of a mapping section, sorted, last entry per name"
+        buffer = sorted(self.buffers[key])
+        previous = None
+        for name, _, value in mergeRuns([_load(path) for path in self.runs[key]] + [buffer]):
+            if previous is not None and previous[0] != name:
+                yield previous
+            previous = name, value
+        if previous is not None:
+            yield previous
+
+    def _list(self, key):
+        for entries in _load(os.path.join(self.directory, key)):
+            for entry in entries:
+                yield entry
+
+    def write(self, path):
+        """
+        Write the text PYSMELLTAGS to path. It evaluates to the same
+        PYSMELLDICT as the one generateClassTag writes for the same files.
+        """
+        for f in self.lists.values():
+            f.close()
+        out = open(path, 'w')
+        try:
+            out.write('{')
+            # in the order pprint writes them in
+            for index, key in enumerate(sorted(LISTS + MAPPINGS)):
+                if index:
+                    out.write(',\n ')
+                out.write('%r: ' % key)
+                if key in MAPPINGS:
+                    out.write('{')
+                    for count, (name, value) in enumerate(self._mapping(key)):
+                        if count:
+                            out.write(',\n   ')
+                        out.write('%r: %s' % (name, pformat(value, width=100)))
+                    out.write('}')
+                else:
+                    out.write('[')
+                    for count, entry in enumerate(self._list(key)):
+                        if count:
+                            out.write(',\n   ')
+                        out.write(repr(entry))
+                    out.write(']')
+            out.write('}\n')
+        finally:
+            out.close()
+
+    def close(self):
+        "remove the spool files"
+        for f in self.lists.values():
+            f.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,187 @@
+# supervisor.py
+# Run work in worker processes that are killed when they take too long
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import os
+import time
+import select
+from collections import deque
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# how often to check on the workers where pipes can't be waited on with select
+POLL_INTERVAL = 0.01
+
+TIMEOUT = 'timeout'
+# the parser reports too deeply nested code as a MemoryError too
+MEMORY = 'out of memory'
+CRASHED = 'crashed'
+
+
+def _addressSpace():
+    "the bytes of address space this process uses, 0 if that is unknown"
+    try:
+        f = open('/proc/self/statm')
+    except IOError:
+        return 0
+    try:
+        pages = int(f.read().split()[0])
+    finally:
+        f.close()
+    return pages * resource.getpagesize()
+
+
+def _serve(conn, function, memoryLimit):
+    "the main loop of a worker process"
+    if memoryLimit:
+        # on top of what the worker inherits from the process that forked it
+        limit = _addressSpace() + memoryLimit
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        index, item = task
+        try:
+            conn.send((index, function(item), None))
+        except MemoryError:
+            conn.send((index, None, MEMORY))
+            break
+
+
+class Worker(object):
+    def __init__(self, function, memoryLimit):
+        self.conn, childConn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve, args=(childConn, function, memoryLimit))
+        self.process.daemon = True
+        self.process.start()
+        # so that the pipe reports the end of file when the worker dies
+        childConn.close()
+        self.task = None
+
+    def kill(self):
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (IOError, OSError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+
+def supported(memoryLimit=None):
+    "whether work can be supervised, with a memory limit if given"
+    return multiprocessing is not None and (not memoryLimit or resource is not None)
+
+
+class Supervisor(object):
+    """
+    Calls ``function`` on items in ``workers`` worker processes. A worker
+    that spends more than ``timeout`` seconds on an item is killed, as is
+    one that allocates more than ``memoryLimit`` more bytes (raising
+    MemoryError), and a new one takes its place. The item is skipped.
+    A worker that dies on an item (eg. when the C stack overflows) skips it
+    too.
+    """
+    def __init__(self, function, workers, timeout=None, memoryLimit=None):
+        self.function = function
+        self.workers = workers
+        self.timeout = timeout
+        self.memoryLimit = memoryLimit
+
+    def map(self, items):
+        """
+        Yield (result, reason, seconds) for every item, in order. reason is
+        None for the items that were done, result is None for the others.
+        """
+        items = list(items)
+        pending = deque(enumerate(items))
+        done = {}
+        next = 0
+        idle = [self._start() for _ in range(min(self.workers, len(items)))]
+        busy = []
+        try:
+            while next < len(items):
+                while idle and pending:
+                    worker = idle.pop()
+                    index, item = worker.task = pending.popleft()
+                    worker.started = time.time()
+                    worker.conn.send((index, item))
+                    busy.append(worker)
+                self._wait(busy)
+                for worker in list(busy):
+                    outcome = self._check(worker)
+                    if outcome is None:
+                        continue
+                    busy.remove(worker)
+                    result, reason = outcome
+                    done[worker.task[0]] = (result, reason, time.time() - worker.started)
+                    if reason is None:
+                        idle.append(worker)
+                    else:
+                        worker.kill()
+                        idle.append(self._start())
+                while next in done:
+                    yield done.pop(next)
+                    next += 1
+        finally:
+            for worker in idle + busy:
+                worker.stop()
+
+    def _start(self):
+        return Worker(self.function, self.memoryLimit)
+
+    def _check(self, worker):
+        "(result, reason) if the worker is done with its item, None if not"
+        if worker.conn.poll():
+            try:
+                _, result, reason = worker.conn.recv()
+            except (EOFError, IOError):
+                worker.process.join()
+                return None, '%s (exit code %s)' % (CRASHED, worker.process.exitcode)
+            return result, reason
+        if not worker.process.is_alive():
+            return None, '%s (exit code %s)' % (CRASHED, worker.process.exitcode)
+        if self.timeout is not None and time.time() - worker.started > self.timeout:
+            return None, TIMEOUT
+        return None
+
+    def _wait(self, busy):
+        "until a worker may be done, or times out"
+        timeout = None
+        if self.timeout is not None:
+            timeout = max(0, min(worker.started for worker in busy) + self.timeout - time.time())
+        if os.name == 'posix':
+            select.select([worker.conn.fileno() for worker in busy], [], [], timeout)
+        else:
+            deadline = timeout is not None and time.time() + timeout
+            while not [worker for worker in busy
+                            if worker.conn.poll() or not worker.process.is_alive()]:
+                if deadline and time.time() >= deadline:
+                    break
+                time.sleep(POLL_INTERVAL)
@@ -0,0 +1,279 @@
+# symboltable.py
+# A sorted, memory mapped index of the names in a PYSMELLTAGS file
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+The symbol table is written next to a text or binary PYSMELLTAGS file (as
+.PYSMELLTAGS.index) and lets editors answer top level and module completions
+with a few binary searches, without loading the tags:
+
+    header      magic, version, the size and mtime of the PYSMELLTAGS file it
+                was built from, and the sizes of the sections below
+    records     one record for every entry of the PYSMELLTAGS file: its kind,
+                followed by length prefixed fields (full name, last name
+                component, its lowercase form, module, and what the entry
+                needs for completions)
+    tables      arrays of record offsets (from the start of the file), sorted by full name, by name, by
+                lowercase name, and the star pointers
+
+Listings and lookups of single entries are answered from the records too.
+Only the members (methods and properties) of classes are read from the
+PYSMELLTAGS file, the first time one is needed.
+"""
+
+import os
+import mmap
+import struct
+
+from pysmell.tagstore import DictSource, splitName, hiddenSibling
+
+MAGIC = '\x89PYSMIDX'
+VERSION = 1
+HEADER = '<8sHHdQIII' # magic, version, flags, tags mtime, tags size, records, record bytes, named
+HEADER_SIZE = struct.calcsize(HEADER)
+
+KINDS = {
+    'CONSTANTS': 'C',
+    'FUNCTIONS': 'F',
+    'CLASSES': 'K',
+    'POINTERS': 'P',
+    'HIERARCHY': 'H',
+}
+
+# record fields
+FULLNAME, NAME, LNAME, MODULE = range(4)
+
+
+def indexPath(tagsPath):
+    return hiddenSibling(tagsPath, 'index')
+
+
+def _encode(string):
+    if isinstance(string, unicode):
+        return string.encode('utf-8')
+    return string
+
+
+def _record(kind, fullname, payload=()):
+    module, name = splitName(fullname)
+    fields = [fullname, name, name.lower(), module] + list(payload)
+    parts = [struct.pack('<cH', kind, len(fields))]
+    for field in fields:
+        field = _encode(field)
+        parts.append(struct.pack('<I', len(field)))
+        parts.append(field)
+    return ''.join(parts)
+
+
+def _records(modules):
+    "yield (kind, record) for every entry of modules"
+    for const in modules['CONSTANTS']:
+        yield 'C', _record('C', const)
+    for func, args, docstring in modules['FUNCTIONS']:
+        yield 'F', _record('F', func, [docstring or ''] + list(args))
+    for klass, klassDict in modules['CLASSES'].iteritems():
+        payload = ([klassDict.get('docstring', '') or '', str(len(klassDict['bases']))]
+                   + klassDict['bases'] + klassDict['constructor'])
+        yield 'K', _record('K', klass, payload)
+    for name, pointer in modules['POINTERS'].iteritems():
+        yield 'P', _record('P', name, [pointer])
+    for module in modules['HIERARCHY']:
+        yield 'H', _record('H', module)
+
+
+def writeSymbolTable(modules, f, tagsPath):
+    "write the symbol table of modules, which were written to tagsPath, to f"
+    st = os.stat(tagsPath)
+    blob = []
+    offsets = []
+    keys = [] # (fullname, name, lname) for every record
+    named = []
+    stars = []
+    position = 0
+    for index, (kind, record) in enumerate(_records(modules)):
+        offsets.append(HEADER_SIZE + position)
+        blob.append(record)
+        position += len(record)
+        fields = _fields(record, 0, 3)
+        keys.append(fields)
+        if kind in 'CFK':
+            named.append(index)
+        elif kind == 'P' and fields[FULLNAME].endswith('*'):
+            stars.append(index)
+
+    def table(indices, field):
+        # sort is stable, so equal names keep the order of PYSMELLTAGS
+        return [offsets[i] for i in sorted(indices, key=lambda i: keys[i][field])]
+
+    allRecords = range(len(offsets))
+    tables = (table(allRecords, FULLNAME) + table(named, NAME) + table(named, LNAME)
+              + [offsets[i] for i in stars])
+    f.write(struct.pack(HEADER, MAGIC, VERSION, 0, st.st_mtime, st.st_size,
+                        len(offsets), position, len(named)))
+    f.write(''.join(blob))
+    f.write(struct.pack('<%dI' % len(tables), *tables))
+
+
+def _fields(data, offset, count=None):
+    "read the first count fields (all if None) of the record at offset"
+    kind, total = struct.unpack_from('<cH', data, offset)
+    if count is None:
+        count = total
+    offset += 3
+    fields = []
+    for _ in xrange(count):
+        length, = struct.unpack_from('<I', data, offset)
+        offset += 4
+        fields.append(data[offset:offset + length])
+        offset += length
+    return fields
+
+
+class LazyClassDict(dict):
+    "A class of a SymbolTableSource, which loads its members from PYSMELLTAGS when asked"
+    def __init__(self, source, name, **kwargs):
+        dict.__init__(self, **kwargs)
+        self.source = source
+        self.name = name
+
+    def __missing__(self, key):
+        klassDict = self.source._tags().lookup('CLASSES', self.name) or {}
+        if key not in klassDict:
+            raise KeyError(key)
+        self[key] = klassDict[key]
+        return self[key]
+
+
+class SymbolTableSource(object):
+    """
+    A tag source (see pysmell.tagstore) answering queries from the symbol
+    table at indexPath, and the members of classes from the PYSMELLTAGS file
+    at tagsPath, which ``load`` turns into a PYSMELLDICT.
+    """
+    def __init__(self, indexPath, tagsPath, load):
+        self.tagsPath = tagsPath
+        self.load = load
+        self.loaded = None
+        f = open(indexPath, 'rb')
+        try:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        (_, _, _, _, _, self.recordCount, recordBytes,
+            self.namedCount) = struct.unpack_from(HEADER, self.data, 0)
+        self.tables = {}
+        position = HEADER_SIZE + recordBytes
+        for table, count in [(FULLNAME, self.recordCount), (NAME, self.namedCount),
+                             (LNAME, self.namedCount)]:
+            self.tables[table] = (position, count)
+            position += 4 * count
+        self.stars = (position, (len(self.data) - position) // 4)
+
+    def _tags(self):
+        if self.loaded is None:
+            self.loaded = DictSource(self.load(self.tagsPath))
+        return self.loaded
+
+    def _offset(self, table, index):
+        return struct.unpack_from('<I', self.data, table[0] + 4 * index)[0]
+
+    def _range(self, field, prefix):
+        "yield the offsets of the records whose field starts with prefix"
+        table = self.tables[field]
+        low, high = 0, table[1]
+        while low < high:
+            middle = (low + high) // 2
+            if _fields(self.data, self._offset(table, middle), field + 1)[field] < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        for index in xrange(low, table[1]):
+            offset = self._offset(table, index)
+            if not _fields(self.data, offset, field + 1)[field].startswith(prefix):
+                break
+            yield offset
+
+    def _all(self):
+        "yield the offsets of all the records, in the order of PYSMELLTAGS"
+        offset = HEADER_SIZE
+        for _ in xrange(self.recordCount):
+            yield offset
+            total, = struct.unpack_from('<H', self.data, offset + 1)
+            offset += 3
+            for _ in xrange(total):
+                length, = struct.unpack_from('<I', self.data, offset)
+                offset += 4 + length
+
+    def _entry(self, offset):
+        fields = _fields(self.data, offset)
+        kind = self.data[offset]
+        if kind == 'F':
+            return (fields[FULLNAME], fields[5:], fields[4])
+        elif kind == 'K':
+            bases = 6 + int(fields[5])
+            return (fields[FULLNAME], LazyClassDict(self, fields[FULLNAME], docstring=fields[4],
+                        bases=fields[6:bases], constructor=fields[bases:]))
+        elif kind == 'P':
+            return (fields[FULLNAME], fields[4])
+        return fields[FULLNAME]
+
+    def _select(self, key, offsets, accept=None):
+        kind = KINDS[key]
+        return [self._entry(offset) for offset in offsets
+                    if self.data[offset] == kind and (accept is None or accept(offset))]
+
+    def entries(self, key):
+        return iter(self._select(key, self._all()))
+
+    def lookup(self, key, name):
+        kind = KINDS[key]
+        for offset in self._range(FULLNAME, name):
+            if _fields(self.data, offset, 1)[FULLNAME] != name:
+                break
+            if self.data[offset] == kind:
+                return self._entry(offset)[1]
+        return None
+
+    def named(self, key, prefix, caseSensitive):
+        if caseSensitive:
+            return self._select(key, self._range(NAME, prefix))
+        return self._select(key, self._range(LNAME, prefix.lower()))
+
+    def inModule(self, key, module):
+        accept = lambda offset: _fields(self.data, offset, MODULE + 1)[MODULE] == module
+        if not module:
+            return self._select(key, self._range(FULLNAME, ''), accept)
+        return self._select(key, self._range(FULLNAME, module + '.'), accept)
+
+    def withPrefix(self, key, prefix):
+        return self._select(key, self._range(FULLNAME, prefix))
+
+    def starPointers(self):
+        return self._select('POINTERS', [self._offset(self.stars, index)
+                                         for index in xrange(self.stars[1])])
+
+    def close(self):
+        self.data.close()
+
+
+def isFresh(indexPath, tagsPath):
+    "whether the symbol table at indexPath was built from the current tagsPath"
+    try:
+        f = open(indexPath, 'rb')
+    except IOError:
+        return False
+    try:
+        header = f.read(HEADER_SIZE)
+    finally:
+        f.close()
+    if len(header) < HEADER_SIZE:
+        return False
+    magic, version, _, mtime, size = struct.unpack(HEADER, header)[:5]
+    st = os.stat(tagsPath)
+    return magic == MAGIC and version == VERSION and mtime == st.st_mtime and size == st.st_size
@@ -11,13 +11,36 @@
 
 import os
 import sys
+import time
+from itertools import izip
 from textwrap import dedent
-from pprint import pprint
 
 from pysmell.codefinder import ModuleDict, processFile
 from pysmell.idehelper import findRootPackageList
+from pysmell.manifest import manifestPath, readManifest, writeManifest, fileEntry, findOutdated
+from pysmell.cache import AnalysisCache, DEFAULT_DIRECTORY, DEFAULT_SIZE
+from pysmell.watcher import createObserver, watch, DEBOUNCE
+from pysmell.tagsformat import dumpTags, readTags, FORMATS
+from pysmell.sqlitetags import writeSQLite
+from pysmell.symboltable import writeSymbolTable, indexPath
+from pysmell.streaming import StreamingWriter
+from pysmell.fscache import fscache
+from pysmell.vcs import changedSince, selectChanged, GitError
+from pysmell.traversal import Walker
+from pysmell.supervisor import Supervisor, supported
+from pysmell.parsers import getParser, PARSERS, DEFAULT as DEFAULT_PARSER
+from pysmell.shards import splitShards, shardDirectory, shardFilename, dumpManifest
+from pysmell.bundles import findDistributions, bundleDirectory, bundleFilename, writeLink
+from pysmell.bundles import DEFAULT_DIRECTORY as DEFAULT_BUNDLES
+from pysmell.report import timingReport, formatText, formatJSON, SLOWEST
+from pysmell.server import main as serve
 
 from pysmell import argparse
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
  
 version = __import__('pysmell').__version__
 
@@ -38,51 +61,126 @@ def test(aname):
 """
 
 
-def generateClassTag(modules, output):
+def replaceAtomically(output, writeTo):
+    """
+    Call writeTo with a temporary path next to ``output`` and move what it
+    wrote over ``output`` in one go, so that editors never read a half written
+    tags file.
+    """
     p = os.path.abspath(output)
-    f = open(p, 'w')
-    pprint(modules, f, width=100)
-    f.close()
+    directory, filename = os.path.split(p)
+    # hidden, so that it is not picked up as a PYSMELLTAGS.* file meanwhile
+    tmpPath = os.path.join(directory, '.%s.%d.tmp' % (filename, os.getpid()))
+    writeTo(tmpPath)
+    if os.name == 'nt' and os.path.exists(p):
+        os.remove(p) # windows can't rename over an existing file
+    os.rename(tmpPath, p)
+
+
+def writeAtomically(output, write, mode='w'):
+    "call write with a file object that replaces ``output`` once closed"
+    def writeTo(path):
+        f = open(path, mode)
+        try:
+            write(f)
+        finally:
+            f.close()
+    replaceAtomically(output, writeTo)
 
 
-def process(filesOrDirectories, excluded, inputDict=None, verbose=False):
+def generateShards(modules, output, format='text'):
     """
-    Visit every package in ``filesOrDirectories`` and return a ModuleDict for everything,
-    that can be used to generate a PYSMELLTAGS file.
+    Write a shard for every top level package of modules, and the manifest
+    listing them to ``output`` (see pysmell.shards).
+    """
+    directory = shardDirectory(output)
+    if not os.path.isdir(directory):
+        os.mkdir(directory)
+    shards = splitShards(modules)
+    for shard, shardModules in shards.iteritems():
+        generateClassTag(shardModules, os.path.join(directory, shardFilename(shard)), format)
+    writeAtomically(output, lambda f: dumpManifest(shards, format, f))
+    # only now that the manifest no longer lists them
+    removeUnlisted(directory, [shardFilename(shard) for shard in shards])
+    if os.path.exists(indexPath(output)):
+        os.remove(indexPath(output))
 
-    filesOrDirectories: list of paths to process. They can either be directories or files.
-                        Directories can either be packages or they can contain packages.
 
-    excluded: list of directories to exclude (eg. ['test', '.svn'])
+def removeUnlisted(directory, filenames):
+    "remove the files in directory other than filenames and their symbol tables"
+    current = set(filenames)
+    current.update(os.path.basename(indexPath(filename)) for filename in filenames)
+    for filename in os.listdir(directory):
+        if filename not in current:
+            os.remove(os.path.join(directory, filename))
 
-    inputDict: a ModuleDict instance to update with any new or updated python
-               namespaces.
 
-    verbose: flag that turns on verbose logging (print what is going on).
+def generateBundles(directory, output, distributions=None, verbose=False, **kwargs):
+    """
+    Write a bundle to ``directory`` for every distribution (by default the
+    standard library and the installed distributions) that has none yet,
+    the manifest listing them, and a link to it to ``output`` (see
+    pysmell.bundles). The other keyword arguments are passed to ``process``.
+    """
+    if distributions is None:
+        distributions = findDistributions()
+    parser = kwargs.get('parser') or DEFAULT_PARSER
+    manifest = os.path.join(bundleDirectory(directory, parser), 'PYSMELLTAGS')
+    shards = shardDirectory(manifest)
+    if not os.path.isdir(shards):
+        os.makedirs(shards)
+    filenames = {}
+    bundles = []
+    for distribution in distributions:
+        filename = bundleFilename(distribution, parser)
+        if not os.path.exists(os.path.join(shards, filename)):
+            if verbose:
+                print 'bundling', distribution.name, distribution.version
+            modules = process(distribution.paths, distribution.excluded, verbose=verbose, **kwargs)
+            # binary, as evaluating the text format of big libraries takes seconds
+            generateClassTag(modules, os.path.join(shards, filename), 'binary')
+        bundles.append(filename)
+        for name in distribution.names():
+            filenames.setdefault(name, []).append(filename)
+    writeAtomically(manifest, lambda f: dumpManifest(filenames, 'binary', f, filenames))
+    removeUnlisted(shards, bundles)
+    writeAtomically(output, lambda f: writeLink(manifest, f))
 
-    returns: The generated ModuleDict instance for the directories provided in
-             ``filesOrDirectories``.
+
+def generateClassTag(modules, output, format='text', shards=False):
+    if shards:
+        generateShards(modules, output, format)
+        return
+    if format == 'sqlite':
+        replaceAtomically(output, lambda path: writeSQLite(modules, path))
+        return
+    elif format == 'binary':
+        writeAtomically(output, lambda f: dumpTags(modules, f, format), 'wb')
+    else:
+        writeAtomically(output, lambda f: dumpTags(modules, f, format))
+    # lets editors complete names without loading the whole file
+    writeAtomically(indexPath(output), lambda f: writeSymbolTable(modules, f, output), 'wb')
+
+
+def findFiles(filesOrDirectories, excluded, verbose=False, walker=None):
     """
-    modules = ModuleDict()
-    if inputDict:
-        modules.update(inputDict)
+    Yield a (filename, absPath) pair for every python file that ``process``
+    should analyse, in the order a serial run visits them.
+
+    walker: the pysmell.traversal.Walker to find the files in directories
+            with, which counts the directories it prunes. By default one that
+            prunes ``excluded``.
+
+    The other arguments are the same as ``process``.
+    """
+    if walker is None:
+        walker = Walker(excluded, verbose=verbose)
     for rootPackage in filesOrDirectories:
         if os.path.isdir(rootPackage):
-            for path, dirs, files in os.walk(rootPackage):
-                for exc in excluded:
-                    if exc in dirs:
-                        if verbose:
-                            print 'removing', exc, 'in', path
-                        dirs.remove(exc)
-                for f in files:
-                    if not f.endswith(".py"):
-                        continue
-                    #path here is relative, make it absolute
-                    absPath = os.path.abspath(path)
-                    if verbose:
-                        print 'processing', absPath, f
-                    newmodules = processFile(f, absPath)
-                    modules.update(newmodules)
+            for path, f in walker.walk(rootPackage):
+                #path here is relative, make it absolute
+                absPath = os.path.abspath(path)
+                yield f, absPath
         else: # single file
             filename = rootPackage
             absPath, filename = os.path.split(filename)
@@ -92,62 +190,461 @@ def process(filesOrDirectories, excluded, inputDict=None, verbose=False):
                 absPath = os.path.abspath(absPath)
                 
             #path here is absolute
-            if verbose:
-                print 'processing', absPath, filename
-            newmodules = processFile(filename, absPath)
-            modules.update(newmodules)
-            
+            yield filename, absPath
+
+
+def _timedProcessFile(args):
+    # module level so that it can be pickled and sent to the worker processes
+    filename, absPath, cache, parser = args
+    parser = getParser(parser)
+    start = time.time()
+    # the processor time of this process, which workers competing for the
+    # processors don't inflate like they do the wall clock time
+    started = time.clock()
+    probes, listings = fscache.counts()
+    newmodules, hit = None, False
+    timings = {'parse': 0.0, 'visit': 0.0, 'lines': 0}
+    if cache is not None:
+        key = cache.keyFor(filename, absPath, parser.name)
+        newmodules = cache.get(key)
+        hit = newmodules is not None
+    if not hit:
+        newmodules = processFile(filename, absPath, timings, parser)
+        if cache is not None and newmodules is not None:
+            cache.put(key, newmodules)
+    newProbes, newListings = fscache.counts()
+    timings['cpu'] = time.clock() - started
+    return (newmodules, time.time() - start, hit, (newProbes - probes, newListings - listings),
+            timings)
+
+
+def _supervisedProcessFile(args):
+    result = _timedProcessFile(args)
+    if result[-1].get('error', '').startswith('MemoryError'):
+        # let the supervisor know that the file hit the memory limit
+        raise MemoryError
+    return result
+
+
+def _inWorkers(jobs):
+    return jobs != 1 and multiprocessing is not None
+
+
+def _analyse(files, jobs, cache, timeout=None, memoryLimit=None, skipped=None, parser=None):
+    """
+    yield (filename, absPath, ModuleDict, seconds, cacheHit, (fs probes, fs listings),
+    timings) for every file, in order, where timings has the 'parse' and
+    'visit' seconds and the 'lines' of the file (see codefinder.getClassDict),
+    and the processor seconds ('cpu') analysing it took
+
+    With a timeout or a memoryLimit, the files are analysed by supervised
+    workers (see pysmell.supervisor). The files that hit a limit yield no
+    ModuleDict, and are appended to ``skipped`` as (path, reason).
+
+    parser: the name of the parser backend (see pysmell.parsers).
+    """
+    work = [(filename, absPath, cache, parser) for filename, absPath in files]
+    if timeout is not None or memoryLimit is not None:
+        supervisor = Supervisor(_supervisedProcessFile, jobs or multiprocessing.cpu_count(),
+                                timeout, memoryLimit)
+        for (filename, absPath, _, _), (result, reason, took) in izip(work, supervisor.map(work)):
+            if reason is not None:
+                skipped.append((os.path.join(absPath, filename), reason))
+                result = (None, took, False, (0, 0), {'parse': 0.0, 'visit': 0.0, 'lines': 0, 'cpu': took})
+            yield (filename, absPath) + result
+    elif _inWorkers(jobs):
+        workers = jobs or multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(workers)
+        try:
+            chunksize = max(1, len(work) // (workers * 4))
+            results = pool.imap(_timedProcessFile, work, chunksize)
+            for (filename, absPath, _, _), result in izip(work, results):
+                yield (filename, absPath) + result
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for args in work:
+            yield args[:2] + _timedProcessFile(args)
+
+
+def process(filesOrDirectories, excluded, inputDict=None, verbose=False, jobs=1, stats=None,
+            manifest=None, cache=None, modules=None, changes=None, vcsIgnore=False,
+            timeout=None, memoryLimit=None, parser=None):
+    """
+    Visit every package in ``filesOrDirectories`` and return a ModuleDict for everything,
+    that can be used to generate a PYSMELLTAGS file.
+
+    filesOrDirectories: list of paths to process. They can either be directories or files.
+                        Directories can either be packages or they can contain packages.
+
+    excluded: list of directories and files to exclude (eg. ['test', '.svn']).
+              Globs and regular expressions work too, see pysmell.traversal.Excludes.
+
+    inputDict: a ModuleDict instance to update with any new or updated python
+               namespaces.
+
+    verbose: flag that turns on verbose logging (print what is going on).
+
+    jobs: number of worker processes to analyse files with. 1 (the default)
+          analyses everything in this process, 0 uses one worker per CPU.
+          The result is identical to a serial run.
+
+    stats: an optional dict that is filled in with the number of 'files'
+           analysed, the total per-file 'analysis' time, the processor time
+           analysing them took ('cpu') and the 'elapsed' wall clock time, in
+           seconds, the 'cacheHits' and 'cacheMisses', and
+           the 'fsProbes' of the filesystem that took 'fsListings' directory
+           listings to answer (see pysmell.fscache), and the number of
+           directories 'pruned' from the walk. 'perFile' lists a dict for
+           every file, with its 'path', the seconds it took to 'parse', to
+           'visit' and to 'merge' it, their 'total', its 'lines' and whether
+           it was 'cached' (see pysmell.report). 'skipped' lists the
+           (path, reason) of the files that hit the timeout or memoryLimit.
+
+    manifest: an optional dict describing the files ``inputDict`` was
+              generated from (see pysmell.manifest). Only files that changed
+              since are analysed again, the entries of deleted files are
+              dropped and the manifest is updated in place.
+
+    cache: an optional pysmell.cache.AnalysisCache to look analysed files up
+           in, and to store newly analysed files to.
+
+    modules: what the ModuleDict of every file is merged into, with its
+             ``update`` method. A new ModuleDict by default; a
+             pysmell.streaming.StreamingWriter spools them to disk instead.
+             Can't be combined with ``manifest`` unless it is a ModuleDict.
+
+    changes: an optional (changed, deleted) pair of sets of absolute paths
+             (see pysmell.vcs.changedSince). Only the changed files are
+             analysed, and the modules of both are dropped from ``inputDict``
+             first. The directories are not walked.
+
+    vcsIgnore: skip what .gitignore and .hgignore files ignore.
+
+    timeout, memoryLimit: seconds and bytes that analysing a file may take.
+                          With either, files are analysed in supervised
+                          worker processes (``jobs`` of them, at least one)
+                          which are replaced when they hit a limit or
+                          crash; the file is skipped. See pysmell.supervisor.
+
+    parser: the name of the parser backend to analyse files with, 'compiler'
+            (the default), 'ast' or 'outline', which is approximate (see
+            pysmell.parsers).
+
+    returns: The generated ModuleDict instance for the directories provided in
+             ``filesOrDirectories``, or ``modules`` if it was given.
+    """
+    start = time.time()
+    # files may have come and gone since the last run in this process
+    fscache.invalidate()
+    startProbes, startListings = fscache.counts()
+    if modules is None:
+        modules = ModuleDict()
+    if inputDict:
+        modules.update(inputDict)
+    count, analysis, cpu, hits = 0, 0.0, 0.0, 0
+    probes, listings = 0, 0
+    perFile = []
+    skipped = []
+    supervised = timeout is not None or memoryLimit is not None
+    walker = Walker(excluded, vcsIgnore, verbose)
+    files = findFiles(filesOrDirectories, excluded, verbose, walker)
+    if manifest is not None:
+        roots = [os.path.abspath(root) for root in filesOrDirectories]
+        files, stale = findOutdated(list(files), manifest, roots)
+        if verbose:
+            print 'dropping', sorted(stale)
+        modules.dropModules(stale)
+    if changes is not None:
+        files, stale = selectChanged(changes, filesOrDirectories, excluded, modules['HIERARCHY'],
+                                     lambda directory: findFiles([directory], excluded, verbose, walker))
+        if verbose:
+            print 'dropping', sorted(stale)
+        modules.dropModules(stale)
+    analysed = _analyse(files, jobs, cache, timeout, memoryLimit, skipped, parser)
+    for filename, absPath, newmodules, took, hit, fs, timings in analysed:
+        if verbose:
+            print hit and 'cached' or 'processing', absPath, filename
+        merging = time.time()
+        modules.update(newmodules)
+        if stats is not None:
+            merge = time.time() - merging
+            perFile.append({'path': os.path.join(absPath, filename), 'parse': timings['parse'],
+                            'visit': timings['visit'], 'merge': merge, 'lines': timings['lines'],
+                            'total': timings['parse'] + timings['visit'] + merge, 'cached': hit})
+        if manifest is not None:
+            produced = newmodules and list(newmodules['HIERARCHY']) or []
+            fullPath = os.path.join(absPath, filename)
+            manifest[fullPath] = fileEntry(fullPath, produced)
+        count += 1
+        analysis += took
+        cpu += timings['cpu']
+        hits += hit
+        if supervised or _inWorkers(jobs):
+            probes += fs[0]
+            listings += fs[1]
+
+    if cache is not None:
+        evicted = cache.evict()
+        cache.saveStats(hits, count - hits, evicted)
+    if stats is not None:
+        endProbes, endListings = fscache.counts()
+        probes += endProbes - startProbes
+        listings += endListings - startListings
+        stats['files'] = count
+        stats['analysis'] = analysis
+        stats['cpu'] = cpu
+        stats['elapsed'] = time.time() - start
+        stats['cacheHits'] = hits
+        stats['cacheMisses'] = count - hits
+        stats['fsProbes'] = probes
+        stats['fsListings'] = listings
+        stats['pruned'] = walker.pruned
+        stats['perFile'] = perFile
+        stats['skipped'] = skipped
     return modules
 
 
+def printSkipped(skipped):
+    if skipped:
+        print >> sys.stderr, 'skipped %d files:' % len(skipped)
+        for path, reason in skipped:
+            print >> sys.stderr, '    %s (%s)' % (path, reason)
+
+
 def main():
+    if sys.argv[1:2] == ['serve']:
+        serve(sys.argv[2:])
+        return
     description = dedent("""\
         Generate a PYSMELLTAGS file with information about the
         Python code contained in the specified packages (recursively). This file is
         then used to provide autocompletion for various IDEs and editors that
         support it. """)
     parser = argparse.ArgumentParser(description=description, version=version, prog='pysmell')
-    parser.add_argument('fileList', metavar='package', type=str, nargs='+',
+    parser.add_argument('fileList', metavar='package', type=str, nargs='*',
         help='The packages to be analysed.')
     parser.add_argument('-x', '--exclude', metavar='package', nargs='*', type=str, default=[],
         help=dedent("""Will not analyze files in directories that match the
-        argument. Useful for excluding tests or version control directories."""))
+        argument. Useful for excluding tests or version control directories.
+        Globs (eg. '*.egg-info', 'build/lib') and regular expressions
+        prefixed with 're:' match too."""))
+    parser.add_argument('--vcs-ignore', action='store_true',
+        help=dedent("""Will not analyze what .gitignore and .hgignore files
+        ignore."""))
     parser.add_argument('-o', '--output', default='PYSMELLTAGS',
         help="File to write the tags to")
+    parser.add_argument('-f', '--format', choices=FORMATS, default='text',
+        help=dedent("""Format of the tags file. The binary format is smaller
+        and much faster to load for big projects. The sqlite format is
+        queried without loading it, for very big projects."""))
     parser.add_argument('-i', '--input',
         help="Preexisting tags file to update")
+    parser.add_argument('--since', metavar='REV',
+        help=dedent("""Only analyse the python files that git reports as
+        changed since revision REV, and patch them into the tags given with
+        -i."""))
+    parser.add_argument('--incremental', action='store_true',
+        help=dedent("""Only analyse the files that changed since the last
+        incremental run, as recorded in .OUTPUT.manifest."""))
+    parser.add_argument('-w', '--watch', action='store_true',
+        help=dedent("""Keep running and update OUTPUT whenever python files
+        change."""))
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+        help=dedent("""Seconds without further changes to wait for before
+        updating OUTPUT in watch mode."""))
+    parser.add_argument('--cache', action='store_true',
+        help=dedent("""Reuse the analysis of identical files from the cache
+        in CACHE_DIR and store new ones there."""))
+    parser.add_argument('--cache-dir', default=DEFAULT_DIRECTORY,
+        help="Directory of the analysis cache")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_SIZE // (1024 * 1024),
+        help="Size of the analysis cache in MB, least recently used entries are evicted")
+    parser.add_argument('--cache-stats', action='store_true',
+        help="Print statistics about the analysis cache and exit")
+    parser.add_argument('--streaming', action='store_true',
+        help=dedent("""Spool the analysed files to disk instead of keeping
+        them in memory, for trees too big to fit in it. Only for the text
+        format, without --incremental or --watch."""))
+    parser.add_argument('--shards', action='store_true',
+        help=dedent("""Write a tags file for every top level package, and
+        make OUTPUT list them, so that editors only load the packages a
+        completion needs. For the text and binary formats, without
+        --streaming."""))
+    parser.add_argument('--libs', action='store_true',
+        help=dedent("""Tag the standard library and the distributions
+        installed for this interpreter, reusing the bundles in LIBS_DIR of
+        the ones that did not change, and link OUTPUT.libs to them."""))
+    parser.add_argument('--libs-dir', default=DEFAULT_BUNDLES,
+        help="Directory of the library bundles")
+    parser.add_argument('--parser', choices=sorted(PARSERS), default=DEFAULT_PARSER,
+        help=dedent("""Parser to analyse files with. The ast parser is
+        several times faster than the compiler package, and produces the
+        same tags."""))
+    parser.add_argument('--fast', dest='parser', action='store_const', const='outline',
+        help=dedent("""Same as --parser outline: make approximate tags from
+        the tokens of the files, without parsing them. Several times faster
+        than the compiler package, for large trees where some tags may be
+        spelled differently or missing."""))
+    parser.add_argument('--timeout', type=float,
+        help=dedent("""Seconds that analysing a file may take. Files are then
+        analysed in supervised processes, and the ones that take longer are
+        skipped."""))
+    parser.add_argument('--memory-limit', type=int, metavar='MB',
+        help=dedent("""Megabytes that analysing a file may allocate, like
+        --timeout."""))
     parser.add_argument('-t', '--timing', action='store_true',
-        help="Will print timing information")
+        help=dedent("""Will print timing information, including the time
+        every phase took and the slowest files"""))
+    parser.add_argument('--slowest', metavar='N', type=int, default=SLOWEST,
+        help="Number of the slowest files to list with --timing")
+    parser.add_argument('--timing-json', metavar='FILE',
+        help=dedent("""Write the timing report, with the slowest files, as
+        JSON to FILE ('-' for standard output)"""))
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+        help=dedent("""Number of processes to analyse files with. Use 0
+        for one process per CPU."""))
     parser.add_argument('-d', '--debug', action='store_true',
         help="Verbose mode; useful for debugging")
     args = parser.parse_args()
+    cache = None
+    if args.cache or args.cache_stats:
+        cache = AnalysisCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    if args.cache_stats:
+        print cache.report()
+        return
+    if not args.fileList and not args.libs:
+        parser.error('too few arguments')
+    if args.streaming and (args.format != 'text' or args.incremental or args.watch):
+        parser.error('--streaming only works with the text format, without --incremental or --watch')
+    if args.shards and (args.format == 'sqlite' or args.streaming):
+        parser.error('--shards only works with the text and binary formats, without --streaming')
+    if args.since and (not args.input or args.incremental or args.watch or args.streaming):
+        parser.error('--since needs the tags to patch with -i, and no --incremental, --watch or --streaming')
     fileList = args.fileList
     excluded = args.exclude
     timing = args.timing
     output = args.output
     verbose = args.debug
     inputFile = args.input
+    jobs = args.jobs
+    if jobs != 1 and multiprocessing is None:
+        print >> sys.stderr, "multiprocessing is not available, ignoring --jobs"
+        jobs = 1
+    timeout = args.timeout
+    memoryLimit = args.memory_limit and args.memory_limit * 1024 * 1024
+    if (timeout or memoryLimit) and not supported(memoryLimit):
+        print >> sys.stderr, "supervised workers are not available, ignoring --timeout and --memory-limit"
+        timeout = memoryLimit = None
+    if args.libs:
+        generateBundles(args.libs_dir, output + '.libs', verbose=verbose, jobs=jobs, cache=cache,
+                        timeout=timeout, memoryLimit=memoryLimit, parser=args.parser)
+        if not fileList:
+            return
+    manifest = None
+    if args.incremental:
+        manifest = readManifest(manifestPath(output))
+        if manifest and not inputFile and os.path.exists(output):
+            inputFile = output
+        elif not inputFile:
+            # nothing to reuse, start from scratch
+            manifest = {}
     if inputFile:
         try:
-            inputDict = eval(file(inputFile).read())
+            inputDict = readTags(inputFile)
         except:
             print >> sys.stderr, "Could not process %s - is it a PYSMELLTAGS file?" % inputFile
             sys.exit(3)
     else:
         inputDict = None
+    changes = None
+    if args.since:
+        try:
+            changes = changedSince(args.since, fileList)
+        except GitError, e:
+            print >> sys.stderr, "Could not find the files changed since %s: %s" % (args.since, e)
+            sys.exit(4)
 
+    if args.watch:
+        if manifest is None:
+            # remember what every file produced so that changes can be swapped in
+            manifest = {}
+        listFiles = lambda: [os.path.join(absPath, f) for f, absPath in
+                                findFiles(fileList, excluded, walker=Walker(excluded, args.vcs_ignore))]
+        observer = createObserver(fileList, excluded, listFiles)
 
     if timing:
-        import time
-        start = time.clock()
+        start = time.time()
     if verbose:
         print 'processing', fileList
         print 'ignoring', excluded
-    modules = process(fileList, excluded, inputDict=inputDict, verbose=verbose)
-    generateClassTag(modules, output)
+    stats = {}
+    if args.streaming:
+        writer = StreamingWriter(os.path.dirname(os.path.abspath(output)))
+        try:
+            process(fileList, excluded, inputDict=inputDict, verbose=verbose,
+                    jobs=jobs, stats=stats, cache=cache, modules=writer, vcsIgnore=args.vcs_ignore,
+                    timeout=timeout, memoryLimit=memoryLimit, parser=args.parser)
+            replaceAtomically(output, writer.write)
+        finally:
+            writer.close()
+        # the symbol table needs every name in memory, drop the outdated one
+        if os.path.exists(indexPath(output)):
+            os.remove(indexPath(output))
+    else:
+        modules = process(fileList, excluded, inputDict=inputDict, verbose=verbose,
+                          jobs=jobs, stats=stats, manifest=manifest, cache=cache, changes=changes,
+                          vcsIgnore=args.vcs_ignore, timeout=timeout, memoryLimit=memoryLimit,
+                          parser=args.parser)
+        generateClassTag(modules, output, args.format, args.shards)
+    if args.incremental:
+        writeManifest(manifest, manifestPath(output))
+    printSkipped(stats['skipped'])
     if timing:
-        took = time.clock() - start
+        took = time.time() - start
         print 'took %f seconds' % took
+        print 'analysed %d files in %f seconds (%f seconds of analysis)' % (
+            stats['files'], stats['elapsed'], stats['analysis'])
+        if cache is not None:
+            print 'cache hits: %d, misses: %d' % (stats['cacheHits'], stats['cacheMisses'])
+        print 'filesystem: %d probes answered with %d directory listings, %d stats saved' % (
+            stats['fsProbes'], stats['fsListings'], stats['fsProbes'] - stats['fsListings'])
+        print 'pruned %d directories' % stats['pruned']
+        if jobs != 1 and stats['elapsed']:
+            # what a serial run would have spent analysing, against what this took
+            print 'speedup with %s jobs: %.2fx (%f processor seconds of analysis)' % (
+                jobs or 'all', stats['cpu'] / stats['elapsed'], stats['cpu'])
+        print formatText(timingReport(stats, args.slowest))
+    if args.timing_json:
+        report = formatJSON(timingReport(stats, args.slowest))
+        if args.timing_json == '-':
+            print report
+        else:
+            writeAtomically(args.timing_json, lambda f: f.write(report + '\n'))
+
+    if args.watch:
+        state = {'modules': modules}
+        def regenerate():
+            stats = {}
+            state['modules'] = process(fileList, excluded, inputDict=state['modules'],
+                verbose=verbose, jobs=jobs, stats=stats, manifest=manifest, cache=cache,
+                vcsIgnore=args.vcs_ignore, timeout=timeout, memoryLimit=memoryLimit,
+                parser=args.parser)
+            generateClassTag(state['modules'], output, args.format, args.shards)
+            if args.incremental:
+                writeManifest(manifest, manifestPath(output))
+            printSkipped(stats['skipped'])
+            if timing:
+                print 'updated %s, analysed %d files in %f seconds' % (output,
+                    stats['files'], stats['elapsed'])
+        try:
+            try:
+                watch(observer, regenerate, args.debounce)
+            except KeyboardInterrupt:
+                pass
+        finally:
+            observer.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,308 @@
+# tagsformat.py
+# Reading and writing PYSMELLTAGS files
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+PYSMELLTAGS files come in three formats. The text format is the pprinted
+PYSMELLDICT. The SQLite format (see pysmell.sqlitetags) is queried without
+loading it. The binary format is meant for big projects, where evaluating
+the text format takes seconds:
+
+    header      magic, version, flags and the sizes of the sections below
+    strings     every distinct string, joined with NUL characters (or, when a
+                string contains a NUL, followed by an array of their lengths)
+    body        an array of unsigned 32 bit integers, describing CONSTANTS,
+                FUNCTIONS, CLASSES, POINTERS and HIERARCHY in that order, in
+                which every string is a reference into the string table and
+                every list is preceded by its length
+"""
+
+import os
+import sys
+import struct
+from array import array
+from pprint import pprint
+
+from pysmell.sqlitetags import sqlite3, isSQLite, SQLiteSource, writeSQLite
+from pysmell.symboltable import indexPath, isFresh, SymbolTableSource
+from pysmell.shards import isShardManifest, openShards, ShardedSource
+from pysmell.bundles import isLink, readLink
+
+MAGIC = '\x89PYSMELL'
+VERSION = 1
+HEADER = '<8sHHIII' # magic, version, flags, string count, string bytes, body integers
+HEADER_SIZE = struct.calcsize(HEADER)
+
+# flags
+LENGTHS = 1
+
+FORMATS = ['text', 'binary']
+if sqlite3 is not None:
+    FORMATS.append('sqlite')
+
+if array('I').itemsize == 4:
+    UINT32 = 'I'
+else:
+    UINT32 = 'L'
+
+
+class TagsFormatError(Exception):
+    pass
+
+
+def _toArray(integers):
+    arr = array(UINT32, integers)
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+
+def _fromString(data):
+    arr = array(UINT32)
+    arr.fromstring(data)
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+
+def dumpText(modules, f):
+    pprint(modules, f, width=100)
+
+
+def dumpBinary(modules, f):
+    strings = []
+    table = {}
+    def ref(string):
+        if isinstance(string, unicode):
+            string = string.encode('utf-8')
+        try:
+            return table[string]
+        except KeyError:
+            table[string] = len(strings)
+            strings.append(string)
+            return table[string]
+
+    body = []
+    add = body.append
+    def addList(values):
+        add(len(values))
+        body.extend(ref(value) for value in values)
+    def addFunction(name, args, docstring):
+        add(ref(name))
+        add(ref(docstring or ''))
+        addList(args)
+
+    addList(modules['CONSTANTS'])
+    add(len(modules['FUNCTIONS']))
+    for name, args, docstring in modules['FUNCTIONS']:
+        addFunction(name, args, docstring)
+    add(len(modules['CLASSES']))
+    for name, klassDict in modules['CLASSES'].iteritems():
+        add(ref(name))
+        add(ref(klassDict.get('docstring', '') or ''))
+        addList(klassDict['bases'])
+        addList(klassDict['constructor'])
+        addList(klassDict['properties'])
+        add(len(klassDict['methods']))
+        for method, args, docstring in klassDict['methods']:
+            addFunction(method, args, docstring)
+    add(len(modules['POINTERS']))
+    for name, pointer in modules['POINTERS'].iteritems():
+        add(ref(name))
+        add(ref(pointer))
+    addList(modules['HIERARCHY'])
+
+    flags = 0
+    blob = '\0'.join(strings)
+    if blob.count('\0') != max(len(strings) - 1, 0):
+        flags |= LENGTHS
+        blob = ''.join(strings)
+    f.write(struct.pack(HEADER, MAGIC, VERSION, flags, len(strings), len(blob), len(body)))
+    f.write(blob)
+    if flags & LENGTHS:
+        f.write(_toArray([len(string) for string in strings]).tostring())
+    f.write(_toArray(body).tostring())
+
+
+def loadBinary(data):
+    if len(data) < HEADER_SIZE:
+        raise TagsFormatError('truncated header')
+    magic, version, flags, stringCount, blobSize, bodySize = struct.unpack(HEADER, data[:HEADER_SIZE])
+    if magic != MAGIC:
+        raise TagsFormatError('not a binary PYSMELLTAGS file')
+    if version > VERSION:
+        raise TagsFormatError('unsupported binary PYSMELLTAGS version %d' % version)
+    offset = HEADER_SIZE
+    blob = data[offset:offset + blobSize]
+    offset += blobSize
+    if flags & LENGTHS:
+        end = offset + 4 * stringCount
+        strings = []
+        start = 0
+        for length in _fromString(data[offset:end]):
+            strings.append(blob[start:start + length])
+            start += length
+        offset = end
+    elif stringCount:
+        strings = blob.split('\0')
+    else:
+        strings = []
+    body = _fromString(data[offset:offset + 4 * bodySize])
+    if len(strings) != stringCount or len(body) != bodySize:
+        raise TagsFormatError('truncated binary PYSMELLTAGS file')
+
+    next = iter(body).next
+    def readList():
+        return [strings[next()] for _ in xrange(next())]
+    def readFunction():
+        name = strings[next()]
+        docstring = strings[next()]
+        return (name, readList(), docstring)
+
+    modules = {}
+    modules['CONSTANTS'] = readList()
+    modules['FUNCTIONS'] = [readFunction() for _ in xrange(next())]
+    classes = modules['CLASSES'] = {}
+    for _ in xrange(next()):
+        name = strings[next()]
+        docstring = strings[next()]
+        classes[name] = {
+            'docstring': docstring,
+            'bases': readList(),
+            'constructor': readList(),
+            'properties': readList(),
+            'methods': [readFunction() for _ in xrange(next())],
+        }
+    pointers = modules['POINTERS'] = {}
+    for _ in xrange(next()):
+        name = strings[next()]
+        pointers[name] = strings[next()]
+    modules['HIERARCHY'] = readList()
+    return modules
+
+
+def loadText(data):
+    return eval(data.replace('\r\n', '\n'))
+
+
+def loadTags(data):
+    "return the PYSMELLDICT stored in data, in either format"
+    if data.startswith(MAGIC):
+        return loadBinary(data)
+    return loadText(data)
+
+
+def _readHeader(path):
+    f = open(path, 'rb')
+    try:
+        return f.read(16)
+    finally:
+        f.close()
+
+
+def _loadFile(path):
+    f = open(path, 'rb')
+    try:
+        data = f.read()
+    finally:
+        f.close()
+    return loadTags(data)
+
+
+def openTags(path):
+    """
+    Return the tags stored in path. This is a tag source (see
+    pysmell.tagstore) for SQLite databases, sharded tags (see pysmell.shards)
+    and files with an up to date symbol table (see pysmell.symboltable), a
+    PYSMELLDICT otherwise. Links (see pysmell.bundles) are followed.
+    """
+    header = _readHeader(path)
+    if isLink(header):
+        return openTags(readLink(path))
+    if sqlite3 is not None and isSQLite(header):
+        return SQLiteSource(path)
+    if isShardManifest(header):
+        return openShards(path, openTags)
+    if isFresh(indexPath(path), path):
+        return SymbolTableSource(indexPath(path), path, _loadFile)
+    return _loadFile(path)
+
+
+def readTags(path):
+    "return the PYSMELLDICT stored in path, in any format"
+    header = _readHeader(path)
+    if isLink(header):
+        return readTags(readLink(path))
+    if isShardManifest(header):
+        tags = ShardedSource(path, _loadFile)
+        try:
+            return tags.toDict()
+        finally:
+            tags.close()
+    if sqlite3 is not None and isSQLite(header):
+        tags = SQLiteSource(path)
+        try:
+            return tags.toDict()
+        finally:
+            tags.close()
+    return _loadFile(path)
+
+
+class _Link(object):
+    def __init__(self, target):
+        self.target = target
+
+
+class TagsCache(object):
+    """
+    Keeps what openTags returned for every tags file, for as long as the file
+    is not replaced (going by its inode, mtime and size), so that editors only
+    load the tags files that changed since the last completion. Links are
+    followed, and their target checked, every time.
+
+    What it returns is shared: PYSMELLDICTs must be copied before they are
+    changed.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.entries = {}
+
+    def open(self, path):
+        st = os.stat(path)
+        key = (st.st_ino, st.st_mtime, st.st_size)
+        cached = self.entries.get(path)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            tags = cached[1]
+        else:
+            self.misses += 1
+            if isLink(_readHeader(path)):
+                tags = _Link(readLink(path))
+            else:
+                tags = openTags(path)
+            self.entries[path] = (key, tags)
+        if isinstance(tags, _Link):
+            return self.open(tags.target)
+        return tags
+
+    def counts(self):
+        "(tags files reused, tags files loaded) so far"
+        return self.hits, self.misses
+
+
+# shared by everything in a process
+tagsCache = TagsCache()
+
+
+def dumpTags(modules, f, format='text'):
+    if format == 'binary':
+        dumpBinary(modules, f)
+    else:
+        dumpText(modules, f)
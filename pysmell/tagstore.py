@@ -0,0 +1,247 @@
+# tagstore.py
+# A PYSMELLDICT look-alike over tags that are not loaded in memory
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+"""
+Tag sources answer a handful of queries about the five sections of a
+PYSMELLDICT. Entries of the list sections (CONSTANTS, FUNCTIONS, HIERARCHY)
+are returned as they appear in a PYSMELLDICT, entries of the mapping sections
+(CLASSES, POINTERS) as (name, value) pairs:
+
+    entries(key)                            every entry
+    lookup(key, name)                       the value of a mapping entry, or None
+    named(key, prefix, caseSensitive)       CONSTANTS, FUNCTIONS or CLASSES entries
+                                            whose last name component starts with prefix
+    inModule(key, module)                   CONSTANTS, FUNCTIONS or CLASSES entries
+                                            defined directly in module
+    withPrefix(key, prefix)                 entries whose full name starts with prefix
+    starPointers()                          POINTERS entries ending with '*'
+
+DictSource answers them by scanning a PYSMELLDICT. Sources that keep their
+tags on disk (like pysmell.sqlitetags.SQLiteSource) answer them with indexed
+lookups. TagStore puts a number of sources together, plus an in-memory
+overlay for the tags that get merged in later (eg. the file being edited).
+"""
+
+import os
+from itertools import chain
+
+LISTS = ('CONSTANTS', 'FUNCTIONS', 'HIERARCHY')
+MAPPINGS = ('CLASSES', 'POINTERS')
+KEYS = LISTS + MAPPINGS
+
+
+def hiddenSibling(tagsPath, suffix):
+    """
+    Where the file (or directory) with suffix that goes with the tags at
+    tagsPath is kept, eg. .PYSMELLTAGS.index. Hidden, so that it is not
+    picked up as a PYSMELLTAGS.* file.
+    """
+    directory, filename = os.path.split(tagsPath)
+    return os.path.join(directory, '.%s.%s' % (filename, suffix))
+
+
+def emptyPYSMELLDICT():
+    return {'CONSTANTS': [], 'FUNCTIONS': [], 'HIERARCHY': [], 'CLASSES': {}, 'POINTERS': {}}
+
+
+def fullName(key, entry):
+    "the dotted name an entry of section key is known by"
+    if key in ('FUNCTIONS', 'CLASSES', 'POINTERS'):
+        return entry[0]
+    return entry
+
+
+def splitName(name):
+    "return (module, name) for a dotted name"
+    if '.' in name:
+        return name.rsplit('.', 1)
+    return '', name
+
+
+class DictSource(object):
+    "Answers tag source queries by scanning a PYSMELLDICT"
+    def __init__(self, PYSMELLDICT):
+        self.tags = PYSMELLDICT
+
+    def _section(self, key):
+        # not self.tags.get, codefinder.ModuleDict only implements __getitem__
+        try:
+            return self.tags[key]
+        except KeyError:
+            return emptyPYSMELLDICT()[key]
+
+    def entries(self, key):
+        if key in MAPPINGS:
+            return self._section(key).iteritems()
+        return iter(self._section(key))
+
+    def lookup(self, key, name):
+        return self._section(key).get(name, None)
+
+    def _filter(self, key, accept):
+        return [entry for entry in self.entries(key) if accept(fullName(key, entry))]
+
+    def named(self, key, prefix, caseSensitive):
+        if caseSensitive:
+            return self._filter(key, lambda name: splitName(name)[1].startswith(prefix))
+        prefix = prefix.lower()
+        return self._filter(key, lambda name: splitName(name)[1].lower().startswith(prefix))
+
+    def inModule(self, key, module):
+        return self._filter(key, lambda name: splitName(name)[0] == module)
+
+    def withPrefix(self, key, prefix):
+        return self._filter(key, lambda name: name.startswith(prefix))
+
+    def starPointers(self):
+        return self._filter('POINTERS', lambda name: name.endswith('*'))
+
+
+def query(PYSMELLDICT):
+    "return an object answering tag source queries about PYSMELLDICT"
+    if isinstance(PYSMELLDICT, TagStore):
+        return PYSMELLDICT
+    return DictSource(PYSMELLDICT)
+
+
+class TagStore(object):
+    """
+    Behaves like a PYSMELLDICT made of ``sources`` and ``overlay`` (a
+    PYSMELLDICT). Whatever gets merged into it ends up in the overlay, which
+    takes precedence over the sources.
+    """
+    def __init__(self, sources, overlay=None):
+        self.sources = list(sources)
+        self.overlay = emptyPYSMELLDICT()
+        if overlay:
+            for key in KEYS:
+                if key in overlay:
+                    self.overlay[key] = overlay[key]
+        self._overlaySource = DictSource(self.overlay)
+
+    def _sources(self):
+        return self.sources + [self._overlaySource]
+
+    def _combine(self, key, results):
+        if key in MAPPINGS:
+            # like dict.update, later sources win
+            combined = {}
+            for result in results:
+                combined.update(result)
+            return combined.items()
+        return list(chain(*results))
+
+    def entries(self, key):
+        if key in MAPPINGS:
+            return iter(self._combine(key, [source.entries(key) for source in self._sources()]))
+        return chain(*[source.entries(key) for source in self._sources()])
+
+    def lookup(self, key, name):
+        for source in reversed(self._sources()):
+            value = source.lookup(key, name)
+            if value is not None:
+                return value
+        return None
+
+    def named(self, key, prefix, caseSensitive):
+        return self._combine(key, [source.named(key, prefix, caseSensitive)
+                                        for source in self._sources()])
+
+    def inModule(self, key, module):
+        return self._combine(key, [source.inModule(key, module) for source in self._sources()])
+
+    def withPrefix(self, key, prefix):
+        return self._combine(key, [source.withPrefix(key, prefix) for source in self._sources()])
+
+    def starPointers(self):
+        return self._combine('POINTERS', [source.starPointers() for source in self._sources()])
+
+    def toDict(self):
+        "load everything into a PYSMELLDICT"
+        PYSMELLDICT = {}
+        for key in LISTS:
+            PYSMELLDICT[key] = list(self.entries(key))
+        PYSMELLDICT['POINTERS'] = dict(self.entries('POINTERS'))
+        # the members of lazily loaded classes are not there until asked for
+        PYSMELLDICT['CLASSES'] = dict((name, dict(klass, methods=klass['methods'], properties=klass['properties']))
+                                        for name, klass in self.entries('CLASSES'))
+        return PYSMELLDICT
+
+    # PYSMELLDICT protocol
+
+    def __getitem__(self, key):
+        if key in MAPPINGS:
+            return MappingView(self, key)
+        elif key in LISTS:
+            return ListView(self, key)
+        raise KeyError(key)
+
+    def setdefault(self, key, default=None):
+        return self[key]
+
+    def keys(self):
+        return list(KEYS)
+
+    def items(self):
+        return [(key, self[key]) for key in KEYS]
+
+    def __contains__(self, key):
+        return key in KEYS
+
+
+class ListView(object):
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+
+    def __iter__(self):
+        return self.store.entries(self.key)
+
+    def extend(self, values):
+        self.store.overlay[self.key].extend(values)
+
+
+class MappingView(object):
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+
+    def get(self, name, default=None):
+        value = self.store.lookup(self.key, name)
+        if value is None:
+            return default
+        return value
+
+    def __getitem__(self, name):
+        value = self.store.lookup(self.key, name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return self.store.lookup(self.key, name) is not None
+
+    def iteritems(self):
+        return self.store.entries(self.key)
+
+    def items(self):
+        return list(self.iteritems())
+
+    def keys(self):
+        return [name for name, _ in self.iteritems()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def update(self, other):
+        self.store.overlay[self.key].update(other)
@@ -1,6 +1,6 @@
 import os
 import sys
-from pysmell import idehelper
+from pysmell import idehelper, client
 from pysmell import tags as tags_module
 from pysmell import tm_dialog
 
@@ -36,16 +36,15 @@ def _main(cur_file, line_no, cur_col):
         return TOOLTIP
     source = sys.stdin.read()
 
-    PYSMELLDICT = idehelper.findPYSMELLDICT(cur_file)
-    if PYSMELLDICT is None:
-        write('No PYSMELLTAGS found - you have to generate one.')
-        return TOOLTIP
     line = source.splitlines()[line_no - 1]
     index = idehelper.findBase(line, cur_col)
     base = line[index:cur_col]
 
-    options = idehelper.detectCompletionType(cur_file, source, line_no, cur_col, base, PYSMELLDICT)
-    completions = idehelper.findCompletions(base, PYSMELLDICT, options)
+    result = client.complete(cur_file, source, line_no, cur_col, base)
+    if result is None:
+        write('No PYSMELLTAGS found - you have to generate one.')
+        return TOOLTIP
+    options, completions = result
 
     if not completions:
         write('No completions found')
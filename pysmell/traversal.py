@@ -0,0 +1,285 @@
+# traversal.py
+# Find the python files to analyse, pruning excluded and ignored directories
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import os
+import re
+import fnmatch
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+WILDCARDS = re.compile(r'[*?[]')
+
+
+class Excludes(object):
+    """
+    The -x patterns. A pattern is either a glob, matched against the name of
+    a directory or file (or against its path relative to the walked root if
+    the pattern contains a '/'), or a regular expression prefixed with 're:',
+    searched for in the relative path.
+    """
+    def __init__(self, patterns=()):
+        self.names = set()
+        self.globs = []
+        self.paths = []
+        self.regexes = []
+        for pattern in patterns:
+            if pattern.startswith('re:'):
+                self.regexes.append(re.compile(pattern[3:]))
+            elif '/' in pattern:
+                self.paths.append(pattern.strip('/'))
+            elif WILDCARDS.search(pattern):
+                self.globs.append(pattern)
+            else:
+                self.names.add(pattern)
+
+    def __nonzero__(self):
+        return bool(self.names or self.globs or self.paths or self.regexes)
+
+    def matches(self, name, relPath=None):
+        "relPath uses '/' as a separator, it defaults to name"
+        if name in self.names:
+            return True
+        for glob in self.globs:
+            if fnmatch.fnmatch(name, glob):
+                return True
+        if relPath is None:
+            relPath = name
+        for path in self.paths:
+            if fnmatch.fnmatch(relPath, path):
+                return True
+        for regex in self.regexes:
+            if regex.search(relPath):
+                return True
+        return False
+
+
+def _translateGlob(pattern):
+    "a regular expression for a .gitignore style glob, where * doesn't match /"
+    parts = []
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith('**/', index):
+            parts.append('(?:.*/)?')
+            index += 3
+        elif pattern.startswith('**', index):
+            parts.append('.*')
+            index += 2
+        elif pattern[index] == '*':
+            parts.append('[^/]*')
+            index += 1
+        elif pattern[index] == '?':
+            parts.append('[^/]')
+            index += 1
+        elif pattern[index] == '[' and ']' in pattern[index + 1:]:
+            end = pattern.index(']', index + 1)
+            parts.append('[%s]' % pattern[index + 1:end].replace('!', '^', 1))
+            index = end + 1
+        elif pattern[index] == '\\' and index + 1 < len(pattern):
+            parts.append(re.escape(pattern[index + 1]))
+            index += 2
+        else:
+            parts.append(re.escape(pattern[index]))
+            index += 1
+    return ''.join(parts)
+
+
+def parseGitignore(lines):
+    "return (match, negated, dirOnly) rules for the lines of a .gitignore file"
+    rules = []
+    for line in lines:
+        line = line.rstrip('\r\n').rstrip(' ')
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        dirOnly = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        if '/' in line:
+            regex = '^%s$' % _translateGlob(line.lstrip('/'))
+        else:
+            regex = '^(?:.*/)?%s$' % _translateGlob(line)
+        rules.append((re.compile(regex).match, negated, dirOnly))
+    return rules
+
+
+def parseHgignore(lines):
+    "return (match, negated, dirOnly) rules for the lines of a .hgignore file"
+    rules = []
+    syntax = 'regexp'
+    for line in lines:
+        line = re.sub(r'(?<!\\)#.*', '', line).replace('\\#', '#').strip()
+        if not line:
+            continue
+        if line.startswith('syntax:'):
+            syntax = line[len('syntax:'):].strip()
+            continue
+        kind = syntax
+        for prefix in ('re:', 'regexp:', 'glob:'):
+            if line.startswith(prefix):
+                kind, line = prefix[:-1], line[len(prefix):]
+        if kind in ('re', 'regexp'):
+            try:
+                rules.append((re.compile(line).search, False, False))
+            except re.error:
+                continue
+        else:
+            regex = '^(?:.*/)?%s(?:/|$)' % _translateGlob(line)
+            rules.append((re.compile(regex).match, False, False))
+    return rules
+
+
+IGNOREFILES = [('.gitignore', parseGitignore), ('.hgignore', parseHgignore)]
+
+
+class IgnoreRules(object):
+    """
+    The rules of the .gitignore and .hgignore files that apply in a
+    directory. Later rules override earlier ones, like in git.
+    """
+    def __init__(self, rules=()):
+        # (directory of the ignore file, match, negated, dirOnly)
+        self.rules = list(rules)
+
+    def extended(self, directory):
+        "the rules that apply below directory, including its own ignore files"
+        rules = []
+        for filename, parse in IGNOREFILES:
+            path = os.path.join(directory, filename)
+            if not os.path.isfile(path):
+                continue
+            f = open(path, 'r')
+            try:
+                lines = f.readlines()
+            finally:
+                f.close()
+            base = os.path.abspath(directory)
+            rules.extend((base,) + rule for rule in parse(lines))
+        if not rules:
+            return self
+        return IgnoreRules(self.rules + rules)
+
+    def ignored(self, path, isDir):
+        path = os.path.abspath(path)
+        result = False
+        for base, match, negated, dirOnly in self.rules:
+            if dirOnly and not isDir:
+                continue
+            if not path.startswith(base + os.sep):
+                continue
+            if match(path[len(base) + 1:].replace(os.sep, '/')):
+                result = not negated
+        return result
+
+
+def _isRepository(directory):
+    return os.path.isdir(os.path.join(directory, '.git')) or os.path.isdir(os.path.join(directory, '.hg'))
+
+
+def ancestorRules(directory):
+    "the ignore rules of the directories above directory, up to its repository"
+    ancestors = []
+    current = os.path.abspath(directory)
+    while not _isRepository(current):
+        parent = os.path.dirname(current)
+        if parent == current:
+            # not in a repository, the ignore files up here mean nothing
+            return IgnoreRules()
+        ancestors.append(parent)
+        current = parent
+    rules = IgnoreRules()
+    for ancestor in reversed(ancestors):
+        rules = rules.extended(ancestor)
+    return rules
+
+
+def _listDirectory(directory):
+    "return (directories to descend into, files) like os.walk"
+    dirs, files = [], []
+    if scandir is not None:
+        try:
+            for entry in scandir(directory):
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        dirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+        except OSError:
+            pass
+        return dirs, files
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return dirs, files
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            if not os.path.islink(path):
+                dirs.append(name)
+        else:
+            files.append(name)
+    return dirs, files
+
+
+class Walker(object):
+    """
+    Finds python files below a directory, in the order os.walk would. Prunes
+    the directories that match ``excluded`` (see Excludes), and those ignored
+    by .gitignore and .hgignore files if ``vcsIgnore`` is True, before
+    descending into them. ``pruned`` counts them.
+    """
+    def __init__(self, excluded=(), vcsIgnore=False, verbose=False):
+        self.excludes = Excludes(excluded)
+        self.vcsIgnore = vcsIgnore
+        self.verbose = verbose
+        self.pruned = 0
+
+    def walk(self, root):
+        "yield a (directory, filename) pair for every python file below root"
+        rules = None
+        if self.vcsIgnore:
+            rules = ancestorRules(root)
+        return self._walk(root, '', rules)
+
+    def _isSkipped(self, path, name, relPath, isDir, rules):
+        if self.excludes.matches(name, relPath):
+            return True
+        if rules is None:
+            return False
+        return (isDir and name in ('.git', '.hg')) or rules.ignored(path, isDir)
+
+    def _walk(self, directory, relDir, rules):
+        if rules is not None:
+            rules = rules.extended(directory)
+        dirs, files = _listDirectory(directory)
+        for name in files:
+            if not name.endswith('.py'):
+                continue
+            relPath = relDir and '%s/%s' % (relDir, name) or name
+            if not self._isSkipped(os.path.join(directory, name), name, relPath, False, rules):
+                yield directory, name
+        for name in dirs:
+            path = os.path.join(directory, name)
+            relPath = relDir and '%s/%s' % (relDir, name) or name
+            if self._isSkipped(path, name, relPath, True, rules):
+                if self.verbose:
+                    print 'pruning', name, 'in', directory
+                self.pruned += 1
+                continue
+            for found in self._walk(path, relPath, rules):
+                yield found
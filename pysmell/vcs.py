@@ -0,0 +1,165 @@
+# vcs.py
+# Find the python files that changed since a revision, through the git CLI
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import os
+import subprocess
+
+from pysmell.codefinder import findPackage
+from pysmell.traversal import Excludes
+
+
+class GitError(Exception):
+    pass
+
+
+def _git(args, cwd):
+    try:
+        proc = subprocess.Popen(['git'] + args, cwd=cwd,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError, e:
+        raise GitError('could not run git: %s' % e)
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        raise GitError(err.strip() or 'git %s failed' % ' '.join(args))
+    return out
+
+
+def _toplevel(path):
+    if not os.path.isdir(path):
+        path = os.path.dirname(path) or os.curdir
+    return _git(['rev-parse', '--show-toplevel'], path).strip()
+
+
+def _resolved(path):
+    """
+    path with the symbolic links of its directories resolved, like the ones
+    git reports, but not a link to a file itself, which git tracks as such
+    """
+    path = os.path.abspath(path)
+    if os.path.isdir(path):
+        return os.path.realpath(path)
+    directory, filename = os.path.split(path)
+    return os.path.join(os.path.realpath(directory), filename)
+
+
+def changedSince(revision, roots):
+    """
+    Ask git which python files changed since ``revision`` in the repositories
+    ``roots`` are in, counting the working tree and untracked files.
+
+    returns: (changed, deleted), sets of absolute paths, with the symbolic
+             links of their directories resolved. A renamed file is deleted
+             under its old name and changed under its new one.
+    """
+    changed, deleted = set(), set()
+    for toplevel in set(_resolved(_toplevel(_resolved(root))) for root in roots):
+        fields = _git(['diff', '--name-status', '-M', '-z', revision, '--'], toplevel).split('\0')
+        index = 0
+        while index < len(fields) and fields[index]:
+            status = fields[index][0]
+            if status in 'RC':
+                old, new = fields[index + 1], fields[index + 2]
+                index += 3
+                if status == 'R':
+                    deleted.add(os.path.join(toplevel, old))
+                changed.add(os.path.join(toplevel, new))
+            else:
+                path = os.path.join(toplevel, fields[index + 1])
+                index += 2
+                if status == 'D':
+                    deleted.add(path)
+                else:
+                    changed.add(path)
+        untracked = _git(['ls-files', '--others', '--exclude-standard', '-z'], toplevel)
+        changed.update(os.path.join(toplevel, path) for path in untracked.split('\0') if path)
+
+    isPython = lambda path: path.endswith('.py')
+    # a file can be changed in the working tree after being deleted in a commit
+    gone = set(path for path in changed if not os.path.exists(path))
+    return (set(filter(isPython, changed - gone)),
+            set(filter(isPython, (deleted - changed) | gone)))
+
+
+def moduleName(filename, absPath):
+    "the name ``process`` gives the module in absPath/filename"
+    package = findPackage(absPath)
+    if filename == '__init__.py':
+        return package
+    if package:
+        return '%s.%s' % (package, filename[:-3])
+    return filename[:-3]
+
+
+def _oldModuleName(path, hierarchy):
+    "the longest dotted tail of path known to hierarchy, as the file may be gone"
+    parts = os.path.splitext(path)[0].split(os.sep)
+    if parts[-1] == '__init__':
+        parts.pop()
+    for start in range(len(parts)):
+        name = '.'.join(parts[start:])
+        if name in hierarchy:
+            return name
+    return None
+
+
+def selectChanged(changes, roots, excluded, hierarchy, listFiles):
+    """
+    Pick the files that ``process`` would analyse out of ``changes`` (as
+    returned by changedSince), without walking ``roots``.
+
+    excluded: the -x patterns ``process`` skips (see pysmell.traversal.Excludes).
+
+    hierarchy: the HIERARCHY of the tags the changes are patched into.
+
+    listFiles: called with a directory, returns the (filename, absPath) pairs
+               ``process`` finds in it.
+
+    returns: (files, stale), the (filename, absPath) pairs to analyse and the
+             names of the modules to drop first.
+
+    When an __init__.py changes, every file below it is analysed again, as
+    its package may have changed.
+    """
+    changed, deleted = [set(_resolved(path) for path in paths) for paths in changes]
+    # compared with the paths git reports
+    roots = [_resolved(root) for root in roots]
+    hierarchy = set(hierarchy)
+    excludes = Excludes(excluded)
+
+    def isIncluded(path):
+        for root in roots:
+            if path == root:
+                return True
+            if path.startswith(root + os.sep):
+                parts = path[len(root) + 1:].split(os.sep)
+                for index, part in enumerate(parts):
+                    if excludes.matches(part, '/'.join(parts[:index + 1])):
+                        return False
+                return True
+        return False
+
+    paths = set(path for path in changed if isIncluded(path))
+    deleted = set(path for path in deleted if isIncluded(path))
+    for path in list(paths | deleted):
+        if os.path.basename(path) == '__init__.py':
+            for filename, absPath in listFiles(os.path.dirname(path)):
+                paths.add(os.path.join(absPath, filename))
+
+    files = []
+    stale = set()
+    for path in sorted(paths):
+        absPath, filename = os.path.split(path)
+        files.append((filename, absPath))
+        stale.add(moduleName(filename, absPath))
+    for path in paths | deleted:
+        name = _oldModuleName(path, hierarchy)
+        if name is not None:
+            stale.add(name)
+    return files, stale
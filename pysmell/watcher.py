@@ -0,0 +1,139 @@
+# watcher.py
+# Notice changes to python files so that PYSMELLTAGS can be kept up to date
+# Copyright (C) 2008 Orestis Markou
+# All rights reserved
+# E-mail: orestis@orestis.gr
+
+# http://orestis.gr
+
+# Released subject to the BSD License
+
+import os
+import time
+
+from pysmell.traversal import Excludes
+
+try:
+    import pyinotify
+except ImportError:
+    pyinotify = None
+
+DEBOUNCE = 1.0
+POLL_INTERVAL = 1.0
+
+
+class PollingObserver(object):
+    """
+    Notices changes by comparing the size and mtime of every file ``listFiles``
+    returns (full paths) every POLL_INTERVAL seconds.
+    """
+    def __init__(self, listFiles, interval=POLL_INTERVAL):
+        self.listFiles = listFiles
+        self.interval = interval
+        self.snapshot = self._takeSnapshot()
+
+    def _takeSnapshot(self):
+        snapshot = {}
+        for path in self.listFiles():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_size, st.st_mtime)
+        return snapshot
+
+    def wait(self, timeout=None):
+        "wait for a change for up to timeout seconds, return True if there was one"
+        deadline = timeout is not None and time.time() + timeout
+        while True:
+            snapshot = self._takeSnapshot()
+            if snapshot != self.snapshot:
+                self.snapshot = snapshot
+                return True
+            if deadline and time.time() >= deadline:
+                return False
+            if deadline:
+                time.sleep(max(0, min(self.interval, deadline - time.time())))
+            else:
+                time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyObserver(object):
+    "Notices changes to python files under ``roots`` through pyinotify"
+    def __init__(self, roots, excluded):
+        self.excluded = Excludes(excluded)
+        self.changed = False
+        self.manager = pyinotify.WatchManager()
+        self.notifier = pyinotify.Notifier(self.manager, self._event)
+        mask = (pyinotify.IN_CLOSE_WRITE | pyinotify.IN_CREATE | pyinotify.IN_DELETE |
+                pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO)
+        for root in roots:
+            if not os.path.isdir(root):
+                root = os.path.dirname(root) or '.'
+            self.manager.add_watch(os.path.abspath(root), mask, rec=True, auto_add=True,
+                                   exclude_filter=self._isExcluded)
+
+    def _isExcluded(self, path):
+        for part in path.split(os.sep):
+            if self.excluded.matches(part):
+                return True
+        return False
+
+    def _event(self, event):
+        if self._isExcluded(event.pathname):
+            return
+        if event.dir or event.pathname.endswith('.py'):
+            self.changed = True
+
+    def wait(self, timeout=None):
+        "wait for a change for up to timeout seconds, return True if there was one"
+        deadline = timeout is not None and time.time() + timeout
+        self.changed = False
+        while not self.changed:
+            if deadline:
+                remaining = int(max(0, deadline - time.time()) * 1000)
+                if not remaining:
+                    return False
+            else:
+                remaining = None
+            if self.notifier.check_events(remaining):
+                self.notifier.read_events()
+                self.notifier.process_events()
+            elif deadline:
+                return False
+        return True
+
+    def close(self):
+        self.notifier.stop()
+
+
+def createObserver(roots, excluded, listFiles):
+    """
+    Return an InotifyObserver when pyinotify is available and works, a
+    PollingObserver calling ``listFiles`` otherwise.
+    """
+    if pyinotify is not None:
+        try:
+            return InotifyObserver(roots, excluded)
+        except (OSError, pyinotify.WatchManagerError):
+            pass
+    return PollingObserver(listFiles)
+
+
+def watch(observer, regenerate, debounce=DEBOUNCE, rounds=None):
+    """
+    Call ``regenerate`` every time ``observer`` notices changes, once no more
+    changes have come in for ``debounce`` seconds.
+
+    rounds: stop after regenerating that many times. Forever if None.
+    """
+    while rounds is None or rounds > 0:
+        observer.wait()
+        while observer.wait(debounce):
+            pass
+        regenerate()
+        if rounds is not None:
+            rounds -= 1